@@ -0,0 +1,78 @@
+import contextlib
+import io
+import random
+import time
+
+from parking_lot import ParkingLot
+from parking_floor import ParkingFloor
+from vehicle_size import VehicleSize
+from vehicle import Vehicle
+
+NUM_FLOORS = 30
+SPOTS_PER_FLOOR = 1_000
+BATCH_SIZE = 500
+NUM_VEHICLES = 20_000
+
+
+def build_lot() -> ParkingLot:
+    lot = ParkingLot()
+    sizes = list(VehicleSize)
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level)
+        for i in range(SPOTS_PER_FLOOR):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+
+def make_vehicles() -> list[Vehicle]:
+    rng = random.Random(42)
+    sizes = list(VehicleSize)
+    return [Vehicle(f"plate-{i}", rng.choice(sizes)) for i in range(NUM_VEHICLES)]
+
+
+def run_sequential(vehicles: list[Vehicle]) -> tuple[float, dict]:
+    lot = build_lot()
+    spots = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for vehicle in vehicles: 
+            lot.park_vehicle(vehicle)
+        elapsed = time.perf_counter() - start
+        for plate, ticket in lot.tickets.items(): 
+            spots[plate] = ticket.spot.id
+        start = time.perf_counter()
+        for vehicle in vehicles: 
+            lot.unpark_vehicle(vehicle.plate_number)
+    return elapsed + time.perf_counter() - start, spots
+
+
+def run_batched(vehicles: list[Vehicle]) -> tuple[float, dict]:
+    lot = build_lot()
+    spots = {}
+    start = time.perf_counter()
+    for i in range(0, len(vehicles), BATCH_SIZE): 
+        result = lot.park_vehicles(vehicles[i:i + BATCH_SIZE])
+        for plate, ticket in result.tickets.items(): 
+            spots[plate] = ticket.spot.id
+    plates = [vehicle.plate_number for vehicle in vehicles]
+    for i in range(0, len(plates), BATCH_SIZE): 
+        lot.unpark_vehicles(plates[i:i + BATCH_SIZE])
+    return time.perf_counter() - start, spots
+
+
+def main():
+    vehicles = make_vehicles()
+    sequential, sequential_spots = run_sequential(vehicles)
+    batched, batched_spots = run_batched(vehicles)
+
+    # the batch path must assign exactly the spots the sequential path did
+    assert batched_spots == sequential_spots
+
+    print(f"Park + unpark {NUM_VEHICLES:,} vehicles, {NUM_FLOORS * SPOTS_PER_FLOOR:,} spots")
+    print(f"- sequential: {sequential:.3f}s ({2 * NUM_VEHICLES / sequential:,.0f} ops/s)")
+    print(f"- batches of {BATCH_SIZE}: {batched:.3f}s ({2 * NUM_VEHICLES / batched:,.0f} ops/s)")
+    print(f"- speedup: {sequential / batched:.2f}x")
+
+if __name__ == "__main__": 
+    main()
@@ -0,0 +1,16 @@
+from parking_ticket import ParkingTicket
+from vehicle import Vehicle
+
+class ParkBatchResult: 
+    def __init__(self):
+        self.tickets: dict[str, ParkingTicket] = {}
+        self.failures: list[Vehicle] = []
+        # vehicles whose plate already had an open ticket, e.g. a retried or repeated park
+        self.duplicates: list[Vehicle] = []
+
+
+class UnparkBatchResult: 
+    def __init__(self):
+        self.tickets: dict[str, ParkingTicket] = {}
+        self.fees: dict[str, float] = {}
+        self.failures: list[str] = []
@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_floor import ParkingFloor
+from vehicle_size import VehicleSize
+from vehicle import Vehicle
+
+NUM_FLOORS = 10
+SPOTS_PER_FLOOR = 300
+OPS_PER_THREAD = 20_000
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+
+
+def build_lot() -> ConcurrentParkingLot:
+    lot = ConcurrentParkingLot()
+    sizes = list(VehicleSize)
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level, compact=level % 2 == 1)
+        for i in range(SPOTS_PER_FLOOR):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+
+class ConsistencyError(Exception):
+    pass
+
+
+def check(condition: bool, message: str):
+    # raised rather than asserted, so the checks survive python -O
+    if not condition:
+        raise ConsistencyError(message)
+
+
+def gate(lot: ConcurrentParkingLot, gate_id: int, start: threading.Barrier, ops: int = OPS_PER_THREAD):
+    rng = random.Random(gate_id)
+    sizes = list(VehicleSize)
+    parked = []
+    start.wait()
+    for i in range(ops):
+        if parked and rng.random() < 0.5:
+            plate = parked.pop(rng.randrange(len(parked)))
+            check(bool(lot.unpark_vehicles([plate]).fees), f"{plate} was parked but could not be unparked")
+        else:
+            vehicle = Vehicle(f"{gate_id}-{i}", rng.choice(sizes))
+            if lot.park_vehicles([vehicle]).tickets:
+                parked.append(vehicle.plate_number)
+
+
+def check_consistency(lot: ConcurrentParkingLot):
+    # no spot may be referenced by two open tickets
+    spot_ids = [tuple(ticket.spot.id) for ticket in lot.tickets.values()]
+    check(len(spot_ids) == len(set(spot_ids)), "spot double-booked")
+    for spot_id in spot_ids:
+        check(not lot.floors[spot_id[0]].spots[spot_id[1]].open, f"ticket for open spot {spot_id}")
+    taken = sum(1 for floor in lot.floors.values() for spot in floor.spots if not spot.open)
+    check(taken == len(spot_ids), f"{taken} taken spots but {len(spot_ids)} tickets")
+    occupancy = lot.occupancy()
+    for size in VehicleSize:
+        open_spots = sum(1 for floor in lot.floors.values() for spot in floor.spots if spot.open and spot.type == size)
+        check(occupancy["total"][size]["open"] == open_spots, f"{size} open count is off")
+
+
+def run_gates(lot: ConcurrentParkingLot, num_threads: int, ops: int = OPS_PER_THREAD) -> float:
+    # returns the elapsed time; the first exception any gate thread raised is re-raised here
+    errors: list[BaseException] = []
+
+    def target(gate_id: int):
+        try:
+            gate(lot, gate_id, start, ops)
+        except BaseException as error:
+            errors.append(error)
+            start.abort()
+
+    start = threading.Barrier(num_threads + 1)
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    try:
+        start.wait()
+    except threading.BrokenBarrierError:
+        pass
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    if errors:
+        raise errors[0]
+    return elapsed
+
+
+def run(num_threads: int) -> float:
+    lot = build_lot()
+    elapsed = run_gates(lot, num_threads)
+    check_consistency(lot)
+    return num_threads * OPS_PER_THREAD / elapsed
+
+
+def main():
+    print(f"Mixed park/unpark, {NUM_FLOORS * SPOTS_PER_FLOOR:,} spots, {OPS_PER_THREAD:,} ops per gate thread")
+    for num_threads in THREAD_COUNTS:
+        print(f"- {num_threads:>2} threads: {run(num_threads):,.0f} ops/s (no double-booking)")
+
+if __name__ == "__main__": 
+    main()
@@ -0,0 +1,63 @@
+import contextlib
+import datetime
+import threading
+
+from parking_floor import ParkingFloor
+from parking_lot import DuplicatePlateError, ParkingLot
+from parking_spot import ParkingSpot
+from parking_strategy import IParkingStrategy
+from parking_ticket import ParkingTicket
+from ticket_store import ITicketStore
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+class ConcurrentParkingLot(ParkingLot): 
+    def __init__(self, ticket_store: ITicketStore | None = None):
+        super().__init__(ticket_store)
+        # every index structure (floor heaps, open_floors, counters) is partitioned by size,
+        # so one lock per size covers a whole park/unpark and different sizes never contend
+        self.__size_locks: dict[VehicleSize, threading.Lock] = {size: threading.Lock() for size in VehicleSize}
+
+    def add_floor(self, floor: ParkingFloor): 
+        with self.__all_sizes_locked():
+            super().add_floor(floor)
+
+    def set_parking_strategy(self, parking_strategy: IParkingStrategy):
+        with self.__all_sizes_locked():
+            super().set_parking_strategy(parking_strategy)
+
+    @contextlib.contextmanager
+    def __all_sizes_locked(self):
+        for size in VehicleSize:
+            self.__size_locks[size].acquire()
+        try:
+            yield
+        finally:
+            for size in VehicleSize:
+                self.__size_locks[size].release()
+
+    def _claim_spot(self, vehicle: Vehicle, time_in: datetime.datetime) -> ParkingTicket | None:
+        if vehicle.plate_number in self.tickets:
+            raise DuplicatePlateError(f"Vehicle {vehicle.plate_number} is already parked inside the parking lot")
+        with self.__size_locks[vehicle.size]:
+            spot: ParkingSpot | None = self._find_spot(vehicle)
+            if not spot or not spot.claim(vehicle):
+                return None
+        ticket = ParkingTicket(vehicle=vehicle, spot=spot, time_in=time_in)
+        # stores are thread-safe; not serializing here lets a WAL store group concurrent commits.
+        # The store refuses a plate that is already open, so two gates parking it at once get one spot.
+        if not self.tickets.open_ticket(ticket):
+            with self.__size_locks[vehicle.size]:
+                spot.unpark_vehicle()
+            raise DuplicatePlateError(f"Vehicle {vehicle.plate_number} is already parked inside the parking lot")
+        return ticket
+
+    def _release_spot(self, plate_number: str, time_out: datetime.datetime) -> tuple[ParkingTicket, float] | None:
+        # closing a ticket removes it, so two exit gates can never release the same spot twice
+        ticket = self.tickets.close_ticket(plate_number)
+        if not ticket: 
+            return None
+        total_cost = self.payment_strategy.process_payment(ticket=ticket, time_out=time_out)
+        with self.__size_locks[ticket.spot.type]:
+            ticket.spot.unpark_vehicle()
+        return ticket, total_cost
@@ -0,0 +1,37 @@
+from array import array
+import datetime
+import random
+import time
+
+from payment_strategy import IPaymentStrategy, FlatFeeStrategy, HourlyRateStrategy, TieredRateStrategy
+
+NUM_TICKETS = 10_000_000
+STRATEGIES: list[IPaymentStrategy] = [
+    FlatFeeStrategy(),
+    HourlyRateStrategy(),
+    HourlyRateStrategy(daily_cap=20),
+    TieredRateStrategy(daily_cap=25),
+]
+
+
+def make_columns(rng: random.Random) -> tuple[array, array]:
+    start = datetime.datetime(2025, 1, 1).timestamp()
+    time_in = array("d", (start + rng.random() * 86_400 for _ in range(NUM_TICKETS)))
+    time_out = array("d", (t + rng.expovariate(1 / 14_400) for t in time_in))
+    return time_in, time_out
+
+
+def main():
+    rng = random.Random(7)
+    time_in, time_out = make_columns(rng)
+    print(f"Pricing {NUM_TICKETS:,} tickets")
+    for strategy in STRATEGIES:
+        began = time.perf_counter()
+        fees = strategy.process_payments(time_in, time_out)
+        elapsed = time.perf_counter() - began
+        cap = getattr(strategy, "daily_cap", None)
+        label = type(strategy).__name__ + (f" (cap {cap})" if cap else "")
+        print(f"- {label}: {elapsed:.2f}s ({NUM_TICKETS / elapsed / 1e6:.2f}M tickets/s), total {sum(fees):,.2f}")
+
+if __name__ == "__main__": 
+    main()
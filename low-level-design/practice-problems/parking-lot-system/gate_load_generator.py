@@ -0,0 +1,83 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from gate_server import GateServer
+from parking_floor import ParkingFloor
+from payment_strategy import FlatFeeStrategy
+from vehicle_size import VehicleSize
+
+NUM_GATES = 32
+REQUESTS_PER_GATE = 1_000
+NUM_FLOORS = 10
+SPOTS_PER_FLOOR = 600
+# simulated latency of a remote payment processor, in seconds
+PAYMENT_DELAY = 0.002
+
+
+class SlowFlatFeeStrategy(FlatFeeStrategy): 
+    def process_payment(self, ticket, time_out) -> float: 
+        time.sleep(PAYMENT_DELAY)
+        return super().process_payment(ticket, time_out)
+
+
+def build_lot() -> ConcurrentParkingLot:
+    lot = ConcurrentParkingLot()
+    lot.set_payment_strategy(SlowFlatFeeStrategy())
+    sizes = list(VehicleSize)
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level)
+        for i in range(SPOTS_PER_FLOOR):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+
+async def gate(host: str, port: int, gate_id: int, latencies: list[float]) -> None:
+    # each gate is a closed loop: send a request, wait for its reply, repeat
+    rng = random.Random(gate_id)
+    sizes = [size.name for size in VehicleSize]
+    reader, writer = await asyncio.open_connection(host, port)
+    parked = []
+    for i in range(REQUESTS_PER_GATE):
+        if parked and rng.random() < 0.5:
+            request = {"id": i, "op": "unpark", "plate": parked.pop(rng.randrange(len(parked)))}
+        else:
+            request = {"id": i, "op": "park", "plate": f"{gate_id}-{i}", "size": rng.choice(sizes)}
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if request["op"] == "park" and response["ok"]:
+            parked.append(request["plate"])
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(host: str | None = None, port: int | None = None) -> None:
+    server = None
+    if host is None:
+        server = GateServer(build_lot(), port=0)
+        await server.start()
+        host, port = server.host, server.port
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(gate(host, port, i, latencies) for i in range(NUM_GATES)))
+    elapsed = time.perf_counter() - start
+
+    if server:
+        await server.close()
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{NUM_GATES} gates x {REQUESTS_PER_GATE:,} requests, payment delay {PAYMENT_DELAY * 1000:.0f}ms")
+    print(f"- throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"- p50 latency: {cuts[49] * 1000:.2f}ms")
+    print(f"- p99 latency: {cuts[98] * 1000:.2f}ms")
+
+
+if __name__ == "__main__": 
+    asyncio.run(run())
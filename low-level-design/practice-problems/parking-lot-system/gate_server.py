@@ -0,0 +1,164 @@
+import asyncio
+import contextlib
+import datetime
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_floor import ParkingFloor
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+# Protocol: one JSON object per line in each direction.
+#   -> {"id": 1, "op": "park", "plate": "ABC123", "size": "COMPACT"}
+#   <- {"id": 1, "ok": true, "plate": "ABC123", "spot": [1, 0], "time_in": "..."}
+#   -> {"id": 2, "op": "unpark", "plate": "ABC123"}
+#   <- {"id": 2, "ok": true, "plate": "ABC123", "spot": [1, 0], "time_in": "...", "time_out": "...", "fee": 5}
+# Failures reply {"id": ..., "ok": false, "error": "..."}.
+
+class GateServer: 
+    def __init__(self, lot: ConcurrentParkingLot, host: str = "127.0.0.1", port: int = 8765, 
+                 max_batch: int = 256, payment_workers: int = 8):
+        self.lot = lot
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        # unparks run here so a slow payment strategy never blocks the event loop
+        self.__payments = ThreadPoolExecutor(max_workers=payment_workers)
+        # park batches run one at a time off the loop, so a WAL fsync never stalls other connections
+        self.__parks = ThreadPoolExecutor(max_workers=1)
+        self.__park_requests: asyncio.Queue | None = None
+        self.__server: asyncio.AbstractServer | None = None
+        self.__batcher: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.__park_requests = asyncio.Queue()
+        self.__batcher = asyncio.create_task(self.__park_batches())
+        self.__server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__batcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.__batcher
+        self.__payments.shutdown(wait=True)
+        self.__parks.shutdown(wait=True)
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.__reply(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def __reply(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            request_id = request.get("id")
+            if not isinstance(request.get("plate"), str):
+                raise ValueError("plate must be a string")
+            match request.get("op"):
+                case "park":
+                    response = await self.park(request["plate"], VehicleSize[request["size"]])
+                case "unpark":
+                    response = await self.unpark(request["plate"])
+                case op:
+                    response = {"ok": False, "error": f"Unknown op {op}"}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"ok": False, "error": f"Bad request: {e}"}
+        except Exception as e:
+            # the lot failed; the client still gets an answer for its request
+            response = {"ok": False, "error": f"Server error: {e}"}
+        response["id"] = request_id
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    async def park(self, plate_number: str, size: VehicleSize) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self.__park_requests.put((Vehicle(plate_number, size), future))
+        return await future
+
+    async def unpark(self, plate_number: str) -> dict:
+        loop = asyncio.get_running_loop()
+        time_out = datetime.datetime.now()
+        result = await loop.run_in_executor(self.__payments, self.lot.unpark_vehicles, [plate_number], None, time_out)
+        if plate_number in result.failures:
+            return {"ok": False, "plate": plate_number, "error": f"Vehicle {plate_number} cannot be found inside the parking lot"}
+        ticket = result.tickets[plate_number]
+        return {
+            "ok": True,
+            "plate": plate_number,
+            "spot": list(ticket.spot.id),
+            "time_in": ticket.time_in.isoformat(),
+            "time_out": time_out.isoformat(),
+            "fee": result.fees[plate_number],
+        }
+
+    async def __park_batches(self) -> None:
+        # park requests that queued up together become one park_vehicles call
+        while True:
+            batch = [await self.__park_requests.get()]
+            while len(batch) < self.max_batch and not self.__park_requests.empty():
+                batch.append(self.__park_requests.get_nowait())
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(self.__parks, self.lot.park_vehicles, [vehicle for vehicle, _ in batch])
+            except Exception as e:
+                # fail this batch's requests and keep serving the next ones
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            duplicates = {id(vehicle) for vehicle in result.duplicates}
+            for vehicle, future in batch:
+                if future.cancelled():
+                    continue
+                ticket = result.tickets.get(vehicle.plate_number)
+                if id(vehicle) in duplicates:
+                    future.set_result({
+                        "ok": False,
+                        "plate": vehicle.plate_number,
+                        "error": f"Vehicle {vehicle.plate_number} is already parked inside the parking lot",
+                    })
+                elif ticket and ticket.vehicle is vehicle:
+                    future.set_result({
+                        "ok": True,
+                        "plate": vehicle.plate_number,
+                        "spot": list(ticket.spot.id),
+                        "time_in": ticket.time_in.isoformat(),
+                    })
+                else:
+                    future.set_result({
+                        "ok": False, 
+                        "plate": vehicle.plate_number, 
+                        "error": f"Parking Lot Full: cannot park vehicle {vehicle.plate_number} of size {vehicle.size}",
+                    })
+
+
+def main():
+    lot = ConcurrentParkingLot()
+    for level, size in enumerate(VehicleSize, start=1):
+        floor = ParkingFloor(level)
+        for _ in range(100):
+            floor.add_spot(size)
+        lot.add_floor(floor)
+    server = GateServer(lot)
+    print(f"Gate server listening on {server.host}:{server.port}")
+    asyncio.run(server.serve_forever())
+
+if __name__ == "__main__": 
+    main()
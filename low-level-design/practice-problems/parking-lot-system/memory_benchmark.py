@@ -0,0 +1,46 @@
+import gc
+import tracemalloc
+
+from parking_lot import ParkingLot
+from parking_floor import ParkingFloor
+from vehicle_size import VehicleSize
+from vehicle import Vehicle
+
+NUM_SPOTS = 1_000_000
+NUM_FLOORS = 20
+
+
+def build_lot(compact: bool) -> ParkingLot:
+    lot = ParkingLot()
+    sizes = list(VehicleSize)
+    per_floor = NUM_SPOTS // NUM_FLOORS
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level, compact=compact)
+        for i in range(per_floor):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+
+def measure(compact: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    lot = build_lot(compact)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # sanity check that the lot still parks vehicles through the strategy
+    spot = lot.parking_strategy.find_spot(Vehicle("bench", VehicleSize.COMPACT), lot.floors, lot.open_floors[VehicleSize.COMPACT])
+    assert spot is not None and spot.open
+    return current
+
+
+def main():
+    print(f"Memory for {NUM_SPOTS:,} spots across {NUM_FLOORS} floors")
+    results = {}
+    for name, compact in (("object spots", False), ("array spots", True)):
+        results[name] = measure(compact)
+        print(f"- {name}: {results[name] / 1024 / 1024:.1f} MiB ({results[name] / NUM_SPOTS:.1f} bytes/spot)")
+    print(f"- ratio: {results['object spots'] / results['array spots']:.1f}x")
+
+if __name__ == "__main__": 
+    main()
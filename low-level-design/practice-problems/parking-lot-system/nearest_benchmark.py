@@ -0,0 +1,90 @@
+import math
+import random
+import statistics
+import time
+
+from parking_lot import ParkingLot
+from parking_floor import ParkingFloor
+from parking_strategy import IParkingStrategy, ParkLowerLevelStrategy, ParkNearestStrategy
+from vehicle_size import VehicleSize
+from vehicle import Vehicle
+
+NUM_FLOORS = 10
+ROWS, COLUMNS = 50, 100
+SPACING = 3.0
+FILL_RATIO = 0.9
+NUM_QUERIES = 2_000
+ENTRANCE = (0, 150.0, 0.0)
+
+
+def build_lot(strategy: IParkingStrategy) -> ParkingLot:
+    lot = ParkingLot()
+    lot.set_parking_strategy(strategy)
+    sizes = list(VehicleSize)
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level)
+        for row in range(ROWS):
+            for column in range(COLUMNS):
+                floor.add_spot(sizes[(row + column) % len(sizes)], (column * SPACING, row * SPACING))
+        lot.add_floor(floor)
+    rng = random.Random(3)
+    lot.park_vehicles(Vehicle(f"fill-{i}", rng.choice(sizes)) for i in range(int(NUM_FLOORS * ROWS * COLUMNS * FILL_RATIO)))
+    # free a random tenth of the lot so open spots are scattered rather than all on the top floors
+    plates = [plate for plate, _ in lot.tickets.items()]
+    lot.unpark_vehicles(rng.sample(plates, len(plates) // 10))
+    return lot
+
+
+def brute_force_distance(lot: ParkingLot, size: VehicleSize, floor_cost: float) -> float:
+    level, x, y = ENTRANCE
+    return min(
+        abs(floor.num - level) * floor_cost + math.hypot(spot.position[0] - x, spot.position[1] - y)
+        for floor in lot.floors.values()
+        for spot in floor.spots
+        if spot.open and spot.type == size
+    )
+
+
+def distance(spot, floor_cost: float) -> float:
+    level, x, y = ENTRANCE
+    return abs(spot.id[0] - level) * floor_cost + math.hypot(spot.position[0] - x, spot.position[1] - y)
+
+
+def measure(lot: ParkingLot, floor_cost: float) -> tuple[list[float], list[float]]:
+    # alternate a query with a park and an unpark so the index keeps changing underneath it
+    rng = random.Random(11)
+    sizes = list(VehicleSize)
+    latencies, distances = [], []
+    parked = [plate for plate, _ in lot.tickets.items()]
+    for i in range(NUM_QUERIES):
+        vehicle = Vehicle(f"query-{i}", rng.choice(sizes))
+        start = time.perf_counter()
+        spot = lot.parking_strategy.find_spot(vehicle, lot.floors, lot.open_floors[vehicle.size])
+        latencies.append(time.perf_counter() - start)
+        distances.append(distance(spot, floor_cost))
+        lot.park_vehicles([vehicle])
+        parked.append(vehicle.plate_number)
+        j = rng.randrange(len(parked))
+        parked[j], parked[-1] = parked[-1], parked[j]
+        lot.unpark_vehicles([parked.pop()])
+    return latencies, distances
+
+
+def main():
+    nearest = ParkNearestStrategy(entrance=ENTRANCE)
+    lots = {"ParkNearestStrategy": build_lot(nearest), "ParkLowerLevelStrategy": build_lot(ParkLowerLevelStrategy())}
+
+    lot = lots["ParkNearestStrategy"]
+    for size in VehicleSize:
+        spot = nearest.find_spot(Vehicle("check", size), lot.floors, lot.open_floors[size])
+        assert math.isclose(distance(spot, nearest.floor_cost), brute_force_distance(lot, size, nearest.floor_cost))
+
+    print(f"{NUM_QUERIES:,} find_spot calls, {NUM_FLOORS * ROWS * COLUMNS:,} spots, entrance at {ENTRANCE}")
+    for name, lot in lots.items():
+        latencies, distances = measure(lot, nearest.floor_cost)
+        cuts = statistics.quantiles(latencies, n=100)
+        print(f"- {name}: mean {statistics.mean(latencies) * 1e6:.1f}us, p99 {cuts[98] * 1e6:.1f}us, "
+              f"mean distance to entrance {statistics.mean(distances):.1f}")
+
+if __name__ == "__main__": 
+    main()
@@ -1,37 +1,125 @@
+import heapq
+
 from vehicle import Vehicle
 from vehicle_size import VehicleSize
 from parking_spot import ParkingSpot
+from spot_storage import ISpotStorage, ListSpotStorage, ArraySpotStorage
 
 class ParkingFloor: 
-    def __init__(self, num: int):
+    def __init__(self, num: int, compact: bool = False):
         self.num: int = num
-        self.__spots: list[ParkingSpot] = []
+        # compact floors keep spots in parallel array columns instead of one object per spot
+        self.__spots: ISpotStorage = ArraySpotStorage(self) if compact else ListSpotStorage(self)
+        # min-heap of slot numbers per size, the top is always an open spot
+        self.__open_slots: dict[VehicleSize, list[int]] = {size: [] for size in VehicleSize}
+        # 1 while the slot is somewhere in its size's heap
+        self.__queued = bytearray()
+        # live counters so availability never needs a scan over the spots
+        self.__capacity: dict[VehicleSize, int] = {size: 0 for size in VehicleSize}
+        self.__num_open: dict[VehicleSize, int] = {size: 0 for size in VehicleSize}
+        self.__listeners: list = []
+        # set while restore_vehicles parks spots, the index is rebuilt once at the end
+        self.__bulk_update = False
 
     @property
     def spots(self): 
         return self.__spots
 
-    def add_spot(self, size: VehicleSize) -> None:
-        spot = ParkingSpot(id = [self.num, len(self.__spots)], type = size)
-        self.__spots.append(spot)
+    def add_listener(self, listener) -> None:
+        self.__listeners.append(listener)
+
+    def add_spot(self, size: VehicleSize, position: tuple[float, float] | None = None) -> None:
+        spot = self.__spots.add_spot(size, position)
+        self.__queued.append(0)
+        self.__push_open(spot)
+        self.__capacity[size] += 1
+        self.__num_open[size] += 1
+        for listener in self.__listeners:
+            listener.on_spot_added(self, spot)
+
+    def has_open_spot(self, size: VehicleSize) -> bool:
+        return self.__num_open[size] > 0
+
+    def capacity(self, size: VehicleSize) -> int:
+        return self.__capacity[size]
+
+    def num_open(self, size: VehicleSize) -> int:
+        return self.__num_open[size]
+
+    def occupancy(self) -> dict[VehicleSize, dict[str, int]]:
+        return {
+            size: {
+                "capacity": self.__capacity[size],
+                "open": self.__num_open[size],
+                "filled": self.__capacity[size] - self.__num_open[size],
+            }
+            for size in VehicleSize
+        }
+
+    def first_open_spot(self, size: VehicleSize) -> ParkingSpot | None:
+        heap = self.__open_slots[size]
+        if not heap:
+            return None
+        return self.__spots[heap[0]]
+
+    def restore_vehicles(self, parked: list[tuple[int, Vehicle]]) -> list[ParkingSpot]:
+        # re-park many spots at once (crash recovery), rebuilding the index in one pass
+        previous_open = dict(self.__num_open)
+        spots = [self.__spots[slot] for slot, _ in parked]
+        self.__bulk_update = True
+        try:
+            for spot, (_, vehicle) in zip(spots, parked):
+                spot.park_vehicle(vehicle)
+        finally:
+            self.__bulk_update = False
+            self.__rebuild_index()
+        for listener in self.__listeners:
+            listener.on_floor_reindexed(self, previous_open)
+        return spots
+
+    def __rebuild_index(self) -> None:
+        open_slots = {size: [] for size in VehicleSize}
+        self.__queued = bytearray(len(self.__spots))
+        for slot, spot in enumerate(self.__spots):
+            if spot.open:
+                open_slots[spot.type].append(slot)
+                self.__queued[slot] = 1
+        for heap in open_slots.values():
+            heapq.heapify(heap)
+        self.__open_slots = open_slots
+        self.__num_open = {size: len(heap) for size, heap in open_slots.items()}
+
+    def on_spot_taken(self, spot: ParkingSpot) -> None:
+        if self.__bulk_update:
+            return
+        # lazily drop taken spots once they reach the top of the heap
+        heap = self.__open_slots[spot.type]
+        while heap and not self.__spots.is_open(heap[0]):
+            self.__queued[heapq.heappop(heap)] = 0
+        self.__num_open[spot.type] -= 1
+        for listener in self.__listeners:
+            listener.on_spot_taken(self, spot)
+
+    def on_spot_opened(self, spot: ParkingSpot) -> None:
+        if self.__bulk_update:
+            return
+        self.__push_open(spot)
+        self.__num_open[spot.type] += 1
+        for listener in self.__listeners:
+            listener.on_spot_opened(self, spot)
+
+    def __push_open(self, spot: ParkingSpot) -> None:
+        slot = spot.id[1]
+        if not self.__queued[slot]:
+            heapq.heappush(self.__open_slots[spot.type], slot)
+            self.__queued[slot] = 1
     
     def display_floor(self): 
-        num_compact = num_medium = num_large = num_unavaliable = 0
-        for spot in self.__spots: 
-            if spot.open:
-                match spot.type: 
-                    case VehicleSize.COMPACT: 
-                        num_compact += 1
-                    case VehicleSize.MEDIUM: 
-                        num_medium += 1
-                    case VehicleSize.LARGE: 
-                        num_large += 1
-            else: 
-                num_unavaliable += 1
+        num_unavaliable = sum(self.__capacity.values()) - sum(self.__num_open.values())
         print(f"------------ FLOOR {self.num} ------------")
         print(f"Total Capacity: {len(self.__spots)}")
         print(f"# Filled: {num_unavaliable}")
         print(f"Current Avaliabilty")
-        print(f"- # Compact: {num_compact}")
-        print(f"- # Medium: {num_medium}")
-        print(f"- # Large: {num_large}")
+        print(f"- # Compact: {self.__num_open[VehicleSize.COMPACT]}")
+        print(f"- # Medium: {self.__num_open[VehicleSize.MEDIUM]}")
+        print(f"- # Large: {self.__num_open[VehicleSize.LARGE]}")
@@ -1,20 +1,36 @@
+import bisect
 import datetime
+from typing import Any, Callable, Iterable
 
+from batch_result import ParkBatchResult, UnparkBatchResult
 from parking_floor import ParkingFloor
 from parking_strategy import IParkingStrategy, ParkLowerLevelStrategy
 from payment_strategy import IPaymentStrategy, FlatFeeStrategy
 from parking_ticket import ParkingTicket
+from ticket_store import ITicketStore, InMemoryTicketStore, paused_gc
+from parking_spot import ParkingSpot
 from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+class DuplicatePlateError(ValueError):
+    pass
+
 
 class ParkingLot: 
-    def __init__(self):
+    def __init__(self, ticket_store: ITicketStore | None = None):
         self.floors: dict[int, ParkingFloor] | None = {}
-        self.tickets: dict[str, ParkingTicket] = {}
+        self.tickets: ITicketStore = ticket_store if ticket_store is not None else InMemoryTicketStore()
         self.payment_strategy: IPaymentStrategy = FlatFeeStrategy()
         self.parking_strategy: IParkingStrategy = ParkLowerLevelStrategy()
+        # sorted levels that have at least one open spot, per vehicle size
+        self.open_floors: dict[VehicleSize, list[int]] = {size: [] for size in VehicleSize}
+        self.__capacity: dict[VehicleSize, int] = {size: 0 for size in VehicleSize}
+        self.__num_open: dict[VehicleSize, int] = {size: 0 for size in VehicleSize}
     
     def set_parking_strategy(self, parking_strategy: IParkingStrategy):
         self.parking_strategy = parking_strategy
+        for floor in self.floors.values():
+            parking_strategy.attach_floor(floor)
     
     def set_payment_strategy(self, payment_strategy: IPaymentStrategy): 
         self.payment_strategy = payment_strategy
@@ -23,6 +39,78 @@ class ParkingLot:
         if floor.num in self.floors: 
             raise ValueError(f"There already exists a floor level {floor.num}")
         self.floors[floor.num] = floor
+        floor.add_listener(self)
+        self.parking_strategy.attach_floor(floor)
+        for size in VehicleSize:
+            self.__capacity[size] += floor.capacity(size)
+            self.__num_open[size] += floor.num_open(size)
+            if floor.has_open_spot(size):
+                bisect.insort(self.open_floors[size], floor.num)
+
+    def recover_tickets(self) -> int:
+        # re-park every ticket the store recovered, call once all floors have been added
+        records = self.tickets.recovered_tickets()
+        with paused_gc():
+            by_level: dict[int, list[tuple]] = {}
+            for record in records:
+                by_level.setdefault(record[2], []).append(record)
+            tickets = []
+            for level, group in by_level.items():
+                plates, sizes, _, slots, times = zip(*group)
+                vehicles = list(map(Vehicle, plates, sizes))
+                spots = self.floors[level].restore_vehicles(list(zip(slots, vehicles)))
+                tickets.extend(map(ParkingTicket, vehicles, spots, times))
+            self.tickets.restore_tickets(tickets)
+        return len(records)
+
+    def has_open_spot(self, size: VehicleSize) -> bool:
+        return self.__num_open[size] > 0
+
+    def occupancy(self) -> dict:
+        total = {
+            size: {
+                "capacity": self.__capacity[size],
+                "open": self.__num_open[size],
+                "filled": self.__capacity[size] - self.__num_open[size],
+            }
+            for size in VehicleSize
+        }
+        floors = {level: self.floors[level].occupancy() for level in sorted(self.floors.keys())}
+        return {"total": total, "floors": floors}
+
+    def on_floor_reindexed(self, floor: ParkingFloor, previous_open: dict[VehicleSize, int]) -> None:
+        for size in VehicleSize:
+            self.__num_open[size] += floor.num_open(size) - previous_open[size]
+            levels = self.open_floors[size]
+            i = bisect.bisect_left(levels, floor.num)
+            listed = i < len(levels) and levels[i] == floor.num
+            if floor.has_open_spot(size) and not listed:
+                levels.insert(i, floor.num)
+            elif not floor.has_open_spot(size) and listed:
+                del levels[i]
+        self.parking_strategy.attach_floor(floor)
+
+    def on_spot_added(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        self.__capacity[spot.type] += 1
+        self.on_spot_opened(floor, spot)
+
+    def on_spot_opened(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        self.__num_open[spot.type] += 1
+        levels = self.open_floors[spot.type]
+        i = bisect.bisect_left(levels, floor.num)
+        if i == len(levels) or levels[i] != floor.num:
+            levels.insert(i, floor.num)
+        self.parking_strategy.on_spot_opened(floor, spot)
+
+    def on_spot_taken(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        self.__num_open[spot.type] -= 1
+        self.parking_strategy.on_spot_taken(floor, spot)
+        if floor.has_open_spot(spot.type):
+            return
+        levels = self.open_floors[spot.type]
+        i = bisect.bisect_left(levels, floor.num)
+        if i < len(levels) and levels[i] == floor.num:
+            del levels[i]
 
     def display_state(self): 
         sorted_levels = sorted(self.floors.keys())
@@ -30,21 +118,84 @@ class ParkingLot:
             self.floors[level].display_floor()
     
     def park_vehicle(self, vehicle: Vehicle) -> None:
-        spot = self.parking_strategy.find_spot(vehicle, self.floors)
-        if not spot:
+        try:
+            ticket = self._claim_spot(vehicle, datetime.datetime.now())
+        except DuplicatePlateError:
+            print(f"Vehicle {vehicle.plate_number} is already parked inside the parking lot")
+            return
+        if not ticket:
             print(f"Parking Lot Full: cannot park vehicle {vehicle.plate_number} of size {vehicle.size}")
             return 
+        print(f"Parking vehicle {vehicle.plate_number} in spot {ticket.spot.id}")
+
+    def unpark_vehicle(self, plate_number: str): 
+        released = self._release_spot(plate_number, datetime.datetime.now())
+        if not released: 
+            print(f"Vehicle {plate_number} cannot be found inside the parking lot")
+            return 
+        _, total_cost = released
+        print(f"Unparking vechile {plate_number}, Total Payment Required: {total_cost}")
+
+    def park_vehicles(self, vehicles: Iterable[Vehicle], order: Callable[[Vehicle], Any] | None = None, 
+                      time_in: datetime.datetime | None = None) -> ParkBatchResult:
+        # same outcome as calling park_vehicle on each vehicle in order, without the printing
+        if order: 
+            vehicles = sorted(vehicles, key=order)
+        time_in = time_in or datetime.datetime.now()
+        result = ParkBatchResult()
+        with self.tickets.batch():
+            for vehicle in vehicles: 
+                try:
+                    ticket = self._claim_spot(vehicle, time_in)
+                except DuplicatePlateError:
+                    result.duplicates.append(vehicle)
+                    continue
+                if not ticket: 
+                    result.failures.append(vehicle)
+                    continue
+                result.tickets[vehicle.plate_number] = ticket
+        return result
+
+    def unpark_vehicles(self, plate_numbers: Iterable[str], order: Callable[[str], Any] | None = None, 
+                        time_out: datetime.datetime | None = None) -> UnparkBatchResult:
+        # same outcome as calling unpark_vehicle on each plate in order, without the printing
+        if order: 
+            plate_numbers = sorted(plate_numbers, key=order)
+        time_out = time_out or datetime.datetime.now()
+        result = UnparkBatchResult()
+        with self.tickets.batch():
+            for plate_number in plate_numbers: 
+                released = self._release_spot(plate_number, time_out)
+                if not released: 
+                    result.failures.append(plate_number)
+                    continue
+                result.tickets[plate_number], result.fees[plate_number] = released
+        return result
+
+    def _find_spot(self, vehicle: Vehicle) -> ParkingSpot | None:
+        # the counters rule out a full lot without running the strategy
+        if not self.has_open_spot(vehicle.size):
+            return None
+        return self.parking_strategy.find_spot(vehicle, self.floors, self.open_floors[vehicle.size])
 
-        self.tickets[vehicle.plate_number] = ParkingTicket(vehicle=vehicle, spot=spot, time_in=datetime.datetime.now())
+    def _claim_spot(self, vehicle: Vehicle, time_in: datetime.datetime) -> ParkingTicket | None:
+        # a plate holds at most one spot; parking it again would fill a spot no ticket ever frees
+        if vehicle.plate_number in self.tickets:
+            raise DuplicatePlateError(f"Vehicle {vehicle.plate_number} is already parked inside the parking lot")
+        spot = self._find_spot(vehicle)
+        if not spot:
+            return None
+        ticket = ParkingTicket(vehicle=vehicle, spot=spot, time_in=time_in)
+        if not self.tickets.open_ticket(ticket):
+            raise DuplicatePlateError(f"Vehicle {vehicle.plate_number} is already parked inside the parking lot")
         spot.park_vehicle(vehicle)
-        print(f"Parking vehicle {vehicle.plate_number} in spot {spot.id}")
+        return ticket
 
-    def unpark_vehicle(self, plate_number: str): 
+    def _release_spot(self, plate_number: str, time_out: datetime.datetime) -> tuple[ParkingTicket, float] | None:
         ticket = self.tickets.get(plate_number, None)
         if not ticket: 
-            print(f"Vehicle {plate_number} cannot be found inside the parking lot")
-            return 
-        
-        total_cost = self.payment_strategy.process_payment(ticket=ticket, time_out=datetime.datetime.now())
+            return None
+        total_cost = self.payment_strategy.process_payment(ticket=ticket, time_out=time_out)
         ticket.spot.unpark_vehicle()
-        print(f"Unparking vechile {plate_number}, Total Payment Required: {total_cost}")
\ No newline at end of file
+        self.tickets.close_ticket(plate_number)
+        return ticket, total_cost
@@ -2,11 +2,17 @@ from vehicle_size import VehicleSize
 from vehicle import Vehicle
 
 class ParkingSpot: 
-    def __init__(self, id: tuple[int, int], type: VehicleSize): 
+    __slots__ = ("id", "__type", "__open", "__vehicle", "__floor", "__position")
+
+    def __init__(self, id: tuple[int, int], type: VehicleSize, floor=None, position: tuple[float, float] | None = None): 
         self.id: tuple[int, int] = id 
         self.__type: VehicleSize = type
         self.__open: bool = True
         self.__vehicle: Vehicle | None = None
+        # floor that owns this spot, notified so it can keep its free-spot index current
+        self.__floor = floor
+        # (x, y) on the floor, spots without one are laid out in a row by slot
+        self.__position: tuple[float, float] | None = position
 
     @property
     def open(self): 
@@ -16,12 +22,31 @@ class ParkingSpot:
     def type(self):
         return self.__type
 
+    @property
+    def position(self) -> tuple[float, float]:
+        if self.__position is None:
+            return float(self.id[1]), 0.0
+        return self.__position
+
     def park_vehicle(self, vehicle: Vehicle) -> None:
+        was_open = self.__open
         self.__vehicle: Vehicle = vehicle
         self.__open: bool = False
+        if was_open and self.__floor:
+            self.__floor.on_spot_taken(self)
     
+    def claim(self, vehicle: Vehicle) -> bool:
+        # check-and-park, callers serialize claims on the same size with a lock
+        if not self.__open:
+            return False
+        self.park_vehicle(vehicle)
+        return True
+
     def unpark_vehicle(self) -> Vehicle: 
+        was_open = self.__open
         vehicle: Vehicle = self.__vehicle 
         self.__vehicle: Vehicle = None
         self.__open: bool = True
-        return vehicle
\ No newline at end of file
+        if not was_open and self.__floor:
+            self.__floor.on_spot_opened(self)
+        return vehicle
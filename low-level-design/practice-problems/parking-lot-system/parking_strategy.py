@@ -1,32 +1,166 @@
 from abc import ABC, abstractmethod
+import math
 
 from vehicle import Vehicle
+from vehicle_size import VehicleSize
 from parking_spot import ParkingSpot
 from parking_floor import ParkingFloor 
 
 class IParkingStrategy(ABC): 
     @abstractmethod
-    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor]) -> ParkingSpot | None:
+    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor], open_floors: list[int] | None = None) -> ParkingSpot | None:
+        pass
+
+    def open_levels(self, vehicle: Vehicle, floors: dict[int, ParkingFloor], open_floors: list[int] | None) -> list[int]:
+        # open_floors is the lot's sorted list of levels with an open spot for vehicle.size
+        if open_floors is not None:
+            return open_floors
+        return sorted(level for level, floor in floors.items() if floor.has_open_spot(vehicle.size))
+
+    # hooks the lot calls so strategies can keep their own index of open spots
+    def attach_floor(self, floor: ParkingFloor) -> None:
+        pass
+
+    def on_spot_opened(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        pass
+
+    def on_spot_taken(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
         pass
 
 
 class ParkLowerLevelStrategy(IParkingStrategy): 
-    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor]) -> ParkingSpot | None:
-        sorted_levels = sorted(floors.keys())
-        for i in sorted_levels: 
-            floor = floors[i]
-            for spot in floor.spots: 
-                if spot.open and spot.type == vehicle.size:
-                    return spot
-        return None
+    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor], open_floors: list[int] | None = None) -> ParkingSpot | None:
+        levels = self.open_levels(vehicle, floors, open_floors)
+        if not levels: 
+            return None
+        return floors[levels[0]].first_open_spot(vehicle.size)
 
 
 class ParkUpperLevelStrategy(IParkingStrategy): 
-    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor]) -> ParkingSpot | None:
-        sorted_levels = sorted(floors.keys(), reverse=True)
-        for i in sorted_levels: 
-            floor = floors[i]
-            for spot in floor.spots: 
-                if spot.open and spot.type == vehicle.size:
-                    return spot
-        return None
+    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor], open_floors: list[int] | None = None) -> ParkingSpot | None:
+        levels = self.open_levels(vehicle, floors, open_floors)
+        if not levels: 
+            return None
+        return floors[levels[-1]].first_open_spot(vehicle.size)
+
+
+class ParkNearestStrategy(IParkingStrategy): 
+    # Open spots are bucketed into square grid cells per (size, level). A query searches
+    # rings of cells outwards from the entrance and stops once no unvisited cell can hold
+    # a closer spot. Changing levels costs floor_cost distance units per level.
+    def __init__(self, entrance: tuple[int, float, float] = (0, 0.0, 0.0), floor_cost: float = 50.0, cell_size: float = 10.0):
+        self.entrance = entrance
+        self.floor_cost = floor_cost
+        self.cell_size = cell_size
+        # size -> level -> cell -> slot -> position
+        self.__grids: dict[VehicleSize, dict[int, dict[tuple[int, int], dict[int, tuple[float, float]]]]] = {size: {} for size in VehicleSize}
+        # level -> (min cell x, min cell y, max cell x, max cell y) over all spots of the level
+        self.__extents: dict[int, tuple[int, int, int, int]] = {}
+
+    def set_entrance(self, level: int, x: float, y: float) -> None:
+        self.entrance = (level, x, y)
+
+    def attach_floor(self, floor: ParkingFloor) -> None:
+        for grids in self.__grids.values():
+            grids[floor.num] = {}
+        self.__extents.pop(floor.num, None)
+        for spot in floor.spots:
+            self.__grow_extent(floor.num, spot.position)
+            if spot.open:
+                self.on_spot_opened(floor, spot)
+
+    def on_spot_opened(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        position = spot.position
+        self.__grow_extent(floor.num, position)
+        cells = self.__grids[spot.type].setdefault(floor.num, {})
+        cells.setdefault(self.__cell(position), {})[spot.id[1]] = position
+
+    def on_spot_taken(self, floor: ParkingFloor, spot: ParkingSpot) -> None:
+        position = spot.position
+        cells = self.__grids[spot.type].get(floor.num, {})
+        cell = self.__cell(position)
+        slots = cells.get(cell)
+        if slots is None:
+            return
+        slots.pop(spot.id[1], None)
+        if not slots:
+            del cells[cell]
+
+    def find_spot(self, vehicle: Vehicle, floors: dict[int, ParkingFloor], open_floors: list[int] | None = None) -> ParkingSpot | None:
+        entrance_level, x, y = self.entrance
+        grids = self.__grids[vehicle.size]
+        levels = sorted(self.open_levels(vehicle, floors, open_floors), key=lambda level: abs(level - entrance_level))
+        best_level = best_slot = None
+        best_distance = math.inf
+        for level in levels:
+            climb = abs(level - entrance_level) * self.floor_cost
+            if climb >= best_distance:
+                break
+            slot, distance = self.__nearest_on_level(grids.get(level, {}), level, x, y, best_distance - climb)
+            if slot is not None:
+                best_level, best_slot, best_distance = level, slot, climb + distance
+        if best_slot is None:
+            return None
+        return floors[best_level].spots[best_slot]
+
+    def __nearest_on_level(self, cells: dict, level: int, x: float, y: float, limit: float) -> tuple[int | None, float]:
+        if not cells:
+            return None, math.inf
+        min_cx, min_cy, max_cx, max_cy = self.__extents[level]
+        cx, cy = self.__cell((x, y))
+        # rings past this radius fall outside every spot on the level
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy)
+        best = [None, limit]
+        visited = 0
+        for ring in range(max(max_ring, 0) + 1):
+            # every cell in this ring or beyond is at least (ring - 1) cells away
+            if (ring - 1) * self.cell_size >= best[1]:
+                break
+            visited += max(8 * ring, 1)
+            if visited > len(cells):
+                # sparse level, walking the occupied cells is cheaper than more empty rings
+                for cell, slots in cells.items():
+                    if self.__cell_distance(cell, x, y) < best[1]:
+                        self.__scan(slots, x, y, best)
+                break
+            for cell in self.__ring(cx, cy, ring):
+                slots = cells.get(cell)
+                if slots:
+                    self.__scan(slots, x, y, best)
+        return best[0], best[1]
+
+    @staticmethod
+    def __scan(slots: dict[int, tuple[float, float]], x: float, y: float, best: list) -> None:
+        for slot, (spot_x, spot_y) in slots.items():
+            distance = math.hypot(spot_x - x, spot_y - y)
+            if distance < best[1] or (distance == best[1] and best[0] is not None and slot < best[0]):
+                best[0], best[1] = slot, distance
+
+    def __cell_distance(self, cell: tuple[int, int], x: float, y: float) -> float:
+        left, bottom = cell[0] * self.cell_size, cell[1] * self.cell_size
+        dx = max(left - x, 0.0, x - left - self.cell_size)
+        dy = max(bottom - y, 0.0, y - bottom - self.cell_size)
+        return math.hypot(dx, dy)
+
+    @staticmethod
+    def __ring(cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    def __cell(self, position: tuple[float, float]) -> tuple[int, int]:
+        return math.floor(position[0] / self.cell_size), math.floor(position[1] / self.cell_size)
+
+    def __grow_extent(self, level: int, position: tuple[float, float]) -> None:
+        cx, cy = self.__cell(position)
+        if level not in self.__extents:
+            self.__extents[level] = (cx, cy, cx, cy)
+            return
+        min_cx, min_cy, max_cx, max_cy = self.__extents[level]
+        self.__extents[level] = (min(min_cx, cx), min(min_cy, cy), max(max_cx, cx), max(max_cy, cy))
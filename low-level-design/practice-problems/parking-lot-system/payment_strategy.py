@@ -1,33 +1,113 @@
 from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Sequence
 import datetime
 
 from parking_ticket import ParkingTicket
 
+MICROSECOND = datetime.timedelta(microseconds=1)
+
 class IPaymentStrategy(ABC):
     @abstractmethod
-    def process_payment(self, ticket: ParkingTicket, time_out: datetime.time) -> float: 
+    def process_payment(self, ticket: ParkingTicket, time_out: datetime.datetime) -> float: 
         pass 
 
+    def process_payments(self, time_in: Sequence[float], time_out: Sequence[float]) -> array: 
+        # batch pricing over epoch-second columns, one process_payment call per stay
+        if len(time_in) != len(time_out): 
+            raise ValueError(f"Got {len(time_in)} time_in values but {len(time_out)} time_out values")
+        fromtimestamp = datetime.datetime.fromtimestamp
+        return array("d", (self.process_payment(ParkingTicket(None, None, fromtimestamp(start)), fromtimestamp(end))
+                           for start, end in zip(time_in, time_out)))
+
+
+class UnitPriceStrategy(IPaymentStrategy):
+    # stays are billed per started unit, e.g. a 25 hour stay is 2 days or 25 hours
+    unit: datetime.timedelta = datetime.timedelta(days=1)
+
+    @abstractmethod
+    def price_units(self, units: int) -> float: 
+        pass 
+
+    def process_payment(self, ticket: ParkingTicket, time_out: datetime.datetime) -> float: 
+        duration_us = (time_out - ticket.time_in) // MICROSECOND
+        return self.price_units(self.__units(duration_us, self.unit // MICROSECOND))
+
+    def process_payments(self, time_in: Sequence[float], time_out: Sequence[float]) -> array: 
+        # durations are rounded to whole microseconds so the result matches process_payment
+        # for the same datetimes
+        if type(self).process_payment is not UnitPriceStrategy.process_payment: 
+            # a subclass reprices whole tickets, so price_units alone does not describe it
+            return super().process_payments(time_in, time_out)
+        if len(time_in) != len(time_out): 
+            raise ValueError(f"Got {len(time_in)} time_in values but {len(time_out)} time_out values")
+        unit_us = self.unit // MICROSECOND
+        price_units = self.price_units
+        # a day of settlement has few distinct unit counts, so each is priced once
+        prices: dict[int, float] = {}
+        fees = array("d")
+        append = fees.append
+        for start, end in zip(time_in, time_out): 
+            duration_us = round((end - start) * 1_000_000)
+            n = -(-duration_us // unit_us) if duration_us > 0 else 0
+            fee = prices.get(n)
+            if fee is None: 
+                fee = prices[n] = price_units(n)
+            append(fee)
+        return fees
+
+    @staticmethod
+    def __units(duration_us: int, unit_us: int) -> int: 
+        # math.ceil the number of units, without going through floats
+        if duration_us <= 0: 
+            return 0
+        return -(-duration_us // unit_us)
 
-class FlatFeeStrategy(IPaymentStrategy): 
+
+class FlatFeeStrategy(UnitPriceStrategy): 
     rate = 5
+    unit = datetime.timedelta(days=1)
     
-    def process_payment(self, ticket: ParkingTicket, time_out: datetime.time) -> float: 
-        delta: datetime.timedelta = time_out - ticket.time_in
-        num_days = delta.days 
-        # math.ceil the number of days
-        if delta - datetime.timedelta(days=num_days) > datetime.timedelta(0):
-            num_days += 1
-        return self.rate * num_days
+    def price_units(self, units: int) -> float: 
+        return self.rate * units
 
 
-class HourlyRateStrategy(IPaymentStrategy): 
+class HourlyRateStrategy(UnitPriceStrategy): 
     rate = 1.5
+    unit = datetime.timedelta(hours=1)
+
+    def __init__(self, daily_cap: float | None = None): 
+        # most a single 24 hour block can cost
+        self.daily_cap = daily_cap
+
+    def price_units(self, units: int) -> float: 
+        days, hours = divmod(units, 24)
+        return days * self.capped(self.price_hours(24)) + self.capped(self.price_hours(hours))
+
+    def price_hours(self, hours: int) -> float: 
+        return self.rate * hours
+
+    def capped(self, fee: float) -> float: 
+        if self.daily_cap is None: 
+            return fee
+        return min(fee, self.daily_cap)
+
+
+class TieredRateStrategy(HourlyRateStrategy): 
+    # (hours, rate) tiers applied in order within each 24 hour block, the last tier covers the rest
+    tiers: list[tuple[int, float]] = [(2, 3.0), (6, 2.0), (24, 1.0)]
+
+    def __init__(self, tiers: list[tuple[int, float]] | None = None, daily_cap: float | None = None): 
+        super().__init__(daily_cap)
+        if tiers is not None: 
+            self.tiers = tiers
 
-    def process_payment(self, ticket: ParkingTicket, time_out: datetime.time) -> float: 
-        delta: datetime.timedelta = time_out - ticket.time_in
-        num_hrs = delta.hours 
-        # math.ceil the number of hrs
-        if delta - datetime.timedelta(days=num_hrs) > datetime.timedelta(0):
-            num_hrs += 1
-        return self.rate * num_hrs
\ No newline at end of file
+    def price_hours(self, hours: int) -> float: 
+        fee = 0
+        for i, (tier_hours, rate) in enumerate(self.tiers): 
+            billed = hours if i == len(self.tiers) - 1 else min(hours, tier_hours)
+            fee += billed * rate
+            hours -= billed
+            if hours <= 0: 
+                break
+        return fee
@@ -0,0 +1,218 @@
+import contextlib
+import csv
+import datetime
+import heapq
+import io
+import json
+import math
+import os
+import random
+import time
+from typing import Callable
+
+from parking_lot import ParkingLot
+from parking_floor import ParkingFloor
+from parking_strategy import IParkingStrategy, ParkLowerLevelStrategy, ParkUpperLevelStrategy, ParkNearestStrategy
+from payment_strategy import IPaymentStrategy, FlatFeeStrategy, HourlyRateStrategy
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+ARRIVAL, DEPARTURE, SAMPLE = 0, 1, 2
+
+
+class LatencyHistogram: 
+    # log-linear buckets: 8 sub-buckets per power of two nanoseconds, so percentiles are within ~10%
+    SUB_BUCKETS = 8
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.sum_ns = 0
+
+    def record(self, seconds: float) -> None:
+        ns = max(int(seconds * 1e9), 1)
+        exponent = ns.bit_length() - 1
+        sub = ((ns - (1 << exponent)) * self.SUB_BUCKETS) >> exponent
+        bucket = exponent * self.SUB_BUCKETS + sub
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum_ns += ns
+
+    def percentile(self, p: float) -> float:
+        # upper bound of the bucket holding the p-th percentile, in microseconds
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                exponent, sub = divmod(bucket, self.SUB_BUCKETS)
+                return ((1 << exponent) + ((sub + 1) << exponent) / self.SUB_BUCKETS) / 1000
+        return 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_us": self.sum_ns / self.total / 1000 if self.total else 0.0,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "max_us": self.percentile(100),
+        }
+
+
+class SimulationResult: 
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: dict[str, LatencyHistogram] = {"park": LatencyHistogram(), "unpark": LatencyHistogram()}
+        # (simulated hours, {size: filled}) every sample interval
+        self.occupancy: list[tuple[float, dict[str, int]]] = []
+        self.arrivals = 0
+        self.rejections = 0
+        self.revenue = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejections / self.arrivals if self.arrivals else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "name": self.name,
+            "arrivals": self.arrivals,
+            "rejections": self.rejections,
+            "rejection_rate": self.rejection_rate,
+            "revenue": self.revenue,
+            "wall_seconds": self.wall_seconds,
+            "latency": {op: histogram.summary() for op, histogram in self.latencies.items()},
+        }
+
+    def to_json(self, path: str) -> None:
+        data = self.summary()
+        data["occupancy"] = [{"hour": hour, **filled} for hour, filled in self.occupancy]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def to_csv(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        sizes = [size.name for size in VehicleSize]
+        with open(os.path.join(directory, f"{self.name}_occupancy.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["hour", *sizes])
+            for hour, filled in self.occupancy:
+                writer.writerow([f"{hour:.3f}", *(filled[size] for size in sizes)])
+        with open(os.path.join(directory, f"{self.name}_latency.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["op", "count", "mean_us", "p50_us", "p90_us", "p99_us", "max_us"])
+            for op, histogram in self.latencies.items():
+                stats = histogram.summary()
+                writer.writerow([op, *(stats[key] for key in ("count", "mean_us", "p50_us", "p90_us", "p99_us", "max_us"))])
+
+
+class ParkingSimulation: 
+    # Discrete-event simulation on a simulated clock: Poisson arrivals, sizes drawn from
+    # size_mix, lognormal dwell times. The same seed always replays the same workload.
+    def __init__(self, build_lot: Callable[[], ParkingLot], arrivals_per_hour: float = 600.0, 
+                 size_mix: dict[VehicleSize, float] | None = None, mean_dwell_hours: float = 3.0, 
+                 dwell_sigma: float = 0.8, hours: float = 24.0, sample_minutes: float = 15.0, seed: int = 0):
+        self.build_lot = build_lot
+        self.arrivals_per_hour = arrivals_per_hour
+        self.size_mix = size_mix or {VehicleSize.COMPACT: 0.5, VehicleSize.MEDIUM: 0.35, VehicleSize.LARGE: 0.15}
+        self.mean_dwell_hours = mean_dwell_hours
+        self.dwell_sigma = dwell_sigma
+        self.hours = hours
+        self.sample_minutes = sample_minutes
+        self.seed = seed
+        self.start = datetime.datetime(2025, 1, 1)
+
+    def run(self, name: str, parking_strategy: IParkingStrategy | None = None, 
+            payment_strategy: IPaymentStrategy | None = None) -> SimulationResult:
+        rng = random.Random(self.seed)
+        lot = self.build_lot()
+        if parking_strategy:
+            lot.set_parking_strategy(parking_strategy)
+        if payment_strategy:
+            lot.set_payment_strategy(payment_strategy)
+        result = SimulationResult(name)
+        sizes, weights = list(self.size_mix.keys()), list(self.size_mix.values())
+        # lognormal mu chosen so the mean dwell is mean_dwell_hours
+        mu = math.log(self.mean_dwell_hours) - self.dwell_sigma ** 2 / 2
+        events = [(0.0, 0, SAMPLE, None), (rng.expovariate(self.arrivals_per_hour), 1, ARRIVAL, None)]
+        heapq.heapify(events)
+        sequence = 2
+        park_latency, unpark_latency = result.latencies["park"], result.latencies["unpark"]
+        perf_counter = time.perf_counter
+        began = perf_counter()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            while events:
+                hour, _, kind, plate = heapq.heappop(events)
+                if hour > self.hours:
+                    break
+                now = self.start + datetime.timedelta(hours=hour)
+                if kind == ARRIVAL:
+                    result.arrivals += 1
+                    vehicle = Vehicle(f"sim-{result.arrivals}", rng.choices(sizes, weights)[0])
+                    start = perf_counter()
+                    parked = lot.park_vehicles([vehicle], time_in=now)
+                    park_latency.record(perf_counter() - start)
+                    if parked.failures:
+                        result.rejections += 1
+                    else:
+                        departure = hour + rng.lognormvariate(mu, self.dwell_sigma)
+                        heapq.heappush(events, (departure, sequence, DEPARTURE, vehicle.plate_number))
+                        sequence += 1
+                    heapq.heappush(events, (hour + rng.expovariate(self.arrivals_per_hour), sequence, ARRIVAL, None))
+                elif kind == DEPARTURE:
+                    start = perf_counter()
+                    unparked = lot.unpark_vehicles([plate], time_out=now)
+                    unpark_latency.record(perf_counter() - start)
+                    result.revenue += sum(unparked.fees.values())
+                else:
+                    totals = lot.occupancy()["total"]
+                    result.occupancy.append((hour, {size.name: totals[size]["filled"] for size in VehicleSize}))
+                    heapq.heappush(events, (hour + self.sample_minutes / 60, sequence, SAMPLE, None))
+                sequence += 1
+
+        result.wall_seconds = perf_counter() - began
+        return result
+
+
+NUM_FLOORS = 8
+ROWS, COLUMNS = 10, 30
+OUTPUT_DIR = "simulation_output"
+
+
+def build_lot() -> ParkingLot:
+    lot = ParkingLot()
+    sizes = [VehicleSize.COMPACT] * 5 + [VehicleSize.MEDIUM] * 3 + [VehicleSize.LARGE] * 2
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level)
+        for row in range(ROWS):
+            for column in range(COLUMNS):
+                floor.add_spot(sizes[(row * COLUMNS + column) % len(sizes)], (column * 3.0, row * 6.0))
+        lot.add_floor(floor)
+    return lot
+
+
+def main():
+    simulation = ParkingSimulation(build_lot, arrivals_per_hour=900, hours=48, seed=1)
+    runs = [
+        ("lower_flat", ParkLowerLevelStrategy(), FlatFeeStrategy()),
+        ("upper_hourly", ParkUpperLevelStrategy(), HourlyRateStrategy(daily_cap=20)),
+        ("nearest_hourly", ParkNearestStrategy(entrance=(0, 45.0, 0.0)), HourlyRateStrategy(daily_cap=20)),
+    ]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for name, parking_strategy, payment_strategy in runs:
+        result = simulation.run(name, parking_strategy, payment_strategy)
+        result.to_json(os.path.join(OUTPUT_DIR, f"{name}.json"))
+        result.to_csv(OUTPUT_DIR)
+        park, unpark = result.latencies["park"].summary(), result.latencies["unpark"].summary()
+        print(f"{name}: {result.arrivals:,} arrivals, rejection rate {result.rejection_rate:.1%}, "
+              f"revenue {result.revenue:,.2f}, park p50/p99 {park['p50_us']:.1f}/{park['p99_us']:.1f}us, "
+              f"unpark p50/p99 {unpark['p50_us']:.1f}/{unpark['p99_us']:.1f}us")
+    print(f"Results written to {OUTPUT_DIR}/")
+
+if __name__ == "__main__": 
+    main()
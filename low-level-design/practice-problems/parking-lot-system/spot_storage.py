@@ -0,0 +1,180 @@
+from abc import abstractmethod
+import threading
+from array import array
+from collections.abc import Sequence
+
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+from parking_spot import ParkingSpot
+
+# index of each size in the type column, so the column never relies on VehicleSize values
+SIZES: list[VehicleSize] = list(VehicleSize)
+SIZE_CODES: dict[VehicleSize, int] = {size: code for code, size in enumerate(SIZES)}
+
+
+class ISpotStorage(Sequence):
+    @abstractmethod
+    def add_spot(self, size: VehicleSize, position: tuple[float, float] | None = None) -> ParkingSpot:
+        pass
+
+    @abstractmethod
+    def is_open(self, slot: int) -> bool:
+        pass
+
+
+class ListSpotStorage(ISpotStorage):
+    def __init__(self, floor):
+        self.__floor = floor
+        self.__spots: list[ParkingSpot] = []
+
+    def __len__(self) -> int:
+        return len(self.__spots)
+
+    def __getitem__(self, slot):
+        return self.__spots[slot]
+
+    def __iter__(self):
+        return iter(self.__spots)
+
+    def add_spot(self, size: VehicleSize, position: tuple[float, float] | None = None) -> ParkingSpot:
+        spot = ParkingSpot(id = [self.__floor.num, len(self.__spots)], type = size, floor = self.__floor, position = position)
+        self.__spots.append(spot)
+        return spot
+
+    def is_open(self, slot: int) -> bool:
+        return self.__spots[slot].open
+
+
+class ArraySpotStorage(ISpotStorage):
+    def __init__(self, floor):
+        self.__floor = floor
+        self.__types = array("b")
+        self.__open = bytearray()
+        self.__xs = array("d")
+        self.__ys = array("d")
+        # index into __vehicles, -1 when the spot is open
+        self.__occupants = array("l")
+        self.__vehicles: list[Vehicle | None] = []
+        self.__free_occupants: list[int] = []
+        # the occupant pool is shared by every size on the floor
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__types)
+
+    def __getitem__(self, slot):
+        if isinstance(slot, slice):
+            return [CompactParkingSpot(self, i) for i in range(*slot.indices(len(self)))]
+        if slot < 0:
+            slot += len(self)
+        if not 0 <= slot < len(self):
+            raise IndexError(f"Spot {slot} does not exist on floor {self.__floor.num}")
+        return CompactParkingSpot(self, slot)
+
+    @property
+    def floor(self):
+        return self.__floor
+
+    def add_spot(self, size: VehicleSize, position: tuple[float, float] | None = None) -> ParkingSpot:
+        x, y = position if position is not None else (len(self.__types), 0.0)
+        self.__xs.append(x)
+        self.__ys.append(y)
+        self.__types.append(SIZE_CODES[size])
+        self.__open.append(1)
+        self.__occupants.append(-1)
+        return CompactParkingSpot(self, len(self.__types) - 1)
+
+    def is_open(self, slot: int) -> bool:
+        return self.__open[slot] == 1
+
+    def position_of(self, slot: int) -> tuple[float, float]:
+        return self.__xs[slot], self.__ys[slot]
+
+    def type_of(self, slot: int) -> VehicleSize:
+        return SIZES[self.__types[slot]]
+
+    def occupant(self, slot: int) -> Vehicle | None:
+        index = self.__occupants[slot]
+        return None if index < 0 else self.__vehicles[index]
+
+    def park(self, slot: int, vehicle: Vehicle) -> bool:
+        with self.__lock:
+            was_open = self.__open[slot] == 1
+            if not was_open:
+                self.__release(slot)
+            if self.__free_occupants:
+                index = self.__free_occupants.pop()
+                self.__vehicles[index] = vehicle
+            else:
+                index = len(self.__vehicles)
+                self.__vehicles.append(vehicle)
+            self.__occupants[slot] = index
+            self.__open[slot] = 0
+        return was_open
+
+    def unpark(self, slot: int) -> tuple[Vehicle | None, bool]:
+        with self.__lock:
+            was_open = self.__open[slot] == 1
+            vehicle = self.__release(slot)
+            self.__open[slot] = 1
+        return vehicle, was_open
+
+    def __release(self, slot: int) -> Vehicle | None:
+        index = self.__occupants[slot]
+        if index < 0:
+            return None
+        vehicle = self.__vehicles[index]
+        self.__vehicles[index] = None
+        self.__free_occupants.append(index)
+        self.__occupants[slot] = -1
+        return vehicle
+
+
+class CompactParkingSpot:
+    # lightweight view over one row of an ArraySpotStorage, same interface as ParkingSpot
+    __slots__ = ("__storage", "__slot")
+
+    def __init__(self, storage: ArraySpotStorage, slot: int):
+        self.__storage = storage
+        self.__slot = slot
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactParkingSpot):
+            return NotImplemented
+        return self.__storage is other.__storage and self.__slot == other.__slot
+
+    def __hash__(self):
+        return hash((id(self.__storage), self.__slot))
+
+    @property
+    def id(self):
+        return [self.__storage.floor.num, self.__slot]
+
+    @property
+    def open(self):
+        return self.__storage.is_open(self.__slot)
+
+    @property
+    def type(self):
+        return self.__storage.type_of(self.__slot)
+
+    @property
+    def position(self):
+        return self.__storage.position_of(self.__slot)
+
+    def park_vehicle(self, vehicle: Vehicle) -> None:
+        if self.__storage.park(self.__slot, vehicle):
+            self.__storage.floor.on_spot_taken(self)
+
+    def claim(self, vehicle: Vehicle) -> bool:
+        # check-and-park, callers serialize claims on the same size with a lock
+        if not self.open:
+            return False
+        self.park_vehicle(vehicle)
+        return True
+
+    def unpark_vehicle(self) -> Vehicle:
+        vehicle, was_open = self.__storage.unpark(self.__slot)
+        if not was_open:
+            self.__storage.floor.on_spot_opened(self)
+        return vehicle
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+import concurrency_benchmark
+from concurrency_benchmark import ConsistencyError, build_lot, check_consistency, run_gates
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_floor import ParkingFloor
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+
+@pytest.mark.parametrize("num_threads", [1, 4, 8])
+def test_gates_never_double_book(num_threads):
+    lot = build_lot()
+    run_gates(lot, num_threads, ops=2_000)
+    check_consistency(lot)
+
+def test_gate_errors_reach_the_caller(monkeypatch):
+    def failing_gate(lot, gate_id, start, ops):
+        start.wait()
+        if gate_id == 1:
+            raise ConsistencyError("gate 1 failed")
+
+    monkeypatch.setattr(concurrency_benchmark, "gate", failing_gate)
+    with pytest.raises(ConsistencyError, match="gate 1 failed"):
+        run_gates(build_lot(), 4)
+
+def test_error_before_start_does_not_hang(monkeypatch):
+    def failing_gate(lot, gate_id, start, ops):
+        raise ValueError("no start")
+
+    monkeypatch.setattr(concurrency_benchmark, "gate", failing_gate)
+    with pytest.raises(ValueError):
+        run_gates(build_lot(), 2)
+
+def test_check_consistency_catches_a_double_booking():
+    lot = build_lot()
+    vehicle = Vehicle("a", VehicleSize.COMPACT)
+    lot.park_vehicles([vehicle])
+    lot.tickets.get("a").spot.unpark_vehicle()
+    with pytest.raises(ConsistencyError):
+        check_consistency(lot)
+
+def test_one_spot_many_gates():
+    # every gate races for the single spot; exactly one wins
+    lot = ConcurrentParkingLot()
+    floor = ParkingFloor(0)
+    floor.add_spot(VehicleSize.LARGE)
+    lot.add_floor(floor)
+    start = threading.Barrier(16)
+    results = []
+
+    def park(i: int):
+        start.wait()
+        results.append(bool(lot.park_vehicles([Vehicle(f"v{i}", VehicleSize.LARGE)]).tickets))
+
+    threads = [threading.Thread(target=park, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+    check_consistency(lot)
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from gate_server import GateServer
+from parking_floor import ParkingFloor
+from vehicle_size import VehicleSize
+
+
+def build_lot() -> ConcurrentParkingLot:
+    lot = ConcurrentParkingLot()
+    floor = ParkingFloor(1)
+    floor.add_spot(VehicleSize.COMPACT)
+    lot.add_floor(floor)
+    return lot
+
+async def exchange(lot: ConcurrentParkingLot, lines: list[bytes], before_each=None) -> list[dict]:
+    server = GateServer(lot, port=0)
+    await server.start()
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    replies = []
+    try:
+        for i, line in enumerate(lines):
+            if before_each:
+                before_each(i)
+            writer.write(line + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+    finally:
+        writer.close()
+        await server.close()
+    return replies
+
+def test_malformed_requests_get_error_replies():
+    replies = asyncio.run(exchange(build_lot(), [
+        b"[1]",
+        b'"park"',
+        b'{"id": 1, "op": "park", "plate": 5, "size": "COMPACT"}',
+        b'{"id": 2, "op": "park", "plate": "A", "size": "HUGE"}',
+        b'{"id": 3, "op": "fly", "plate": "A"}',
+    ]))
+    assert [reply["ok"] for reply in replies] == [False] * 5
+    assert [reply["id"] for reply in replies] == [None, None, 1, 2, 3]
+
+def test_failed_batch_does_not_stop_the_batcher():
+    lot = build_lot()
+    park_vehicles = lot.park_vehicles
+
+    def failing(vehicles, *args, **kwargs):
+        raise RuntimeError("disk full")
+
+    def before_each(i: int):
+        lot.park_vehicles = failing if i == 0 else park_vehicles
+
+    first, second = asyncio.run(exchange(lot, [
+        b'{"id": 1, "op": "park", "plate": "A", "size": "COMPACT"}',
+        b'{"id": 2, "op": "park", "plate": "A", "size": "COMPACT"}',
+    ], before_each))
+    assert not first["ok"] and "disk full" in first["error"]
+    assert second["ok"] and second["spot"] == [1, 0]
+
+def test_duplicate_and_retried_parks_are_refused():
+    lot = build_lot()
+    lot.floors[1].add_spot(VehicleSize.COMPACT)
+
+    async def run() -> tuple[list[dict], dict]:
+        server = GateServer(lot, port=0)
+        await server.start()
+        try:
+            # two gates send the same plate at once, so both land in one batch
+            together = await asyncio.gather(
+                server.park("A", VehicleSize.COMPACT),
+                server.park("A", VehicleSize.COMPACT),
+            )
+            retried = await server.park("A", VehicleSize.COMPACT)
+        finally:
+            await server.close()
+        return list(together), retried
+
+    together, retried = asyncio.run(run())
+    assert sorted(reply["ok"] for reply in together) == [False, True]
+    refused = next(reply for reply in together if not reply["ok"])
+    assert "already parked" in refused["error"]
+    assert not retried["ok"] and "already parked" in retried["error"]
+    assert len(lot.tickets) == 1
+    assert sum(not spot.open for spot in lot.floors[1].spots) == 1
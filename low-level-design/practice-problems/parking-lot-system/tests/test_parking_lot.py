@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_floor import ParkingFloor
+from parking_lot import ParkingLot
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+
+def build_lot(lot_class: type[ParkingLot] = ParkingLot, floors: int = 3, spots: int = 12) -> ParkingLot:
+    lot = lot_class()
+    sizes = list(VehicleSize)
+    for level in range(floors):
+        floor = ParkingFloor(level)
+        for i in range(spots):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+def filled(lot: ParkingLot) -> int:
+    return sum(lot.occupancy()["total"][size]["filled"] for size in VehicleSize)
+
+def state(lot: ParkingLot) -> tuple:
+    spots = {plate: tuple(ticket.spot.id) for plate, ticket in lot.tickets.items()}
+    taken = sum(1 for floor in lot.floors.values() for spot in floor.spots if not spot.open)
+    return spots, lot.occupancy(), taken
+
+@pytest.mark.parametrize("lot_class", [ParkingLot, ConcurrentParkingLot])
+def test_same_plate_twice_in_one_batch(lot_class):
+    lot = build_lot(lot_class, floors=1, spots=3)
+    result = lot.park_vehicles([Vehicle("A", VehicleSize.COMPACT), Vehicle("A", VehicleSize.COMPACT)])
+    assert list(result.tickets) == ["A"] and not result.failures
+    assert [vehicle.plate_number for vehicle in result.duplicates] == ["A"]
+    assert filled(lot) == 1 and len(lot.tickets) == 1
+
+    lot.unpark_vehicles(["A"])
+    assert filled(lot) == 0 and len(lot.tickets) == 0
+
+@pytest.mark.parametrize("lot_class", [ParkingLot, ConcurrentParkingLot])
+def test_parking_a_plate_that_is_already_inside(lot_class, capsys):
+    lot = build_lot(lot_class)
+    lot.park_vehicle(Vehicle("A", VehicleSize.LARGE))
+    lot.park_vehicle(Vehicle("A", VehicleSize.COMPACT))
+    assert "already parked" in capsys.readouterr().out
+    assert filled(lot) == 1
+    assert lot.park_vehicles([Vehicle("A", VehicleSize.LARGE)]).duplicates
+
+def test_batches_match_calls_made_one_by_one():
+    # parks and unparks with repeated plates and a lot that fills up, batched and one at a time
+    rng = random.Random(11)
+    sizes = list(VehicleSize)
+    steps = []
+    for _ in range(40):
+        if rng.random() < 0.6:
+            steps.append(("park", [Vehicle(f"p{rng.randrange(60)}", rng.choice(sizes)) for _ in range(rng.randrange(1, 8))]))
+        else:
+            steps.append(("unpark", [f"p{rng.randrange(60)}" for _ in range(rng.randrange(1, 8))]))
+
+    batched, single = build_lot(), build_lot()
+    for op, items in steps:
+        if op == "park":
+            result = batched.park_vehicles(items)
+            for vehicle in items:
+                single.park_vehicle(vehicle)
+            assert len(result.tickets) + len(result.failures) + len(result.duplicates) == len(items)
+        else:
+            batched.unpark_vehicles(items)
+            for plate in items:
+                single.unpark_vehicle(plate)
+        assert state(batched) == state(single)
+        spots, occupancy, taken = state(batched)
+        assert len(spots) == taken == filled(batched)
@@ -0,0 +1,66 @@
+import datetime
+import random
+from array import array
+
+import pytest
+
+from parking_spot import ParkingSpot
+from parking_ticket import ParkingTicket
+from payment_strategy import FlatFeeStrategy, HourlyRateStrategy, IPaymentStrategy, TieredRateStrategy
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+NUM_CASES = 5_000
+STRATEGIES = [FlatFeeStrategy(), HourlyRateStrategy(), HourlyRateStrategy(daily_cap=20), TieredRateStrategy(daily_cap=25)]
+
+
+def random_duration_us(rng: random.Random) -> int:
+    # mix of arbitrary stays and stays sitting exactly on or next to an hour/day boundary
+    if rng.random() < 0.5:
+        return rng.randrange(0, 10 * 24 * 3600 * 1_000_000)
+    boundary = rng.randrange(0, 240) * 3600 * 1_000_000
+    return max(0, boundary + rng.choice((-1, 0, 1)))
+
+def random_stays(rng: random.Random, count: int) -> list[tuple[ParkingTicket, datetime.datetime]]:
+    spot = ParkingSpot([0, 0], VehicleSize.COMPACT)
+    start = datetime.datetime(2025, 1, 1)
+    stays = []
+    for _ in range(count):
+        entered = start + datetime.timedelta(microseconds=rng.randrange(0, 365 * 24 * 3600 * 1_000_000))
+        left = entered + datetime.timedelta(microseconds=random_duration_us(rng))
+        stays.append((ParkingTicket(Vehicle("x", VehicleSize.COMPACT), spot, entered), left))
+    return stays
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda strategy: type(strategy).__name__)
+def test_batch_matches_process_payment(strategy):
+    stays = random_stays(random.Random(7), NUM_CASES)
+    time_in = array("d", (ticket.time_in.timestamp() for ticket, _ in stays))
+    time_out = array("d", (left.timestamp() for _, left in stays))
+    fees = strategy.process_payments(time_in, time_out)
+    for (ticket, left), fee in zip(stays, fees):
+        assert fee == pytest.approx(strategy.process_payment(ticket, left), abs=1e-9), (ticket.time_in, left)
+
+def test_rounds_up_to_started_units():
+    ticket = ParkingTicket(Vehicle("x", VehicleSize.COMPACT), None, datetime.datetime(2025, 1, 1))
+    assert FlatFeeStrategy().process_payment(ticket, datetime.datetime(2025, 1, 2, 0, 0, 0, 1)) == 10
+    assert HourlyRateStrategy(daily_cap=20).process_payment(ticket, datetime.datetime(2025, 1, 2, 1)) == 21.5
+
+def test_mismatched_columns():
+    with pytest.raises(ValueError):
+        FlatFeeStrategy().process_payments([0.0], [])
+
+def test_strategy_overriding_only_process_payment():
+    class WeekendFreeStrategy(IPaymentStrategy):
+        def process_payment(self, ticket, time_out) -> float:
+            return 0 if ticket.time_in.weekday() >= 5 else 8
+
+    saturday, monday = datetime.datetime(2025, 1, 4).timestamp(), datetime.datetime(2025, 1, 6).timestamp()
+    fees = WeekendFreeStrategy().process_payments([saturday, monday], [saturday + 60, monday + 60])
+    assert list(fees) == [0, 8]
+
+def test_batch_honours_a_process_payment_override():
+    class SurchargeStrategy(FlatFeeStrategy):
+        def process_payment(self, ticket, time_out) -> float:
+            return super().process_payment(ticket, time_out) + 1
+
+    assert list(SurchargeStrategy().process_payments([0.0], [3600.0])) == [6]
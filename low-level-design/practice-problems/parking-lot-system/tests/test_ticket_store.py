@@ -0,0 +1,78 @@
+import datetime
+import os
+import threading
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_floor import ParkingFloor
+from parking_lot import ParkingLot
+from parking_spot import ParkingSpot
+from parking_ticket import ParkingTicket
+from ticket_store import InMemoryTicketStore, WalTicketStore
+from vehicle import Vehicle
+from vehicle_size import VehicleSize
+
+
+def build_lot(store, lot_class: type[ParkingLot] = ParkingLot) -> ParkingLot:
+    lot = lot_class(store)
+    floor = ParkingFloor(0)
+    for _ in range(4):
+        floor.add_spot(VehicleSize.COMPACT)
+    lot.add_floor(floor)
+    return lot
+
+def occupied(lot: ParkingLot) -> tuple[list[tuple], dict[str, tuple]]:
+    # taken spots and where each ticket says its vehicle is
+    taken = sorted(tuple(spot.id) for floor in lot.floors.values() for spot in floor.spots if not spot.open)
+    return taken, {plate: tuple(ticket.spot.id) for plate, ticket in lot.tickets.items()}
+
+def test_stores_refuse_a_second_open(tmp_path):
+    vehicle = Vehicle("A", VehicleSize.COMPACT)
+    first = ParkingTicket(vehicle, ParkingSpot([0, 0], VehicleSize.COMPACT), datetime.datetime(2025, 1, 1))
+    second = ParkingTicket(vehicle, ParkingSpot([0, 1], VehicleSize.COMPACT), datetime.datetime(2025, 1, 1))
+    for store in (InMemoryTicketStore(), WalTicketStore(str(tmp_path))):
+        assert store.open_ticket(first)
+        assert not store.open_ticket(second)
+        assert store.get("A") is first
+        store.close()
+    with open(os.path.join(tmp_path, WalTicketStore.LOG), encoding="utf-8") as log:
+        assert [line.split("\t")[0] for line in log] == ["P"]
+
+def test_double_park_replays_to_the_state_before_the_restart(tmp_path):
+    store = WalTicketStore(str(tmp_path))
+    lot = build_lot(store)
+    lot.park_vehicles([Vehicle("A", VehicleSize.COMPACT), Vehicle("A", VehicleSize.COMPACT), Vehicle("B", VehicleSize.COMPACT)])
+    lot.park_vehicles([Vehicle("A", VehicleSize.COMPACT)])
+    before = occupied(lot)
+    assert len(before[0]) == len(before[1]) == 2
+    store.close()
+
+    store = WalTicketStore(str(tmp_path))
+    restarted = build_lot(store)
+    assert restarted.recover_tickets() == 2
+    assert occupied(restarted) == before
+    store.close()
+
+def test_racing_gates_park_a_plate_once(tmp_path):
+    store = WalTicketStore(str(tmp_path))
+    lot = build_lot(store, ConcurrentParkingLot)
+    start = threading.Barrier(8)
+    results = []
+
+    def park():
+        start.wait()
+        result = lot.park_vehicles([Vehicle("A", VehicleSize.COMPACT)])
+        results.append((len(result.tickets), len(result.duplicates)))
+
+    threads = [threading.Thread(target=park) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [(0, 1)] * 7 + [(1, 0)]
+    taken, tickets = occupied(lot)
+    assert len(taken) == len(tickets) == 1
+    store.close()
+
+    store = WalTicketStore(str(tmp_path))
+    assert len(store.recovered_tickets()) == 1
+    store.close()
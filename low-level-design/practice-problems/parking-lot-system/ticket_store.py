@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+import contextlib
+import datetime
+import gc
+import os
+import threading
+from typing import Iterator
+
+from parking_ticket import ParkingTicket
+from vehicle_size import VehicleSize
+
+# (plate_number, size, level, slot, time_in) for a ticket that was open when the store last stopped
+TicketRecord = tuple[str, VehicleSize, int, int, datetime.datetime]
+
+
+@contextlib.contextmanager
+def paused_gc():
+    # recovery allocates objects that all stay alive, so cyclic GC passes over them are wasted work
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ITicketStore(ABC): 
+    @abstractmethod
+    def open_ticket(self, ticket: ParkingTicket) -> bool:
+        # False, and nothing recorded, when the plate already has an open ticket
+        pass
+
+    @abstractmethod
+    def close_ticket(self, plate_number: str) -> ParkingTicket | None:
+        pass
+
+    @abstractmethod
+    def get(self, plate_number: str, default: ParkingTicket | None = None) -> ParkingTicket | None:
+        pass
+
+    @abstractmethod
+    def values(self) -> Iterator[ParkingTicket]:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __contains__(self, plate_number: str) -> bool:
+        return self.get(plate_number) is not None
+
+    def items(self) -> Iterator[tuple[str, ParkingTicket]]:
+        for ticket in self.values():
+            yield ticket.vehicle.plate_number, ticket
+
+    def recovered_tickets(self) -> list[TicketRecord]:
+        return []
+
+    def restore_tickets(self, tickets: list[ParkingTicket]) -> None:
+        # re-attach recovered tickets without recording them again
+        pass
+
+    def batch(self):
+        # a block of opens and closes; durable stores may defer their syncs to its end
+        return contextlib.nullcontext()
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryTicketStore(ITicketStore): 
+    def __init__(self):
+        self.__tickets: dict[str, ParkingTicket] = {}
+        self.__lock = threading.Lock()
+
+    def open_ticket(self, ticket: ParkingTicket) -> bool:
+        with self.__lock:
+            if ticket.vehicle.plate_number in self.__tickets:
+                return False
+            self.__tickets[ticket.vehicle.plate_number] = ticket
+            return True
+
+    def close_ticket(self, plate_number: str) -> ParkingTicket | None:
+        # closed tickets are evicted so the store only ever holds vehicles inside the lot;
+        # only one of two concurrent closes of a plate gets the ticket back
+        with self.__lock:
+            return self.__tickets.pop(plate_number, None)
+
+    def get(self, plate_number: str, default: ParkingTicket | None = None) -> ParkingTicket | None:
+        return self.__tickets.get(plate_number, default)
+
+    def values(self) -> Iterator[ParkingTicket]:
+        return iter(list(self.__tickets.values()))
+
+    def __len__(self) -> int:
+        return len(self.__tickets)
+
+
+class WalTicketStore(ITicketStore): 
+    # Events are appended to wal.log as tab separated lines:
+    #   P <plate> <size> <level> <slot> <time_in epoch>
+    #   U <plate>
+    # compact() writes the open tickets to snapshot.log and starts a new log.
+    SNAPSHOT = "snapshot.log"
+    LOG = "wal.log"
+
+    def __init__(self, directory: str, sync_every: int = 64, max_sync_delay: float = 0.0, 
+                 compact_every: int = 100_000):
+        self.directory = directory
+        # group commit: open_ticket/close_ticket return once an fsync covering their record has
+        # finished. One caller at a time fsyncs everything written so far while the others queue,
+        # and those it covered return without an fsync of their own. With max_sync_delay set, the
+        # syncing caller first waits up to that long for sync_every records to gather.
+        self.sync_every = sync_every
+        self.max_sync_delay = max_sync_delay
+        self.compact_every = compact_every
+        self.__tickets: dict[str, ParkingTicket] = {}
+        self.__lock = threading.Lock()
+        self.__appended = threading.Condition(self.__lock)
+        # held for a whole fsync, so only one runs at a time and the log is not swapped under it
+        self.__sync_lock = threading.Lock()
+        self.__written = 0
+        self.__durable = 0
+        # fsyncs issued, to see how many records each one covered
+        self.syncs = 0
+        self.__since_compaction = 0
+        self.__batch = threading.local()
+
+        os.makedirs(directory, exist_ok=True)
+        with paused_gc():
+            # tickets replayed but not yet restored, by plate; still written out by compaction
+            self.__recovered: dict[str, TicketRecord] = {record[0]: record for record in self.__replay()}
+        self.__truncate_torn_tail(os.path.join(directory, self.LOG))
+        self.__log = open(os.path.join(directory, self.LOG), "a", encoding="utf-8")
+
+    def open_ticket(self, ticket: ParkingTicket) -> bool:
+        level, slot = ticket.spot.id
+        line = f"P\t{ticket.vehicle.plate_number}\t{ticket.vehicle.size.name}\t{level}\t{slot}\t{ticket.time_in.timestamp()}\n"
+        with self.__lock:
+            # a second P record would make replay keep only one of the two spots the plate holds
+            if ticket.vehicle.plate_number in self.__tickets:
+                return False
+            self.__tickets[ticket.vehicle.plate_number] = ticket
+            self.__recovered.pop(ticket.vehicle.plate_number, None)
+            written = self.__append(line)
+        self.__commit(written)
+        return True
+
+    def close_ticket(self, plate_number: str) -> ParkingTicket | None:
+        with self.__lock:
+            ticket = self.__tickets.pop(plate_number, None)
+            # a recovered ticket that is closed before it was restored must not come back either
+            recovered = self.__recovered.pop(plate_number, None)
+            if ticket is None and recovered is None:
+                return None
+            written = self.__append(f"U\t{plate_number}\n")
+        self.__commit(written)
+        return ticket
+
+    def get(self, plate_number: str, default: ParkingTicket | None = None) -> ParkingTicket | None:
+        return self.__tickets.get(plate_number, default)
+
+    def values(self) -> Iterator[ParkingTicket]:
+        with self.__lock:
+            return iter(list(self.__tickets.values()))
+
+    def __len__(self) -> int:
+        return len(self.__tickets)
+
+    @contextlib.contextmanager
+    def batch(self):
+        # opens and closes inside the block are made durable together when it exits
+        depth = getattr(self.__batch, "depth", 0)
+        self.__batch.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.__batch.depth = depth
+        if depth == 0:
+            with self.__lock:
+                written = self.__written
+            self.__commit(written)
+
+    def recovered_tickets(self) -> list[TicketRecord]:
+        with self.__lock:
+            return list(self.__recovered.values())
+
+    def restore_tickets(self, tickets: list[ParkingTicket]) -> None:
+        plates = [ticket.vehicle.plate_number for ticket in tickets]
+        with self.__lock:
+            self.__tickets.update(zip(plates, tickets))
+            for plate_number in plates:
+                self.__recovered.pop(plate_number, None)
+
+    def sync(self) -> None:
+        with self.__lock:
+            written = self.__written
+        self.__wait_durable(written)
+
+    def compact(self) -> None:
+        with self.__sync_lock, self.__lock:
+            self.__compact()
+
+    def close(self) -> None:
+        with self.__sync_lock, self.__lock:
+            self.__sync()
+            self.__log.close()
+
+    def __append(self, line: str) -> int:
+        self.__log.write(line)
+        self.__written += 1
+        self.__since_compaction += 1
+        if self.__written - self.__durable >= self.sync_every:
+            self.__appended.notify()
+        return self.__written
+
+    def __commit(self, written: int) -> None:
+        if getattr(self.__batch, "depth", 0):
+            return
+        self.__wait_durable(written)
+        if self.__since_compaction >= self.compact_every:
+            self.compact()
+
+    def __wait_durable(self, written: int) -> None:
+        # whoever holds the sync lock fsyncs for everyone queued behind it
+        with self.__sync_lock:
+            if self.__durable >= written:
+                return
+            with self.__lock:
+                if self.max_sync_delay:
+                    self.__appended.wait_for(lambda: self.__written - self.__durable >= self.sync_every,
+                                             self.max_sync_delay)
+                self.__log.flush()
+                target = self.__written
+            os.fsync(self.__log.fileno())
+            self.__durable = target
+            self.syncs += 1
+
+    def __sync(self) -> None:
+        # caller holds both locks
+        self.__log.flush()
+        os.fsync(self.__log.fileno())
+        self.__durable = self.__written
+        self.syncs += 1
+
+    def __compact(self) -> None:
+        # the snapshot holds the open tickets as P lines, written aside and renamed into place
+        # so a crash leaves either the old or the new snapshot; replaying the old log over
+        # the new snapshot is harmless because each plate ends in the same state
+        self.__sync()
+        path = os.path.join(self.directory, self.SNAPSHOT)
+        with open(path + ".tmp", "w", encoding="utf-8") as snapshot:
+            for plate_number, ticket in self.__tickets.items():
+                level, slot = ticket.spot.id
+                snapshot.write(f"P\t{plate_number}\t{ticket.vehicle.size.name}\t{level}\t{slot}\t{ticket.time_in.timestamp()}\n")
+            for plate_number, record in self.__recovered.items():
+                snapshot.write(f"P\t{plate_number}\t{record[1].name}\t{record[2]}\t{record[3]}\t{record[4].timestamp()}\n")
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(path + ".tmp", path)
+        self.__log.close()
+        self.__log = open(os.path.join(self.directory, self.LOG), "w", encoding="utf-8")
+        os.fsync(self.__log.fileno())
+        self.__since_compaction = 0
+
+    @staticmethod
+    def __truncate_torn_tail(path: str) -> None:
+        # drop a partial last line so new events do not get glued onto it
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "r+b") as log:
+            log.seek(-1, os.SEEK_END)
+            if log.read(1) != b"\n":
+                log.seek(0)
+                log.truncate(log.read().rfind(b"\n") + 1)
+
+    def __replay(self) -> list[TicketRecord]:
+        open_tickets: dict[str, list[str]] = {}
+        for name in (self.SNAPSHOT, self.LOG):
+            path = os.path.join(self.directory, name)
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as log:
+                data = log.read()
+            # anything after the last newline is a torn write at the tail of the log
+            for line in data[:data.rfind("\n") + 1].splitlines():
+                fields = line.split("\t")
+                if fields[0] == "P" and len(fields) == 6:
+                    open_tickets[fields[1]] = fields
+                elif fields[0] == "U" and len(fields) == 2:
+                    open_tickets.pop(fields[1], None)
+        if not open_tickets:
+            return []
+        # converted a column at a time; tickets parked in one batch share their time_in
+        _, plates, size_names, levels, slots, times = zip(*open_tickets.values())
+        sizes = {size.name: size for size in VehicleSize}
+        moments = {time_in: datetime.datetime.fromtimestamp(float(time_in)) for time_in in set(times)}
+        return list(zip(plates, map(sizes.__getitem__, size_names), map(int, levels), map(int, slots),
+                        map(moments.__getitem__, times)))
@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from concurrent_parking_lot import ConcurrentParkingLot
+from parking_lot import ParkingLot
+from parking_floor import ParkingFloor
+from ticket_store import WalTicketStore
+from vehicle_size import VehicleSize
+from vehicle import Vehicle
+
+NUM_FLOORS = 20
+SPOTS_PER_FLOOR = 6_000
+NUM_EVENTS = 20_000
+NUM_SYNCED_EVENTS = 2_000
+NUM_OPEN_TICKETS = 100_000
+
+
+def build_lot(store: WalTicketStore, lot_class: type[ParkingLot] = ParkingLot) -> ParkingLot:
+    lot = lot_class(store)
+    sizes = list(VehicleSize)
+    for level in range(NUM_FLOORS):
+        floor = ParkingFloor(level)
+        for i in range(SPOTS_PER_FLOOR):
+            floor.add_spot(sizes[i % len(sizes)])
+        lot.add_floor(floor)
+    return lot
+
+
+def log_throughput(mode: str, events: int, sync_every: int = 64, threads: int = 8) -> tuple[float, float]:
+    # alternating park/unpark so every event is appended to the log; each call returns once its event is on disk
+    with tempfile.TemporaryDirectory() as directory:
+        store = WalTicketStore(directory, sync_every=sync_every)
+        lot = build_lot(store) if mode != "threads" else build_lot(store, ConcurrentParkingLot)
+        sizes = list(VehicleSize)
+        vehicles = [Vehicle(f"plate-{i}", sizes[i % len(sizes)]) for i in range(events // 2)]
+
+        def run(chunk: list[Vehicle]):
+            for vehicle in chunk:
+                lot.park_vehicles([vehicle])
+                lot.unpark_vehicles([vehicle.plate_number])
+
+        start = time.perf_counter()
+        if mode == "single":
+            run(vehicles)
+        elif mode == "threads":
+            # concurrent callers share an fsync instead of each paying for their own
+            with ThreadPoolExecutor(threads) as executor:
+                list(executor.map(run, [vehicles[i::threads] for i in range(threads)]))
+        else:
+            for i in range(0, len(vehicles), sync_every):
+                with store.batch():
+                    run(vehicles[i:i + sync_every])
+        elapsed = time.perf_counter() - start
+        store.close()
+        return events / elapsed, events / store.syncs
+
+
+def crash_recovery() -> int:
+    # a process that exits without closing the store keeps every ticket whose park call returned
+    with tempfile.TemporaryDirectory() as directory:
+        script = (
+            "import os, sys\n"
+            "from ticket_store import WalTicketStore\n"
+            "from ticket_store_benchmark import build_lot\n"
+            "from vehicle import Vehicle\n"
+            "from vehicle_size import VehicleSize\n"
+            "lot = build_lot(WalTicketStore(sys.argv[1], sync_every=1024, max_sync_delay=1.0))\n"
+            "for i in range(10):\n"
+            "    lot.park_vehicle(Vehicle(f'plate-{i}', VehicleSize.COMPACT))\n"
+            "lot.unpark_vehicle('plate-3')\n"
+            "os._exit(0)\n"
+        )
+        subprocess.run([sys.executable, "-c", script, directory], check=True, stdout=subprocess.DEVNULL,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        store = WalTicketStore(directory)
+        lot = build_lot(store)
+        recovered = lot.recover_tickets()
+        assert recovered == 9 and "plate-3" not in lot.tickets
+        store.close()
+        return recovered
+
+
+def replay_time() -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        store = WalTicketStore(directory, sync_every=1024)
+        lot = build_lot(store)
+        sizes = list(VehicleSize)
+        result = lot.park_vehicles(Vehicle(f"plate-{i}", sizes[i % len(sizes)]) for i in range(NUM_OPEN_TICKETS))
+        assert not result.failures
+        store.close()
+
+        # restart: replay the log and rebuild spot occupancy on a fresh lot
+        start = time.perf_counter()
+        store = WalTicketStore(directory)
+        replayed = time.perf_counter() - start
+        lot = build_lot(store)
+        start = time.perf_counter()
+        recovered = lot.recover_tickets()
+        rebuilt = time.perf_counter() - start
+        assert recovered == NUM_OPEN_TICKETS and len(lot.tickets) == NUM_OPEN_TICKETS
+        assert sum(floor.occupancy()[size]["filled"] for floor in lot.floors.values() for size in VehicleSize) == NUM_OPEN_TICKETS
+
+        # compaction folds the log into the snapshot and the replay still matches
+        store.compact()
+        store.close()
+        start = time.perf_counter()
+        assert len(WalTicketStore(directory).recovered_tickets()) == NUM_OPEN_TICKETS
+        compacted = time.perf_counter() - start
+        return replayed + rebuilt, compacted
+
+
+def main():
+    print(f"Crash without close: {crash_recovery()} of 9 open tickets recovered")
+    print("WAL throughput, durable park/unpark events")
+    for label, mode, events in (("one caller", "single", NUM_SYNCED_EVENTS), ("8 threads, group commit", "threads", NUM_SYNCED_EVENTS),
+                                ("batches of 64 vehicles", "batch", NUM_EVENTS)):
+        throughput, per_sync = log_throughput(mode, events)
+        print(f"- {label}: {throughput:,.0f} events/s, {per_sync:.1f} events per fsync")
+    recovery, compacted = replay_time()
+    print(f"Recovery of {NUM_OPEN_TICKETS:,} open tickets")
+    print(f"- log replay + spot rebuild: {recovery:.3f}s")
+    print(f"- snapshot replay after compaction: {compacted:.3f}s")
+
+if __name__ == "__main__": 
+    main()
@@ -1,27 +1,26 @@
 import uuid
 
-from vote import Vote, VoteType
+from vote import Vote, VoteType, VOTE_WEIGHTS
 from comment import Comment
 
 
 class Answer:
-    def __init__(self, author_id: uuid.UUID, question_id: uuid.UUID, content: str): 
-        self.id: uuid.UUID = uuid.uuid4()
+    def __init__(self, author_id: uuid.UUID, question_id: uuid.UUID, content: str, id: uuid.UUID | None = None): 
+        self.id: uuid.UUID = id or uuid.uuid4()
         self.author_id: uuid.UUID = author_id
         self.question_id: uuid.UUID = question_id
         self.content: str = content
         self.comments: set[uuid.UUID] = set()
         self.votes: dict[uuid.UUID, Vote] = {}
+        self.__vote_score = 0
 
     @property
-    def vote_score(self): 
-        result = 0
-        for vote in self.votes.values():
-            if vote.type == VoteType.UPVOTE:
-                result += 1
-            elif vote.type == VoteType.DOWNVOTE: 
-                result -= 1
-        return result
+    def vote_score(self) -> int: 
+        return self.__vote_score
+
+    def recompute_vote_score(self) -> int: 
+        # full recount from the individual votes, used to check the running score
+        return sum(VOTE_WEIGHTS[vote.type] for vote in self.votes.values())
 
     def update_content(self, content: str): 
         self.content = content
@@ -29,8 +28,22 @@ class Answer:
     def add_comment(self, comment: Comment):
         self.comments.add(comment.id)
 
-    def vote(self, user_id: uuid.UUID, type: VoteType):
+    def vote(self, user_id: uuid.UUID, type: VoteType) -> int:
+        # returns the change in vote score
+        delta = VOTE_WEIGHTS[type]
         if user_id in self.votes: 
-            self.votes[user_id].type = type
+            vote = self.votes[user_id]
+            delta -= VOTE_WEIGHTS[vote.type]
+            vote.type = type
         else: 
             self.votes[user_id] = Vote(user_id, type)
+        self.__vote_score += delta
+        return delta
+
+    def retract_vote(self, user_id: uuid.UUID) -> int:
+        vote = self.votes.pop(user_id, None)
+        if vote is None: 
+            return 0
+        delta = -VOTE_WEIGHTS[vote.type]
+        self.__vote_score += delta
+        return delta
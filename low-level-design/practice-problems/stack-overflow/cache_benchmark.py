@@ -0,0 +1,118 @@
+import itertools
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from search_cache import SearchCache
+from search_strategy import TagSearchStrategy, KeywordSearchStrategy, UserSearchStrategy
+from query_planner import QueryPlanner
+from vote import VoteType
+
+NUM_QUESTIONS = 20_000
+NUM_USERS = 500
+NUM_TAGS = 1_000
+NUM_QUERIES = 200
+NUM_OPS = 10_000
+WRITE_RATIO = 0.05
+SEED = 5
+
+TAGS = [f"tag{rank}" for rank in range(NUM_TAGS)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_TAGS)))
+QUERY_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_QUERIES)))
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=k))
+
+def build_system(search_cache: SearchCache):
+    rng = random.Random(SEED)
+    system = StackOverflowSystem(search_cache=search_cache)
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(NUM_USERS)]
+    for i in range(NUM_QUESTIONS):
+        system.add_question(rng.choice(users), f"question {i}", words(rng, 10), set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3)))
+    return system, users
+
+def query_pool(rng: random.Random, users: list) -> list:
+    # (kind, strategy, sort, limit); popular queries come first and are picked Zipf-style
+    pool = []
+    for i in range(NUM_QUERIES):
+        tag = TAGS[5 + i]
+        kind = i % 4
+        if kind == 0:
+            pool.append(("search", KeywordSearchStrategy([TAGS[20 + i], TAGS[21 + i]], limit=10), None, None))
+        elif kind == 1:
+            pool.append(("query", TagSearchStrategy([tag]), "recency", 20))
+        elif kind == 2:
+            pool.append(("query", TagSearchStrategy([tag]) & ~TagSearchStrategy([TAGS[0]]), "score", 20))
+        else:
+            pool.append(("query", UserSearchStrategy([rng.choice(users)]) | TagSearchStrategy([tag]), "score", 20))
+    return pool
+
+def uncached(system, kind, strategy, sort, limit) -> list:
+    if kind == "search":
+        return strategy.search(system)
+    return list(QueryPlanner(system).run(strategy, sort, 0, limit))
+
+def same_top(result: list, expected: list) -> bool:
+    # questions tied on score may come back in either order, and either may make the cut
+    if [q.vote_score for q in result] != [q.vote_score for q in expected]:
+        return False
+    cutoff = expected[-1].vote_score if expected else 0
+    return {q.id for q in result if q.vote_score > cutoff} == {q.id for q in expected if q.vote_score > cutoff}
+
+def run(system, users: list, ops: int, verify: bool) -> float:
+    # the same seeded mix of Zipf-repeated reads and writes for every system;
+    # returns the elapsed seconds, or the number of stale reads when verifying
+    rng = random.Random(SEED + 1)
+    pool = query_pool(rng, users)
+    questions = list(system.questions)
+    answers = []
+    mismatches = 0
+    start = time.perf_counter()
+    for _ in range(ops):
+        if rng.random() < WRITE_RATIO:
+            write = rng.random()
+            if write < 0.5:
+                system.vote(rng.choice(users), rng.choice(questions), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+            elif write < 0.7:
+                question = system.add_question(rng.choice(users), "new question", words(rng, 10), set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3)))
+                questions.append(question.id)
+            elif write < 0.9:
+                answers.append(system.add_answer(rng.choice(users), rng.choice(questions), words(rng, 8)))
+            elif answers:
+                answer = rng.choice(answers)
+                system.update_answer(answer.author_id, answer.id, content=words(rng, 8))
+            continue
+        kind, strategy, sort, limit = pool[rng.choices(range(NUM_QUERIES), cum_weights=QUERY_WEIGHTS)[0]]
+        if kind == "search":
+            result = system.search_questions([strategy])
+        else:
+            result = list(system.query(strategy, sort=sort, limit=limit))
+        if verify:
+            expected = uncached(system, kind, strategy, sort, limit)
+            same = same_top(result, expected) if sort == "score" else [q.id for q in result] == [q.id for q in expected]
+            mismatches += not same
+    return mismatches if verify else time.perf_counter() - start
+
+if __name__ == "__main__":
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_OPS
+
+    # cached results must match recomputing every read from the indexes
+    system, users = build_system(SearchCache())
+    assert run(system, users, ops, verify=True) == 0, "exact cache returned stale results"
+    exact = system.search_cache.metrics()
+    print(f"exact cache verified over {ops} ops, hit rate {exact['hit_rate']:.1%}, {exact['invalidations']} invalidated entries")
+
+    timings = {}
+    for label, cache in [
+        ("no cache", SearchCache(max_entries=0)),
+        ("exact cache", SearchCache()),
+        ("rank_tolerance=0.01", SearchCache(rank_tolerance=0.01)),
+    ]:
+        system, users = build_system(cache)
+        timings[label] = run(system, users, ops, verify=False)
+        metrics = system.search_cache.metrics()
+        print(f"{label:<22} {timings[label]:7.2f}s  hit rate {metrics['hit_rate']:6.1%}  "
+              f"invalidations {metrics['invalidations']:6d}  evictions {metrics['evictions']:6d}")
+    for label in ("exact cache", "rank_tolerance=0.01"):
+        print(f"{label} speedup: {timings['no cache'] / timings[label]:.1f}x")
@@ -3,8 +3,8 @@ import uuid
 
 
 class Comment: 
-    def __init__(self, author_id: uuid.UUID, post_id: uuid.UUID, content: str):
-        self.id = uuid.uuid4()
+    def __init__(self, author_id: uuid.UUID, post_id: uuid.UUID, content: str, id: uuid.UUID | None = None):
+        self.id = id or uuid.uuid4()
         self.post_id = post_id
         self.author_id = author_id
         self.content = content
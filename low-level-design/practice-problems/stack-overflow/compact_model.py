@@ -0,0 +1,282 @@
+import datetime
+import uuid
+from array import array
+from collections.abc import Mapping, MutableSet
+
+from vote import VoteType, VOTE_WEIGHTS
+
+# sign stored in the vote arrays -> vote type
+VOTE_TYPES: dict[int, VoteType] = {weight: type for type, weight in VOTE_WEIGHTS.items()}
+# posts with more votes than this also keep a voter -> position dict instead of searching the array
+VOTE_INDEX_THRESHOLD = 32
+# answer or comment id sets are kept as a list up to this size, then switch to a real set
+ID_SET_THRESHOLD = 32
+
+
+class UserIds:
+    # Interns user UUIDs to dense ints, so vote storage can hold 4-byte voter ids
+    def __init__(self):
+        self.__dense: dict[uuid.UUID, int] = {}
+        self.__uuids: list[uuid.UUID] = []
+
+    def __len__(self) -> int:
+        return len(self.__uuids)
+
+    def intern(self, user_id: uuid.UUID) -> int:
+        dense = self.__dense.get(user_id)
+        if dense is None:
+            dense = self.__dense[user_id] = len(self.__uuids)
+            self.__uuids.append(user_id)
+        return dense
+
+    def dense(self, user_id: uuid.UUID) -> int:
+        return self.__dense[user_id]
+
+    def get(self, user_id: uuid.UUID) -> int | None:
+        return self.__dense.get(user_id)
+
+    def uuid(self, dense: int) -> uuid.UUID:
+        return self.__uuids[dense]
+
+
+class VoteArray:
+    # One post's votes as a single int array: dense voter id + 1, negated for a downvote.
+    # Retracting swaps the last vote into the hole.
+    __slots__ = ("votes", "__positions")
+
+    def __init__(self):
+        self.votes = array("i")
+        self.__positions: dict[int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.votes)
+
+    def voters(self):
+        for vote in self.votes:
+            yield abs(vote) - 1
+
+    def signs(self):
+        for vote in self.votes:
+            yield 1 if vote > 0 else -1
+
+    def get(self, voter: int) -> int:
+        position = self.__find(voter)
+        return 0 if position is None else self.__sign(position)
+
+    def set(self, voter: int, sign: int) -> int:
+        # returns the previous sign, 0 if the voter had not voted
+        position = self.__find(voter)
+        if position is not None:
+            previous = self.__sign(position)
+            self.votes[position] = (voter + 1) * sign
+            return previous
+        if self.__positions is not None:
+            self.__positions[voter] = len(self.votes)
+        self.votes.append((voter + 1) * sign)
+        if self.__positions is None and len(self.votes) > VOTE_INDEX_THRESHOLD:
+            self.__positions = {voter: position for position, voter in enumerate(self.voters())}
+        return 0
+
+    def remove(self, voter: int) -> int:
+        position = self.__find(voter)
+        if position is None:
+            return 0
+        previous = self.__sign(position)
+        last = self.votes.pop()
+        if self.__positions is not None:
+            del self.__positions[voter]
+        if position < len(self.votes):
+            self.votes[position] = last
+            if self.__positions is not None:
+                self.__positions[abs(last) - 1] = position
+        return previous
+
+    def __sign(self, position: int) -> int:
+        return 1 if self.votes[position] > 0 else -1
+
+    def __find(self, voter: int) -> int | None:
+        if self.__positions is not None:
+            return self.__positions.get(voter)
+        key = voter + 1
+        try:
+            return self.votes.index(key)
+        except ValueError:
+            pass
+        try:
+            return self.votes.index(-key)
+        except ValueError:
+            return None
+
+
+class IdSet(MutableSet):
+    # Set of a post's answer or comment ids, like Question.answers, but stored as an empty tuple,
+    # then a list, and only as a set once it grows past ID_SET_THRESHOLD: most posts have a few
+    __slots__ = ("__ids",)
+
+    def __init__(self, ids=()):
+        self.__ids: tuple | list[uuid.UUID] | set[uuid.UUID] = ()
+        for id in ids:
+            self.add(id)
+
+    def __contains__(self, id) -> bool:
+        return id in self.__ids
+
+    def __iter__(self):
+        return iter(self.__ids)
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def __repr__(self) -> str:
+        return f"IdSet({list(self.__ids)})"
+
+    def add(self, id: uuid.UUID):
+        ids = self.__ids
+        if id in ids:
+            return
+        if isinstance(ids, set):
+            ids.add(id)
+        elif len(ids) >= ID_SET_THRESHOLD:
+            self.__ids = {*ids, id}
+        elif isinstance(ids, tuple):
+            self.__ids = [id]
+        else:
+            ids.append(id)
+
+    def discard(self, id: uuid.UUID):
+        if id in self.__ids:
+            self.__ids.remove(id)
+
+
+class CompactVote:
+    # read-only view of one stored vote; compact votes have no ids of their own
+    __slots__ = ("author_id", "type")
+
+    def __init__(self, author_id: uuid.UUID, type: VoteType):
+        self.author_id = author_id
+        self.type = type
+
+
+class CompactVotes(Mapping):
+    # voter UUID -> CompactVote view over a post's VoteArray
+    def __init__(self, votes: VoteArray | None, users: UserIds):
+        self.__votes = votes
+        self.__users = users
+
+    def __len__(self) -> int:
+        return 0 if self.__votes is None else len(self.__votes)
+
+    def __iter__(self):
+        if self.__votes is not None:
+            for voter in self.__votes.voters():
+                yield self.__users.uuid(voter)
+
+    def __getitem__(self, user_id: uuid.UUID) -> CompactVote:
+        voter = self.__users.get(user_id)
+        sign = 0 if self.__votes is None or voter is None else self.__votes.get(voter)
+        if not sign:
+            raise KeyError(user_id)
+        return CompactVote(user_id, VOTE_TYPES[sign])
+
+
+class CompactPost:
+    # shared vote handling for CompactQuestion and CompactAnswer, mirroring Question/Answer
+    __slots__ = ("id", "author_id", "content", "comments", "__users", "__votes", "__vote_score")
+
+    def __init__(self, users: UserIds, author_id: uuid.UUID, content: str, id: uuid.UUID | None = None):
+        self.id: uuid.UUID = id or uuid.uuid4()
+        self.author_id: uuid.UUID = author_id
+        self.content: str = content
+        self.comments: IdSet = IdSet()
+        self.__users = users
+        # allocated on the first vote, most posts never get one
+        self.__votes: VoteArray | None = None
+        self.__vote_score = 0
+
+    @property
+    def vote_score(self) -> int:
+        return self.__vote_score
+
+    @property
+    def votes(self) -> CompactVotes:
+        return CompactVotes(self.__votes, self.__users)
+
+    def recompute_vote_score(self) -> int:
+        return 0 if self.__votes is None else sum(self.__votes.signs())
+
+    def update_content(self, content: str):
+        self.content = content
+
+    def add_comment(self, comment):
+        self.comments.add(comment.id)
+
+    def vote(self, user_id: uuid.UUID, type: VoteType) -> int:
+        if self.__votes is None:
+            self.__votes = VoteArray()
+        sign = VOTE_WEIGHTS[type]
+        delta = sign - self.__votes.set(self.__users.dense(user_id), sign)
+        self.__vote_score += delta
+        return delta
+
+    def retract_vote(self, user_id: uuid.UUID) -> int:
+        if self.__votes is None:
+            return 0
+        delta = -self.__votes.remove(self.__users.dense(user_id))
+        self.__vote_score += delta
+        return delta
+
+
+class CompactQuestion(CompactPost):
+    __slots__ = ("title", "tags", "answers", "created_at")
+
+    def __init__(self, users: UserIds, author_id: uuid.UUID, title: str, content: str, tags: set[str],
+                 id: uuid.UUID | None = None, created_at: datetime.datetime | None = None):
+        super().__init__(users, author_id, content, id)
+        self.title: str = title
+        self.tags: set[str] = tags
+        self.answers: IdSet = IdSet()
+        self.created_at: datetime.datetime = created_at or datetime.datetime.now()
+
+    def update_title(self, title: str):
+        self.title = title
+
+    def update_tags(self, tags: set[str]):
+        self.tags = tags
+
+    def add_answer(self, answer):
+        self.answers.add(answer.id)
+
+
+class CompactAnswer(CompactPost):
+    __slots__ = ("question_id",)
+
+    def __init__(self, users: UserIds, author_id: uuid.UUID, question_id: uuid.UUID, content: str,
+                 id: uuid.UUID | None = None):
+        super().__init__(users, author_id, content, id)
+        self.question_id: uuid.UUID = question_id
+
+
+class CompactComment:
+    __slots__ = ("id", "post_id", "author_id", "content")
+
+    def __init__(self, author_id: uuid.UUID, post_id: uuid.UUID, content: str, id: uuid.UUID | None = None):
+        self.id = id or uuid.uuid4()
+        self.post_id = post_id
+        self.author_id = author_id
+        self.content = content
+
+    def update_content(self, content: str):
+        self.content = content
+
+
+class CompactUser:
+    __slots__ = ("id", "username", "email", "reputation_score")
+
+    def __init__(self, username: str, email: str, id: uuid.UUID | None = None):
+        self.id = id or uuid.uuid4()
+        self.username = username
+        self.email = email
+        self.reputation_score = 0
+
+    def update_rep_score(self, score: int):
+        self.reputation_score = score
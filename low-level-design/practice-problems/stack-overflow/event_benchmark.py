@@ -0,0 +1,92 @@
+import itertools
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from search_strategy import KeywordSearchStrategy
+from vote import VoteType
+
+NUM_USERS = 200
+NUM_OPS = 30_000
+NUM_TAGS = 200
+SEED = 13
+
+TAGS = [f"tag{rank}" for rank in range(NUM_TAGS)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_TAGS)))
+QUERIES = ["tag1 tag7", "tag3", "tag20 tag40 tag80"]
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=k))
+
+def run(system: StackOverflowSystem, ops: int) -> list[float]:
+    # the same seeded mix of posts, answers, comments, retags and votes; returns each write's latency
+    rng = random.Random(SEED)
+    users = [system.add_user(f"user{i}", f"user{i}@example.com") for i in range(NUM_USERS)]
+    questions, posts, latencies = [], [], []
+    for i in range(ops):
+        user = rng.choice(users)
+        choice = rng.random()
+        start = time.perf_counter()
+        if choice < 0.15 or not questions:
+            question = system.add_question(user.id, f"q{i}", words(rng, 40), set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3)))
+            questions.append(question)
+            posts.append(question.id)
+        elif choice < 0.3:
+            posts.append(system.add_answer(user.id, rng.choice(questions).id, words(rng, 30)).id)
+        elif choice < 0.35:
+            system.add_comment(user.id, rng.choice(posts), "comment")
+        elif choice < 0.37:
+            question = rng.choice(questions)
+            system.update_question(question.author_id, question.id, tags=set(rng.choices(TAGS, k=2)))
+        else:
+            system.vote(user.id, rng.choice(posts), VoteType.UPVOTE if rng.random() < 0.8 else VoteType.DOWNVOTE)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def fingerprint(system: StackOverflowSystem) -> tuple:
+    # every projected view, keyed by titles and usernames so systems with different ids compare equal
+    with system.views_lock:
+        reputations = {user.username: user.reputation_score for user in system.users.values()}
+        tags = dict(system.tag_index.counts)
+        feeds = [[question.title for question in system.feed(name, 20, tag)] for name in ("top", "hot", "answered") for tag in (None, "tag0", "tag5")]
+        searches = [[(system.questions[question_id].title, round(score, 9)) for question_id, score in system.search_index.search(text)] for text in QUERIES]
+    return reputations, {tag: count for tag, count in tags.items() if count}, feeds, searches
+
+def summary(label: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    mean = sum(latencies) / len(latencies)
+    print(f"{label:<28} mean {mean * 1e6:7.1f}us  p50 {latencies[len(latencies) // 2] * 1e6:7.1f}us  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:7.1f}us")
+
+if __name__ == "__main__":
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_OPS
+
+    # keeps the whole log so every projection can be replayed from it below
+    inline = StackOverflowSystem(max_retained_events=None)
+    summary("projections inline", run(inline, ops))
+    expected = fingerprint(inline)
+    assert not inline.check_consistency()
+
+    background = StackOverflowSystem(async_projections=True)
+    latencies = run(background, ops)
+    summary("projections in background", latencies)
+    start = time.perf_counter()
+    background.wait_for()
+    print(f"background caught up {(time.perf_counter() - start) * 1e3:.1f}ms after the last write")
+    assert fingerprint(background) == expected
+
+    # read-your-writes: a fresh question is searchable once wait_for returns
+    author = background.get_user_by_username("user0")
+    fresh = background.add_question(author.id, "fresh", "zyzzyva", {"tag0"})
+    background.wait_for()
+    assert background.search_questions([KeywordSearchStrategy(["zyzzyva"])]) == [fresh]
+    background.close()
+
+    # every projection rebuilt from the log matches the one maintained incrementally
+    for name in inline.projections.projections:
+        start = time.perf_counter()
+        inline.projections.replay(name)
+        print(f"replayed {name:<12} {(time.perf_counter() - start) * 1e3:8.1f}ms over {len(inline.events)} events")
+    assert fingerprint(inline) == expected
+    assert not inline.check_consistency()
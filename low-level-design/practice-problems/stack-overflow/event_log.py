@@ -0,0 +1,80 @@
+import threading
+from enum import Enum
+
+
+class EventType(Enum):
+    QUESTION_ADDED = 1
+    QUESTION_UPDATED = 2
+    ANSWER_ADDED = 3
+    ANSWER_UPDATED = 4
+    COMMENT_ADDED = 5
+    VOTE = 6
+    RESTORED = 7
+
+
+class Event:
+    # One write to the system's primary state. Events point at the live posts, so projections
+    # always index a post's latest text; what they cannot read back later travels with the event:
+    # a vote's score delta, the tags a question had before an update, a restore's reputations.
+    __slots__ = ("type", "post", "delta", "old_tags", "restored")
+
+    def __init__(self, type: EventType, post=None, delta: int = 0, old_tags: frozenset[str] | None = None,
+                 restored: tuple | None = None):
+        self.type = type
+        self.post = post
+        self.delta = delta
+        self.old_tags = old_tags
+        # RESTORED: (questions, answers, comments, user_id -> reputation, whether to index the text)
+        self.restored = restored
+
+
+class EventLog:
+    # Append-only, in-process log. Offsets count events from the start of the log, so a consumer's
+    # offset is the number of events it has applied. Events every consumer has applied are dropped
+    # beyond the newest max_retained of them; by default none are kept, so the log holds only what
+    # the slowest consumer has yet to apply. None keeps every event, which a full replay needs.
+
+    def __init__(self, max_retained: int | None = 0):
+        self.max_retained = max_retained
+        self.changed = threading.Condition()
+        self.__events: list[Event] = []
+        self.__base = 0
+
+    def __len__(self) -> int:
+        return self.head
+
+    @property
+    def head(self) -> int:
+        # offset just past the newest event
+        with self.changed:
+            return self.__base + len(self.__events)
+
+    @property
+    def base(self) -> int:
+        # offset of the oldest event still in the log
+        with self.changed:
+            return self.__base
+
+    def append(self, event: Event) -> int:
+        # consumers waiting on changed are notified by whoever runs them
+        with self.changed:
+            self.__events.append(event)
+            return self.__base + len(self.__events)
+
+    def read(self, offset: int, count: int) -> list[Event]:
+        with self.changed:
+            if offset < self.__base:
+                raise ValueError(f"Events before offset {self.__base} were dropped, cannot read from {offset}.")
+            start = offset - self.__base
+            return self.__events[start:start + count]
+
+    def release(self, offset: int):
+        # every consumer is past offset
+        if self.max_retained is None:
+            return
+        with self.changed:
+            drop = offset - self.max_retained - self.__base
+            # dropping in chunks at least max_retained long keeps the list deletes amortized O(1)
+            if drop > self.max_retained:
+                del self.__events[:drop]
+                self.__base += drop
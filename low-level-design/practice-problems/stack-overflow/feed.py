@@ -0,0 +1,166 @@
+import heapq
+import math
+import uuid
+from bisect import bisect_left, insort
+
+from question import Question
+
+FEEDS = ("top", "hot", "answered")
+# hotness gains one order of magnitude of score every HOT_DECAY seconds, see hotness()
+HOT_DECAY = 45000
+HOT_EPOCH = 1735689600  # 2025-01-01 UTC, keeps the time term small
+
+
+def hotness(score: int, created: float) -> float:
+    # Decaying every score by the same factor per second never changes their order, so instead of
+    # re-scoring old questions as time passes, newer questions get a bonus that grows with time:
+    # log10(score) + created / HOT_DECAY ranks like score * 10 ** (-age / HOT_DECAY).
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    return sign * order + (created - HOT_EPOCH) / HOT_DECAY
+
+
+class Leaderboard:
+    # Incremental top-k over dense item numbers: the best `capacity` entries live in a sorted list,
+    # so a page is a slice, and the rest sit in a lazily cleaned max-heap used to refill the list
+    # when a member drops. Entries are (-score, -item): higher score first, newer item on ties.
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.__entries: dict[int, tuple[float, int]] = {}
+        self.__top: list[tuple[float, int]] = []
+        self.__in_top: set[int] = set()
+        self.__rest: list[tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, item: int) -> bool:
+        return item in self.__entries
+
+    def top(self, k: int = 20) -> list[int]:
+        if k > self.capacity:
+            return [-entry[1] for entry in heapq.nsmallest(k, self.__entries.values())]
+        return [-entry[1] for entry in self.__top[:k]]
+
+    def update(self, item: int, score: float):
+        entry = (-score, -item)
+        old = self.__entries.get(item)
+        if old == entry:
+            return
+        self.__entries[item] = entry
+        if item in self.__in_top:
+            del self.__top[bisect_left(self.__top, old)]
+            self.__in_top.discard(item)
+        self.__offer(entry)
+        self.__fill()
+
+    def remove(self, item: int):
+        entry = self.__entries.pop(item, None)
+        if entry is not None and item in self.__in_top:
+            del self.__top[bisect_left(self.__top, entry)]
+            self.__in_top.discard(item)
+            self.__fill()
+
+    def __offer(self, entry: tuple[float, int]):
+        if len(self.__top) < self.capacity or entry < self.__top[-1]:
+            insort(self.__top, entry)
+            self.__in_top.add(-entry[1])
+            if len(self.__top) > self.capacity:
+                evicted = self.__top.pop()
+                self.__in_top.discard(-evicted[1])
+                heapq.heappush(self.__rest, evicted)
+        else:
+            heapq.heappush(self.__rest, entry)
+        if len(self.__rest) > 2 * len(self.__entries) + self.capacity:
+            self.__compact()
+
+    def __fill(self):
+        # an entry left the list or dropped inside it; promote from the heap while the heap's best beats the list's worst
+        while self.__rest:
+            best = self.__rest[0]
+            item = -best[1]
+            if self.__entries.get(item) != best or item in self.__in_top:
+                heapq.heappop(self.__rest)
+                continue
+            if len(self.__top) < self.capacity:
+                heapq.heappop(self.__rest)
+            elif best < self.__top[-1]:
+                worst = self.__top.pop()
+                self.__in_top.discard(-worst[1])
+                # pops best and pushes worst in one step
+                heapq.heapreplace(self.__rest, worst)
+            else:
+                return
+            insort(self.__top, best)
+            self.__in_top.add(item)
+
+    def __compact(self):
+        # drop stale heap entries, which pile up when members are re-scored often
+        self.__rest = [entry for item, entry in self.__entries.items() if item not in self.__in_top]
+        heapq.heapify(self.__rest)
+
+
+class FeedIndex:
+    # Homepage and per-tag leaderboards for each feed in FEEDS, kept up to date from the
+    # system's question, answer and vote events. Questions are numbered in the order they were
+    # added, which keeps UUID hashing out of the leaderboards and breaks ties newest first.
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.boards: dict[str, Leaderboard] = {feed: Leaderboard(capacity) for feed in FEEDS}
+        self.tag_boards: dict[str, dict[str, Leaderboard]] = {}
+        self.__numbers: dict[uuid.UUID, int] = {}
+        self.__question_ids: list[uuid.UUID] = []
+        self.__created: list[float] = []
+
+    def feed(self, name: str = "hot", k: int = 20, tag: str | None = None) -> list[uuid.UUID]:
+        if name not in FEEDS:
+            raise ValueError(f"Unknown feed {name}, expected one of {list(FEEDS)}.")
+        if tag is None:
+            board = self.boards[name]
+        elif tag in self.tag_boards:
+            board = self.tag_boards[tag][name]
+        else:
+            return []
+        return [self.__question_ids[number] for number in board.top(k)]
+
+    def add_question(self, question: Question):
+        self.__numbers[question.id] = len(self.__question_ids)
+        self.__question_ids.append(question.id)
+        self.__created.append(question.created_at.timestamp())
+        self.__update(question, FEEDS)
+
+    def update_score(self, question: Question):
+        self.__update(question, ("top", "hot"))
+
+    def update_answers(self, question: Question):
+        self.__update(question, ("answered",))
+
+    def update_tags(self, question: Question, old_tags: set[str]):
+        number = self.__numbers[question.id]
+        for tag in set(old_tags) - set(question.tags):
+            for board in self.tag_boards.get(tag, {}).values():
+                board.remove(number)
+        # boards the question already sits on with the same score skip the update
+        self.__update(question, FEEDS)
+
+    def __update(self, question: Question, feeds: tuple[str, ...]):
+        number = self.__numbers[question.id]
+        boards = [self.boards]
+        boards.extend(self.__tag_boards(tag) for tag in question.tags)
+        for feed in feeds:
+            if feed == "top":
+                score = question.vote_score
+            elif feed == "hot":
+                score = hotness(question.vote_score, self.__created[number])
+            else:
+                score = len(question.answers)
+            for board in boards:
+                board[feed].update(number, score)
+
+    def __tag_boards(self, tag: str) -> dict[str, Leaderboard]:
+        boards = self.tag_boards.get(tag)
+        if boards is None:
+            # tag pages are shorter than the homepage, so their lists are kept smaller
+            boards = self.tag_boards[tag] = {feed: Leaderboard(max(self.capacity // 10, 50)) for feed in FEEDS}
+        return boards
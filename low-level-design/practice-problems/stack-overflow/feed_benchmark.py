@@ -0,0 +1,82 @@
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from feed import FEEDS, hotness
+from vote import VoteType
+
+NUM_USERS = 5_000
+NUM_QUESTIONS = 50_000
+NUM_EVENTS = 500_000
+NUM_TAGS = 200
+PAGE = 20
+SEED = 23
+
+def brute_force(system: StackOverflowSystem, name: str, k: int, tag: str | None = None) -> list:
+    # sort every question from scratch, newest first on ties like the leaderboards
+    questions = [q for q in system.questions.values() if tag is None or tag in q.tags]
+    sequence = {question_id: position for position, question_id in enumerate(system.questions)}
+    if name == "top":
+        score = lambda q: q.vote_score
+    elif name == "hot":
+        score = lambda q: hotness(q.vote_score, q.created_at.timestamp())
+    else:
+        score = lambda q: len(q.answers)
+    questions.sort(key=lambda q: (score(q), sequence[q.id]), reverse=True)
+    return [q.id for q in questions[:k]]
+
+def check(system: StackOverflowSystem, rng: random.Random):
+    for name in FEEDS:
+        assert [q.id for q in system.feed(name, PAGE)] == brute_force(system, name, PAGE), name
+        for tag in rng.sample(range(NUM_TAGS), 3):
+            assert [q.id for q in system.feed(name, PAGE, f"tag{tag}")] == brute_force(system, name, PAGE, f"tag{tag}"), (name, tag)
+
+if __name__ == "__main__":
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_EVENTS
+    rng = random.Random(SEED)
+    system = StackOverflowSystem()
+    users = [user.id for user in system.import_users([(f"user{i}", f"user{i}@example.com") for i in range(NUM_USERS)])]
+
+    def random_tags():
+        return {f"tag{min(int(rng.paretovariate(1.0)) - 1, NUM_TAGS - 1)}" for _ in range(3)}
+
+    questions = [system.add_question(rng.choice(users), f"q{i}", "body", random_tags()).id for i in range(NUM_QUESTIONS)]
+    posts = list(questions)
+    check(system, rng)
+
+    start = time.perf_counter()
+    for event in range(num_events):
+        roll = rng.random()
+        if roll < 0.02:
+            question_id = system.add_question(rng.choice(users), "new", "body", random_tags()).id
+            questions.append(question_id)
+            posts.append(question_id)
+        elif roll < 0.12:
+            posts.append(system.add_answer(rng.choice(users), rng.choice(questions), "answer").id)
+        elif roll < 0.13:
+            question = system.questions[rng.choice(questions)]
+            system.update_question(question.author_id, question.id, tags=random_tags())
+        else:
+            # recent questions get most of the votes
+            post_id = questions[-min(int(rng.paretovariate(0.8)), len(questions))] if roll < 0.6 else rng.choice(posts)
+            system.vote(rng.choice(users), post_id, VoteType.UPVOTE if rng.random() < 0.85 else VoteType.DOWNVOTE)
+        if event % (num_events // 5) == 0:
+            elapsed = time.perf_counter() - start
+            check(system, rng)
+            start = time.perf_counter() - elapsed
+    elapsed = time.perf_counter() - start
+    check(system, rng)
+    print(f"{num_events:,} events with feed maintenance: {elapsed:.1f}s ({elapsed / num_events * 1e6:.1f}us per event)")
+
+    for name in FEEDS:
+        start = time.perf_counter()
+        for _ in range(1000):
+            system.feed(name, PAGE)
+            system.feed(name, PAGE, "tag1")
+        served = (time.perf_counter() - start) / 2000
+        start = time.perf_counter()
+        for _ in range(3):
+            brute_force(system, name, PAGE)
+        sorted_time = (time.perf_counter() - start) / 3
+        print(f"{name:<9} feed page: {served * 1e6:6.1f}us   sorting every question: {sorted_time * 1e3:7.1f}ms")
@@ -0,0 +1,71 @@
+import gc
+import random
+import sys
+import tracemalloc
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+NUM_USERS = 20_000
+NUM_QUESTIONS = 50_000
+NUM_ANSWERS = 50_000
+NUM_COMMENTS = 25_000
+NUM_VOTES = 1_000_000
+SEED = 13
+
+
+def build_system(compact: bool, num_votes: int) -> tuple[StackOverflowSystem, int, int]:
+    # same seed for both modes, so both systems see identical operations;
+    # returns the memory taken by the posts (including their index entries) and by the votes
+    rng = random.Random(SEED)
+    # applied events are dropped, so the numbers cover the posts and votes themselves, not the event log
+    system = StackOverflowSystem(compact=compact, max_retained_events=0)
+    users = [user.id for user in system.import_users([(f"user{i}", f"user{i}@example.com") for i in range(NUM_USERS)])]
+    start, _ = tracemalloc.get_traced_memory()
+    questions = [system.add_question(rng.choice(users), f"q{i}", "body", {"tag"}).id for i in range(NUM_QUESTIONS)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), "answer").id for _ in range(NUM_ANSWERS)]
+    posts = questions + answers
+    for _ in range(NUM_COMMENTS):
+        system.add_comment(rng.choice(users), rng.choice(posts), "comment")
+    middle, _ = tracemalloc.get_traced_memory()
+    # a few hot posts collect most of the votes
+    for _ in range(num_votes):
+        post_id = posts[min(int(rng.paretovariate(1.2)) - 1, len(posts) - 1)] if rng.random() < 0.3 else rng.choice(posts)
+        if rng.random() < 0.05:
+            system.retract_vote(rng.choice(users), post_id)
+        else:
+            system.vote(rng.choice(users), post_id, VoteType.UPVOTE if rng.random() < 0.8 else VoteType.DOWNVOTE)
+    end, _ = tracemalloc.get_traced_memory()
+    return system, middle - start, end - middle
+
+
+def measure(compact: bool, num_votes: int) -> tuple[StackOverflowSystem, int, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        return build_system(compact, num_votes)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    num_votes = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_VOTES
+    num_posts = NUM_QUESTIONS + NUM_ANSWERS
+    print(f"Memory for {num_posts:,} posts and {NUM_COMMENTS:,} comments from {NUM_USERS:,} users, then {num_votes:,} votes")
+    results = {}
+    reputations = {}
+    for name, compact in (("object model", False), ("compact model", True)):
+        system, posts, votes = measure(compact, num_votes)
+        assert system.check_consistency() == []
+        live = sum(len(post.votes) for post in list(system.questions.values()) + list(system.answers.values()))
+        reputations[name] = sorted(user.reputation_score for user in system.users.values())
+        results[name] = (posts, votes)
+        print(f"- {name}: posts {posts / 1024 / 1024:.1f} MiB ({posts / num_posts:.0f} bytes/post incl. indexes), "
+              f"votes {votes / 1024 / 1024:.1f} MiB ({votes / live:.1f} bytes/vote)")
+        del system
+    assert reputations["object model"] == reputations["compact model"]
+    (object_posts, object_votes), (compact_posts, compact_votes) = results["object model"], results["compact model"]
+    print(f"- ratio: posts {object_posts / compact_posts:.1f}x, votes {object_votes / compact_votes:.1f}x")
+
+if __name__ == "__main__": 
+    main()
@@ -0,0 +1,298 @@
+import threading
+from abc import ABC, abstractmethod
+
+from event_log import Event, EventLog, EventType
+from search_index import SearchIndex
+from tag_index import TagIndex
+from feed import FeedIndex
+from thread_index import ThreadIndex
+
+
+class IProjection(ABC):
+    # A read model derived from the event log. offset is the number of log events applied so far;
+    # reset() empties the model so the runner can replay the log into it.
+    name = ""
+    # event types apply() reacts to, others are skipped without calling it when applied one at a time
+    handles: frozenset[EventType] = frozenset(EventType)
+
+    def __init__(self, system):
+        self.system = system
+        self.offset = 0
+
+    @abstractmethod
+    def apply(self, events: list[Event]):
+        pass
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+
+class ReputationProjection(IProjection):
+    name = "reputation"
+    handles = frozenset({EventType.VOTE, EventType.RESTORED})
+
+    def apply(self, events: list[Event]):
+        # one update per author per batch, however many of their posts were voted on
+        deltas = {}
+        for event in events:
+            if event.type is EventType.VOTE:
+                author_id = event.post.author_id
+                deltas[author_id] = deltas.get(author_id, 0) + event.delta
+            elif event.type is EventType.RESTORED:
+                for author_id, delta in event.restored[3].items():
+                    deltas[author_id] = deltas.get(author_id, 0) + delta
+        users = self.system.users
+        for user_id, delta in deltas.items():
+            if delta:
+                user = users[user_id]
+                user.update_rep_score(user.reputation_score + delta)
+
+    def reset(self):
+        for user in self.system.users.values():
+            user.update_rep_score(0)
+
+
+class SearchIndexProjection(IProjection):
+    name = "search"
+    handles = frozenset({EventType.QUESTION_ADDED, EventType.QUESTION_UPDATED, EventType.ANSWER_ADDED,
+                         EventType.ANSWER_UPDATED, EventType.RESTORED})
+
+    def apply(self, events: list[Event]):
+        index = self.system.search_index
+        cache = self.system.search_cache
+        # question_id -> its document's terms before this batch
+        touched: dict = {}
+        for event in events:
+            if event.type in (EventType.QUESTION_ADDED, EventType.QUESTION_UPDATED):
+                question = event.post
+                if question.id not in touched:
+                    touched[question.id] = index.terms(question.id)
+                index.add_question(question)
+            elif event.type in (EventType.ANSWER_ADDED, EventType.ANSWER_UPDATED):
+                answer = event.post
+                if answer.question_id not in touched:
+                    touched[answer.question_id] = index.terms(answer.question_id)
+                index.add_answer(answer)
+            elif event.type is EventType.RESTORED:
+                questions, answers, _, _, index_text = event.restored
+                for question in questions if index_text else ():
+                    index.add_question(question)
+                for answer in answers if index_text else ():
+                    index.add_answer(answer)
+                cache.clear()
+        if touched:
+            # any edit changes the document's length and so its BM25 score for every term it has
+            keys = set()
+            for question_id, old_terms in touched.items():
+                keys.update(("term", term) for term in old_terms | index.terms(question_id))
+            cache.invalidate(keys)
+            cache.corpus_changed(len(index), index.total_length)
+
+    def reset(self):
+        self.system.search_index = SearchIndex()
+        self.system.search_cache.clear()
+
+
+class TagProjection(IProjection):
+    name = "tags"
+    handles = frozenset({EventType.QUESTION_ADDED, EventType.QUESTION_UPDATED, EventType.RESTORED})
+
+    def apply(self, events: list[Event]):
+        index = self.system.tag_index
+        tags = set()
+        for event in events:
+            if event.type is EventType.QUESTION_ADDED:
+                index.add_question(event.post)
+                tags.update(event.post.tags)
+            elif event.type is EventType.QUESTION_UPDATED and event.old_tags is not None:
+                tags.update(index.tags(event.post.id))
+                index.update_question(event.post)
+                tags.update(event.post.tags)
+            elif event.type is EventType.RESTORED:
+                for question in event.restored[0]:
+                    index.add_question(question)
+                self.system.search_cache.clear()
+        if tags:
+            self.system.search_cache.invalidate({("tag", tag) for tag in tags})
+
+    def reset(self):
+        self.system.tag_index = TagIndex()
+        self.system.search_cache.clear()
+
+
+class FeedProjection(IProjection):
+    name = "feeds"
+    handles = frozenset({EventType.QUESTION_ADDED, EventType.QUESTION_UPDATED, EventType.ANSWER_ADDED,
+                         EventType.VOTE, EventType.RESTORED})
+
+    def apply(self, events: list[Event]):
+        feeds = self.system.feeds
+        questions = self.system.questions
+        # boards read the question's current score, so each voted question is re-ranked once per batch
+        voted = {}
+        for event in events:
+            if event.type is EventType.QUESTION_ADDED:
+                feeds.add_question(event.post)
+            elif event.type is EventType.QUESTION_UPDATED and event.old_tags is not None:
+                feeds.update_tags(event.post, event.old_tags)
+            elif event.type is EventType.ANSWER_ADDED:
+                feeds.update_answers(questions[event.post.question_id])
+            elif event.type is EventType.VOTE and event.post.id in questions:
+                voted[event.post.id] = event.post
+            elif event.type is EventType.RESTORED:
+                for question in event.restored[0]:
+                    feeds.add_question(question)
+        for question in voted.values():
+            feeds.update_score(question)
+
+    def reset(self):
+        self.system.feeds = FeedIndex(self.system.feeds.capacity)
+
+
+class ThreadProjection(IProjection):
+    name = "threads"
+    handles = frozenset({EventType.ANSWER_ADDED, EventType.COMMENT_ADDED, EventType.VOTE, EventType.RESTORED})
+
+    def apply(self, events: list[Event]):
+        threads = self.system.threads
+        answers = self.system.answers
+        voted = {}
+        for event in events:
+            if event.type is EventType.ANSWER_ADDED:
+                threads.add_answer(event.post)
+            elif event.type is EventType.COMMENT_ADDED:
+                threads.add_comment(event.post)
+            elif event.type is EventType.VOTE and event.post.id in answers:
+                voted[event.post.id] = event.post
+            elif event.type is EventType.RESTORED:
+                _, restored_answers, restored_comments, _, _ = event.restored
+                for answer in restored_answers:
+                    threads.add_answer(answer)
+                for comment in restored_comments:
+                    threads.add_comment(comment)
+        # answers are re-sorted by their current score, once per batch
+        for answer in voted.values():
+            threads.update_score(answer)
+
+    def reset(self):
+        self.system.threads = ThreadIndex()
+
+
+class ProjectionRunner:
+    # Feeds the log to the projections in batches, either inline after every write (run_pending)
+    # or from a background thread (start). Batches are applied under lock, which readers of the
+    # projected views hold too. wait_for gives callers read-your-writes on demand.
+
+    def __init__(self, log: EventLog, projections: list[IProjection], lock: threading.RLock, batch_size: int = 1024):
+        self.log = log
+        self.projections = {projection.name: projection for projection in projections}
+        self.__projections = projections
+        self.lock = lock
+        self.batch_size = batch_size
+        self.error: BaseException | None = None
+        self.__thread: threading.Thread | None = None
+        self.__stopping = False
+
+    @property
+    def offset(self) -> int:
+        # every event before this offset is reflected in every projection
+        return min(projection.offset for projection in self.projections.values())
+
+    def publish(self, event: Event) -> int:
+        # appends the event and, without a background thread, applies it before returning
+        offset = self.log.append(event)
+        if self.__thread is not None:
+            with self.log.changed:
+                self.log.changed.notify_all()
+            return offset
+        batch = [event]
+        lagging = False
+        with self.lock:
+            for projection in self.__projections:
+                if projection.offset != offset - 1:
+                    lagging = True
+                    continue
+                if event.type in projection.handles:
+                    projection.apply(batch)
+                projection.offset = offset
+        if lagging:
+            self.run_pending()
+        elif self.log.max_retained is not None:
+            self.log.release(offset)
+        return offset
+
+    def publish_many(self, events: list[Event]) -> int:
+        # appends the events and applies them as batches, so projections coalesce their work
+        for event in events:
+            self.log.append(event)
+        if self.__thread is not None:
+            with self.log.changed:
+                self.log.changed.notify_all()
+        else:
+            self.run_pending()
+        return self.log.head
+
+    def run_pending(self):
+        for projection in self.projections.values():
+            self.__catch_up(projection)
+        self.log.release(self.offset)
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, name="projections", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        if self.__thread is not None:
+            with self.log.changed:
+                self.__stopping = True
+                self.log.changed.notify_all()
+            self.__thread.join()
+            self.__thread = None
+            self.__stopping = False
+        # whatever was appended meanwhile is applied inline from here on
+        self.run_pending()
+
+    def wait_for(self, offset: int | None = None, timeout: float | None = None) -> bool:
+        # blocks until every projection has applied the events before offset (default: all appended so far)
+        offset = self.log.head if offset is None else offset
+        with self.log.changed:
+            done = self.log.changed.wait_for(lambda: self.error is not None or self.offset >= offset, timeout)
+        if self.error is not None:
+            raise RuntimeError("A projection failed, its view is no longer updated.") from self.error
+        return done
+
+    def replay(self, name: str):
+        # rebuild one projection from the start of the log
+        projection = self.projections[name]
+        if self.log.base:
+            raise ValueError(f"The log no longer holds events before offset {self.log.base}, {name} cannot be replayed.")
+        with self.lock:
+            projection.reset()
+            projection.offset = 0
+            self.__catch_up(projection)
+
+    def __catch_up(self, projection: IProjection):
+        log = self.log
+        while projection.offset < log.head:
+            with self.lock:
+                events = log.read(projection.offset, self.batch_size)
+                projection.apply(events)
+                projection.offset += len(events)
+
+    def __run(self):
+        changed = self.log.changed
+        while True:
+            with changed:
+                changed.wait_for(lambda: self.__stopping or self.offset < self.log.head)
+                if self.__stopping:
+                    return
+            try:
+                self.run_pending()
+            except BaseException as error:
+                with changed:
+                    self.error = error
+                    changed.notify_all()
+                return
+            with changed:
+                changed.notify_all()
@@ -0,0 +1,73 @@
+import itertools
+import random
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from search_strategy import UserSearchStrategy, TagSearchStrategy, KeywordSearchStrategy, PredicateSearchStrategy
+from vote import VoteType
+
+NUM_QUESTIONS = 50_000
+NUM_USERS = 500
+NUM_TAGS = 1_000
+NUM_VOTES = 100_000
+SEED = 3
+
+TAGS = [f"tag{rank}" for rank in range(NUM_TAGS)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_TAGS)))
+
+def build_system(rng: random.Random):
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(NUM_USERS)]
+    for i in range(NUM_QUESTIONS):
+        tags = set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3))
+        words = " ".join(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=10))
+        system.add_question(rng.choice(users), f"question {i}", words, tags)
+    questions = list(system.questions)
+    for _ in range(NUM_VOTES):
+        system.vote(rng.choice(users), rng.choice(questions), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+    return system, users
+
+def timed(label: str, run, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {elapsed * 1e3:8.3f}ms")
+    return elapsed
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    system, users = build_system(rng)
+    all_questions = list(system.questions.values())
+    popular = PredicateSearchStrategy(lambda question: question.vote_score >= 1, "vote_score >= 1")
+
+    queries = [
+        TagSearchStrategy(["tag0"]) & UserSearchStrategy(users[:3]),
+        (TagSearchStrategy(["tag1"]) | TagSearchStrategy(["tag2"])) & ~TagSearchStrategy(["tag0"]) & popular,
+        UserSearchStrategy(users[:20]) & ~popular,
+        ~TagSearchStrategy(["tag0"]) & popular,
+        TagSearchStrategy(["tag5", "tag9"], match_all=True) | UserSearchStrategy(users[:1]),
+    ]
+    # every plan must return exactly what scanning with the same strategies returns
+    for query in queries:
+        expected = query.filter(all_questions, system)
+        assert {q.id for q in system.query(query)} == {q.id for q in expected}
+        top = list(system.query(query, sort="score", limit=10))
+        assert [q.vote_score for q in top] == sorted((q.vote_score for q in expected), reverse=True)[:10]
+        newest = list(system.query(query, sort="recency", offset=5, limit=10))
+        assert [q.created_at for q in newest] == sorted((q.created_at for q in expected), reverse=True)[5:15]
+
+    keyword = KeywordSearchStrategy(["tag3"]) & TagSearchStrategy(["tag0"]) & popular
+    print(system.explain(keyword, sort="score", limit=10))
+    print()
+    broad = ~TagSearchStrategy(["tag0"]) & popular
+    print(system.explain(broad, sort="recency", limit=20))
+    print()
+
+    selective = TagSearchStrategy(["tag0"]) & UserSearchStrategy(users[:3]) & popular
+    timed("selective AND, scan every question", lambda: selective.filter(all_questions, system))
+    timed("selective AND, planned", lambda: list(system.query(selective)))
+    timed("broad query page 1, scan", lambda: broad.filter(all_questions, system)[:20])
+    timed("broad query page 1, streamed", lambda: list(system.query(broad, limit=20)))
+    timed("broad query newest 20, streamed", lambda: list(system.query(broad, sort="recency", limit=20)))
+    timed("broad query top 20 by score, heap", lambda: list(system.query(broad, sort="score", limit=20)), 5)
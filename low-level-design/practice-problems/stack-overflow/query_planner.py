@@ -0,0 +1,92 @@
+import heapq
+from itertools import islice
+from typing import Iterator
+
+from question import Question
+
+SORT_KEYS = {
+    "score": lambda question: question.vote_score,
+    "recency": lambda question: question.created_at,
+}
+
+
+class QueryPlan: 
+    def __init__(self, driver, filters: list, estimate: int): 
+        # driver produces candidate ids from an index (None means a full scan), filters check each candidate
+        self.driver = driver
+        self.filters = filters
+        self.estimate = estimate
+
+
+class QueryPlanner: 
+    # Plans a composed search strategy: the most selective indexed conjunct drives the scan,
+    # the rest are checked per candidate, cheapest first. Results stream as a generator.
+
+    def __init__(self, system): 
+        self.system = system
+
+    def plan(self, strategy) -> QueryPlan: 
+        parts = strategy.conjuncts()
+        indexed = [(part.estimate(self.system), position, part) for position, part in enumerate(parts) if part.indexed]
+        if not indexed: 
+            return QueryPlan(None, sorted(parts, key=lambda part: part.cost), len(self.system.questions))
+        estimate, _, driver = min(indexed, key=lambda item: item[:2])
+        filters = sorted((part for part in parts if part is not driver), key=lambda part: part.cost)
+        return QueryPlan(driver, filters, estimate)
+
+    def stream(self, strategy, newest_first: bool = False) -> Iterator[Question]: 
+        return self.__stream(self.plan(strategy), newest_first, resumable=True)
+
+    def run(self, strategy, sort: str | None = None, offset: int = 0, limit: int | None = None) -> Iterator[Question]: 
+        if sort is not None and sort not in SORT_KEYS: 
+            raise ValueError(f"Unknown sort {sort}, expected one of {list(SORT_KEYS)}.")
+        plan = self.plan(strategy)
+        end = None if limit is None else offset + limit
+        # without a limit the caller may pause between results while writes land
+        resumable = end is None
+        if sort is None: 
+            yield from islice(self.__stream(plan, resumable=resumable), offset, end)
+        elif self.__streams_sorted(plan, sort): 
+            yield from islice(self.__stream(plan, newest_first=True, resumable=resumable), offset, end)
+        elif end is None: 
+            yield from sorted(self.__stream(plan), key=SORT_KEYS[sort], reverse=True)[offset:]
+        else: 
+            # only the first offset + limit results are ever held
+            yield from heapq.nlargest(end, self.__stream(plan), key=SORT_KEYS[sort])[offset:]
+
+    def explain(self, strategy, sort: str | None = None, offset: int = 0, limit: int | None = None) -> str: 
+        plan = self.plan(strategy)
+        lines = [f"query: {strategy.describe()}"]
+        if plan.driver is None: 
+            lines.append(f"driver: full scan of {len(self.system.questions)} question(s)")
+        else: 
+            lines.append(f"driver: {plan.driver.describe()} (~{plan.estimate} candidate(s))")
+        for part in plan.filters: 
+            lines.append(f"filter: {part.describe()} (cost {part.cost})")
+        if sort is None: 
+            lines.append("order: index order, streamed")
+        elif self.__streams_sorted(plan, sort): 
+            lines.append(f"order: {sort}, streamed newest first")
+        elif limit is None: 
+            lines.append(f"order: {sort}, full sort")
+        else: 
+            lines.append(f"order: {sort}, top-{offset + limit} heap")
+        lines.append(f"page: offset {offset}, limit {limit}")
+        return "\n".join(lines)
+
+    def __streams_sorted(self, plan: QueryPlan, sort: str) -> bool: 
+        # the scan and some indexes can already produce newest-first order
+        return sort == "recency" and (plan.driver is None or plan.driver.streams_newest_first)
+
+    def __stream(self, plan: QueryPlan, newest_first: bool = False, resumable: bool = False) -> Iterator[Question]: 
+        questions = self.system.questions
+        if plan.driver is None: 
+            # a resumable stream scans a copy, more questions may be added before it resumes
+            scanned = list(questions.values()) if resumable else questions.values()
+            source = reversed(scanned) if newest_first else iter(scanned)
+        else: 
+            source = (questions[question_id] for question_id in plan.driver.candidates(self.system, newest_first))
+        filters = plan.filters
+        for question in source: 
+            if all(part.matches(question, self.system) for part in filters): 
+                yield question
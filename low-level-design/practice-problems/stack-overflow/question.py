@@ -1,12 +1,14 @@
+import datetime
 import uuid
 
 from answer import Answer
 from comment import Comment
-from vote import Vote, VoteType
+from vote import Vote, VoteType, VOTE_WEIGHTS
 
 class Question: 
-    def __init__(self, author_id: uuid.UUID, title: str, content: str, tags: set[str]):
-        self.id: uuid.UUID = uuid.uuid4()
+    def __init__(self, author_id: uuid.UUID, title: str, content: str, tags: set[str],
+                 id: uuid.UUID | None = None, created_at: datetime.datetime | None = None):
+        self.id: uuid.UUID = id or uuid.uuid4()
         self.author_id: uuid.UUID = author_id
         self.title: str = title
         self.content: str = content
@@ -14,16 +16,16 @@ class Question:
         self.answers: set[uuid.UUID] = set()
         self.comments: set[uuid.UUID] = set()
         self.votes: dict[uuid.UUID, Vote] = {}
+        self.created_at: datetime.datetime = created_at or datetime.datetime.now()
+        self.__vote_score = 0
 
     @property
-    def vote_score(self): 
-        result = 0
-        for vote in self.votes.values():
-            if vote.type == VoteType.UPVOTE:
-                result += 1
-            elif vote.type == VoteType.DOWNVOTE: 
-                result -= 1
-        return result
+    def vote_score(self) -> int: 
+        return self.__vote_score
+
+    def recompute_vote_score(self) -> int: 
+        # full recount from the individual votes, used to check the running score
+        return sum(VOTE_WEIGHTS[vote.type] for vote in self.votes.values())
     
     def update_title(self, title: str): 
         self.title = title 
@@ -40,11 +42,25 @@ class Question:
     def add_comment(self, comment: Comment): 
         self.comments.add(comment.id)
 
-    def vote(self, user_id: uuid.UUID, type: VoteType): 
+    def vote(self, user_id: uuid.UUID, type: VoteType) -> int: 
+        # returns the change in vote score
+        delta = VOTE_WEIGHTS[type]
         if user_id in self.votes: 
-            self.votes[user_id].type = type
+            vote = self.votes[user_id]
+            delta -= VOTE_WEIGHTS[vote.type]
+            vote.type = type
         else: 
             self.votes[user_id] = Vote(user_id, type)
+        self.__vote_score += delta
+        return delta
+
+    def retract_vote(self, user_id: uuid.UUID) -> int: 
+        vote = self.votes.pop(user_id, None)
+        if vote is None: 
+            return 0
+        delta = -VOTE_WEIGHTS[vote.type]
+        self.__vote_score += delta
+        return delta
     
 
     
\ No newline at end of file
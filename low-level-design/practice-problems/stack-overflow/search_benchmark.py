@@ -0,0 +1,82 @@
+import itertools
+import random
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from search_strategy import KeywordSearchStrategy
+from search_index import tokenize
+
+NUM_QUESTIONS = 20_000
+NUM_ANSWERS = 20_000
+VOCABULARY = 5_000
+NUM_QUERIES = 200
+SEED = 7
+
+def zipf_words(rng: random.Random, count: int) -> list[str]:
+    # weights 1/rank, so a few words are very common and most are rare
+    return rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=count)
+
+WORDS = [f"w{rank}" for rank in range(VOCABULARY)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+
+def build_system(rng: random.Random) -> StackOverflowSystem:
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com") for i in range(100)]
+    questions = []
+    for _ in range(NUM_QUESTIONS):
+        author = rng.choice(users)
+        title = " ".join(zipf_words(rng, 8))
+        content = " ".join(zipf_words(rng, 40))
+        questions.append(system.add_question(author.id, title, content, []))
+    for _ in range(NUM_ANSWERS):
+        question = rng.choice(questions)
+        system.add_answer(rng.choice(users).id, question.id, " ".join(zipf_words(rng, 30)))
+    return system
+
+def exhaustive_top_k(system: StackOverflowSystem, terms: list[str], k: int) -> list[float]:
+    # score every matching question term by term, used to check the early-terminating top-k
+    index = system.search_index
+    scores = {}
+    for term in terms:
+        for question_id, score in index.search(term, k=None):
+            scores[question_id] = scores.get(question_id, 0.0) + score
+    return sorted(scores.values(), reverse=True)[:k]
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    start = time.perf_counter()
+    system = build_system(rng)
+    print(f"Indexed {NUM_QUESTIONS} questions and {NUM_ANSWERS} answers in {time.perf_counter() - start:.2f}s")
+
+    # queries mix one common word with rarer ones
+    queries = [[rng.choice(WORDS[:20])] + rng.sample(WORDS[20:1000], 2) for _ in range(NUM_QUERIES)]
+
+    # the index must return exactly the questions a token scan finds
+    for terms in queries[:20]:
+        expected = set()
+        for question in system.questions.values():
+            tokens = set(tokenize(f"{question.title} {question.content}"))
+            for answer_id in question.answers:
+                tokens.update(tokenize(system.answers[answer_id].content))
+            if tokens.intersection(terms):
+                expected.add(question.id)
+        assert system.search_index.matching(terms) == expected
+
+    # the early-terminating top-k must agree with exhaustive scoring
+    for terms in queries[:20]:
+        top = [score for _, score in system.search_index.search(" ".join(terms), k=10)]
+        assert [round(s, 9) for s in top] == [round(s, 9) for s in exhaustive_top_k(system, terms, 10)]
+
+    questions = list(system.questions.values())
+    start = time.perf_counter()
+    for terms in queries:
+        KeywordSearchStrategy(terms).filter(questions, system)
+    scan = (time.perf_counter() - start) / NUM_QUERIES
+
+    start = time.perf_counter()
+    for terms in queries:
+        system.search_questions([KeywordSearchStrategy(terms, limit=10)])
+    indexed = (time.perf_counter() - start) / NUM_QUERIES
+
+    print(f"Token scan:     {scan * 1e3:.2f}ms per query")
+    print(f"BM25 top-10:    {indexed * 1e3:.2f}ms per query ({scan / indexed:.1f}x)")
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+# generation key bumped whenever BM25's corpus statistics (document count, average length) move
+CORPUS = ("corpus",)
+# generation key bumped by every new question, for results that are not limited to some keys
+QUESTIONS = ("questions",)
+# generation key bumped by every vote on a question; score-sorted keyword queries depend on it
+ANY_SCORE = ("score",)
+
+
+def score_keys(question) -> set[tuple]:
+    # what a vote on the question can reorder: score-sorted results over its tags or author
+    keys = {("score", ("tag", tag)) for tag in question.tags}
+    keys.add(("score", ("author", question.author_id)))
+    keys.add(ANY_SCORE)
+    return keys
+
+
+def sorted_dependencies(dependencies: set[tuple]) -> set[tuple]:
+    # dependencies of a score-sorted result: tag and author results get per-key score generations,
+    # anything else falls back to the generation every question vote bumps
+    result = set(dependencies)
+    for key in dependencies:
+        result.add(("score", key) if key[0] in ("tag", "author") else ANY_SCORE)
+    return result
+
+
+class SearchCache:
+    # Read-through LRU + TTL cache for search results. Each entry remembers the generation of
+    # every key it depends on (tag, term, author, ...); writes bump only the generations of the
+    # keys they touch, and an entry whose generations moved is dropped on its next read.
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, rank_tolerance: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # how far the corpus statistics may drift before ranked keyword results are dropped, 0 is exact
+        self.rank_tolerance = rank_tolerance
+        self.clock = clock
+        self.generations: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.__entries: OrderedDict[Hashable, tuple[object, float, tuple]] = OrderedDict()
+        self.__corpus: tuple[int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get_or_compute(self, key: Hashable, dependencies: set[Hashable], compute: Callable[[], object]):
+        if key is None:
+            return compute()
+        entry = self.__entries.get(key)
+        if entry is not None:
+            value, expires, generations = entry
+            if expires < self.clock():
+                self.expirations += 1
+                del self.__entries[key]
+            elif any(self.generations.get(dependency, 0) != generation for dependency, generation in generations):
+                self.invalidations += 1
+                del self.__entries[key]
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                return value
+        self.misses += 1
+        # generations are read before computing, so a write that lands meanwhile leaves the entry stale, not wrong
+        generations = tuple((dependency, self.generations.get(dependency, 0)) for dependency in dependencies)
+        value = compute()
+        self.__entries[key] = (value, self.clock() + self.ttl, generations)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def invalidate(self, keys: set[Hashable]):
+        generations = self.generations
+        for key in keys:
+            generations[key] = generations.get(key, 0) + 1
+
+    def corpus_changed(self, documents: int, total_length: int):
+        # bump CORPUS once the document count or average length moved more than rank_tolerance
+        if self.__corpus is not None and self.rank_tolerance:
+            last_documents, last_length = self.__corpus
+            average = total_length / documents if documents else 0.0
+            last_average = last_length / last_documents if last_documents else 0.0
+            if (abs(documents - last_documents) <= self.rank_tolerance * last_documents
+                    and abs(average - last_average) <= self.rank_tolerance * last_average):
+                return
+        self.__corpus = (documents, total_length)
+        self.invalidate({CORPUS})
+
+    def clear(self):
+        self.__entries.clear()
+        self.generations.clear()
+        self.__corpus = None
+
+    def metrics(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.__entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,175 @@
+import heapq
+import math
+import re
+import uuid
+from collections import Counter
+
+from question import Question
+from answer import Answer
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+def question_text(question: Question) -> str:
+    # the question's own part of its document; each answer adds its content
+    return f"{question.title} {question.content}"
+
+
+class SearchIndex: 
+    # Inverted index over each question's title, content and answers, one document per question.
+    # Postings map term -> {question_id: term frequency} and are updated incrementally.
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self): 
+        self.postings: dict[str, dict[uuid.UUID, int]] = {}
+        self.doc_lengths: dict[uuid.UUID, int] = {}
+        self.total_length = 0
+        # question_id -> source (the question itself or one of its answers) -> term counts
+        self.__sources: dict[uuid.UUID, dict[uuid.UUID, Counter]] = {}
+
+    def __len__(self) -> int: 
+        return len(self.doc_lengths)
+
+    def add_question(self, question: Question): 
+        self.doc_lengths.setdefault(question.id, 0)
+        self.__sources.setdefault(question.id, {})
+        self.__set_source(question.id, question.id, question_text(question))
+
+    def update_question(self, question: Question): 
+        self.__set_source(question.id, question.id, question_text(question))
+
+    def add_answer(self, answer: Answer): 
+        self.__set_source(answer.question_id, answer.id, answer.content)
+
+    def update_answer(self, answer: Answer): 
+        self.__set_source(answer.question_id, answer.id, answer.content)
+
+    def terms(self, question_id: uuid.UUID) -> set[str]: 
+        # distinct terms of the question's document as currently indexed
+        return set().union(*self.__sources.get(question_id, {}).values())
+
+    def matching(self, terms: list[str], match_all: bool = False) -> set[uuid.UUID]: 
+        postings = [self.postings.get(term, {}) for term in set(terms)]
+        if not postings: 
+            return set()
+        if match_all: 
+            # intersect starting from the shortest posting list
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]: 
+                result.intersection_update(posting)
+                if not result: 
+                    break
+            return result
+        result = set()
+        for posting in postings: 
+            result.update(posting)
+        return result
+
+    def estimate(self, terms: list[str], match_all: bool = False) -> int: 
+        # upper bound on len(matching(terms)) from the posting list sizes alone
+        sizes = [len(self.postings.get(term, ())) for term in set(terms)]
+        if not sizes: 
+            return 0
+        return min(sizes) if match_all else sum(sizes)
+
+    def contains(self, question_id: uuid.UUID, terms: list[str], match_all: bool = False) -> bool: 
+        hits = (question_id in self.postings.get(term, ()) for term in terms)
+        return all(hits) if match_all else any(hits)
+
+    def statistics(self, text: str) -> tuple[int, int, dict[str, int]]: 
+        # (documents, total length, term -> document frequency) for the query's terms; shards of a
+        # partitioned corpus add theirs up so every shard scores with the global values
+        terms = dict.fromkeys(tokenize(text))
+        return len(self.doc_lengths), self.total_length, {term: len(self.postings.get(term, ())) for term in terms}
+
+    def search(self, text: str, k: int | None = 10, match_all: bool = False,
+               statistics: tuple[int, int, dict[str, int]] | None = None) -> list[tuple[uuid.UUID, float]]: 
+        # best k matches first, or every match when k is None
+        terms = list(dict.fromkeys(tokenize(text)))
+        statistics = statistics or self.statistics(text)
+        if match_all: 
+            candidates = self.matching(terms, match_all=True)
+            scores = {doc: sum(self.__term_score(term, doc, statistics) for term in terms) for doc in candidates}
+            return self.__top(scores, k)
+        return self.__top_k_union(terms, k, statistics)
+
+    def __top_k_union(self, terms: list[str], k: int | None, statistics: tuple) -> list[tuple[uuid.UUID, float]]: 
+        # MaxScore style early termination: terms are scored in order of their upper bound, and
+        # once the remaining terms cannot lift an unseen document past the current k-th score,
+        # they are only looked up for the documents that are already candidates
+        terms = [term for term in terms if term in self.postings]
+        bounds = {term: self.__idf(term, statistics) * (self.k1 + 1) for term in terms}
+        terms.sort(key=bounds.get, reverse=True)
+        remaining = sum(bounds.values())
+        scores: dict[uuid.UUID, float] = {}
+        lengths = self.doc_lengths
+        average = self.__average_length(statistics)
+        for term in terms: 
+            essential = k is None or len(scores) < k or heapq.nlargest(k, scores.values())[-1] < remaining
+            remaining -= bounds[term]
+            weight = bounds[term]
+            posting = self.postings[term]
+            if essential: 
+                hits = posting.items()
+            elif len(posting) <= len(scores): 
+                hits = [(doc, tf) for doc, tf in posting.items() if doc in scores]
+            else: 
+                hits = [(doc, posting[doc]) for doc in scores if doc in posting]
+            for doc, tf in hits: 
+                norm = self.k1 * (1 - self.b + self.b * lengths[doc] / average)
+                scores[doc] = scores.get(doc, 0.0) + weight * tf / (tf + norm)
+        return self.__top(scores, k)
+
+    @staticmethod
+    def __top(scores: dict[uuid.UUID, float], k: int | None) -> list[tuple[uuid.UUID, float]]: 
+        if k is None: 
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def __term_score(self, term: str, doc: uuid.UUID, statistics: tuple) -> float: 
+        tf = self.postings.get(term, {}).get(doc, 0)
+        return self.__bm25(term, tf, doc, statistics) if tf else 0.0
+
+    def __bm25(self, term: str, tf: int, doc: uuid.UUID, statistics: tuple) -> float: 
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / self.__average_length(statistics))
+        return self.__idf(term, statistics) * tf * (self.k1 + 1) / (tf + norm)
+
+    def __average_length(self, statistics: tuple) -> float: 
+        documents, total_length, _ = statistics
+        if not total_length: 
+            return 1.0
+        return total_length / documents
+
+    def __idf(self, term: str, statistics: tuple) -> float: 
+        documents, _, frequencies = statistics
+        df = frequencies.get(term, 0)
+        return math.log(1 + (documents - df + 0.5) / (df + 0.5))
+
+    def __set_source(self, question_id: uuid.UUID, source_id: uuid.UUID, text: str): 
+        sources = self.__sources[question_id]
+        old = sources.get(source_id, Counter())
+        new = Counter(tokenize(text))
+        for term, tf in (old - new).items(): 
+            self.__add_posting(question_id, term, -tf)
+        for term, tf in (new - old).items(): 
+            self.__add_posting(question_id, term, tf)
+        sources[source_id] = new
+        delta = sum(new.values()) - sum(old.values())
+        self.doc_lengths[question_id] += delta
+        self.total_length += delta
+
+    def __add_posting(self, doc: uuid.UUID, term: str, tf: int): 
+        posting = self.postings.setdefault(term, {})
+        count = posting.get(doc, 0) + tf
+        if count > 0: 
+            posting[doc] = count
+        else: 
+            posting.pop(doc, None)
+            if not posting: 
+                del self.postings[term]
@@ -1,48 +1,346 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Iterator
 import uuid
 
 from question import Question
+from search_index import question_text, tokenize
+from query_planner import QueryPlanner
+from search_cache import CORPUS, QUESTIONS
 
 class ISearchStrategy(ABC):
-    def filter(self, questions: list[Question]) -> list[Question]:
+    # indexed strategies can produce their own candidate question ids, so the planner can
+    # start from the most selective one instead of scanning every question
+    indexed = False
+    # relative cost of checking a single question, used to order the filters
+    cost = 10
+    # whether candidates(newest_first=True) really yields the newest questions first
+    streams_newest_first = False
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        # scan without indexes; strategies that look past the question itself, like keywords
+        # reading answer text, need the system
         pass
 
+    def search(self, system) -> list[Question]:
+        # strategies backed by one of the system's indexes override this to skip the scan
+        return self.filter(list(system.questions.values()), system)
+
+    def matches(self, question: Question, system) -> bool:
+        return bool(self.filter([question], system))
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        raise NotImplementedError(f"{self.describe()} has no index to produce candidates from.")
+
+    def estimate(self, system) -> int:
+        return len(system.questions)
+
+    def conjuncts(self) -> list["ISearchStrategy"]:
+        return [self]
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+    def signature(self) -> tuple | None:
+        # normalized cache key, None for strategies whose results cannot be cached
+        return None
+
+    def dependencies(self) -> set[tuple]:
+        # keys whose changes can alter this strategy's results, see search_cache
+        return set()
+
+    def search_dependencies(self) -> set[tuple]:
+        # dependencies of search(), which may rank results by more than the matching set
+        return self.dependencies()
+
+    def __and__(self, other: "ISearchStrategy") -> "AndSearchStrategy":
+        return AndSearchStrategy([self, other])
+
+    def __or__(self, other: "ISearchStrategy") -> "OrSearchStrategy":
+        return OrSearchStrategy([self, other])
 
-class UserSearchStrategy(ISearchStrategy): 
-    def __init__(self, user_ids: list[uuid.UUID]): 
+    def __invert__(self) -> "NotSearchStrategy":
+        return NotSearchStrategy(self)
+
+
+class UserSearchStrategy(ISearchStrategy):
+    indexed = True
+    cost = 1
+
+    def __init__(self, user_ids: list[uuid.UUID]):
         self.user_ids = user_ids
 
-    def filter(self, questions: list[Question]) -> list[Question]:
-        result = [] 
-        for user_id in self.user_id: 
-            for question in questions: 
-                if question.author_id == user_id: 
-                    result.append(question)
-        return result
-    
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        user_ids = set(self.user_ids)
+        return [question for question in questions if question.author_id in user_ids]
+
+    def search(self, system) -> list[Question]:
+        return [system.questions[question_id] for question_id in self.candidates(system)]
+
+    def matches(self, question: Question, system) -> bool:
+        return question.author_id in self.user_ids
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        for user_id in dict.fromkeys(self.user_ids):
+            # copied, the author may post again before a streamed query resumes
+            for post_id in list(system.posts_by_author.get(user_id, ())):
+                if post_id in system.questions:
+                    yield post_id
+
+    def estimate(self, system) -> int:
+        # counts answers too, which is fine for an estimate
+        return sum(len(system.posts_by_author.get(user_id, ())) for user_id in self.user_ids)
+
+    def describe(self) -> str:
+        return f"author in {len(self.user_ids)} user(s)"
+
+    def signature(self) -> tuple:
+        return ("user", frozenset(self.user_ids))
 
-class KeywordSearchStrategy(ISearchStrategy): 
-    def __init__(self, keywords: list[str]): 
+    def dependencies(self) -> set[tuple]:
+        return {("author", user_id) for user_id in self.user_ids}
+
+
+class KeywordSearchStrategy(ISearchStrategy):
+    indexed = True
+    cost = 1
+
+    def __init__(self, keywords: list[str], limit: int | None = None, match_all: bool = False):
         self.keywords = keywords
+        # keep only the best limit matches in search(), all of them when None
+        self.limit = limit
+        self.match_all = match_all
 
-    def filter(self, questions: list[Question]) -> list[Question]:
-        result = [] 
-        for keyword in self.keywords: 
-            for question in questions: 
-                if keyword in question.title or keyword in question.content: 
-                    result.append(question)
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        # same document as the search index: the question's title and content and its answers
+        if system is None:
+            raise ValueError("Keyword filter needs the system to read answer text.")
+        terms = set(self.__terms())
+        if not terms:
+            return []
+        result = []
+        for question in questions:
+            found = terms.intersection(tokenize(question_text(question)))
+            for answer_id in question.answers:
+                found.update(terms.intersection(tokenize(system.answers[answer_id].content)))
+            if found == terms if self.match_all else found:
+                result.append(question)
         return result
 
+    def search(self, system) -> list[Question]:
+        # BM25 ranked, best match first
+        hits = system.search_index.search(" ".join(self.keywords), k=self.limit, match_all=self.match_all)
+        return [system.questions[question_id] for question_id, _ in hits]
+
+    def matches(self, question: Question, system) -> bool:
+        return system.search_index.contains(question.id, self.__terms(), self.match_all)
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        return iter(system.search_index.matching(self.__terms(), self.match_all))
+
+    def estimate(self, system) -> int:
+        return system.search_index.estimate(self.__terms(), self.match_all)
+
+    def describe(self) -> str:
+        return f"keywords {'all' if self.match_all else 'any'} of {self.keywords}"
+
+    def signature(self) -> tuple:
+        return ("keyword", frozenset(self.__terms()), self.match_all, self.limit)
+
+    def dependencies(self) -> set[tuple]:
+        return {("term", term) for term in self.__terms()}
+
+    def search_dependencies(self) -> set[tuple]:
+        # BM25 scores also move with the document count and average length
+        return self.dependencies() | {CORPUS}
 
-class TagSearchStrategy(ISearchStrategy): 
-    def __init__(self, tags: list[str]): 
+    def __terms(self) -> list[str]:
+        return tokenize(" ".join(self.keywords))
+
+
+class TagSearchStrategy(ISearchStrategy):
+    indexed = True
+    cost = 1
+    streams_newest_first = True
+
+    def __init__(self, tags: list[str], match_all: bool = False, excluded_tags: list[str] = ()):
         self.tags = tags
+        self.match_all = match_all
+        self.excluded_tags = excluded_tags
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        return [question for question in questions if self.__matches_tags(question.tags)]
+
+    def search(self, system) -> list[Question]:
+        return [system.questions[question_id] for question_id in self.candidates(system)]
+
+    def matches(self, question: Question, system) -> bool:
+        return self.__matches_tags(question.tags)
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        if self.match_all:
+            return system.tag_index.iter_query(all_of=self.tags, none_of=self.excluded_tags, newest_first=newest_first)
+        return system.tag_index.iter_query(any_of=self.tags, none_of=self.excluded_tags, newest_first=newest_first)
+
+    def estimate(self, system) -> int:
+        if self.match_all:
+            return system.tag_index.count(all_of=self.tags, none_of=self.excluded_tags)
+        return system.tag_index.count(any_of=self.tags, none_of=self.excluded_tags)
+
+    def describe(self) -> str:
+        description = f"tags {'all' if self.match_all else 'any'} of {self.tags}"
+        if self.excluded_tags:
+            description += f" excluding {self.excluded_tags}"
+        return description
+
+    def signature(self) -> tuple:
+        return ("tag", frozenset(self.tags), self.match_all, frozenset(self.excluded_tags))
 
-    def filter(self, questions: list[Question]) -> list[Question]:
-        result = [] 
-        for tag in self.tags: 
-            for question in questions: 
-                if tag in question.tags: 
-                    result.append(question)
+    def dependencies(self) -> set[tuple]:
+        return {("tag", tag) for tag in list(self.tags) + list(self.excluded_tags)}
+
+    def __matches_tags(self, tags: set[str]) -> bool:
+        matches = [tag in tags for tag in self.tags]
+        if not (all(matches) if self.match_all else any(matches)):
+            return False
+        return not any(tag in tags for tag in self.excluded_tags)
+
+
+class PredicateSearchStrategy(ISearchStrategy):
+    # arbitrary per-question check with no index behind it, e.g. a minimum vote score
+    def __init__(self, predicate: Callable[[Question], bool], name: str = "predicate", cost: int = 100):
+        self.predicate = predicate
+        self.name = name
+        self.cost = cost
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        return [question for question in questions if self.predicate(question)]
+
+    def matches(self, question: Question, system) -> bool:
+        return self.predicate(question)
+
+    def describe(self) -> str:
+        return self.name
+
+
+class AndSearchStrategy(ISearchStrategy):
+    def __init__(self, strategies: list[ISearchStrategy]):
+        self.strategies = strategies
+
+    @property
+    def indexed(self) -> bool:
+        return any(strategy.indexed for strategy in self.conjuncts())
+
+    @property
+    def cost(self) -> int:
+        return sum(strategy.cost for strategy in self.conjuncts())
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        for strategy in self.conjuncts():
+            questions = strategy.filter(questions, system)
+        return questions
+
+    def search(self, system) -> list[Question]:
+        return list(QueryPlanner(system).run(self))
+
+    def matches(self, question: Question, system) -> bool:
+        return all(strategy.matches(question, system) for strategy in self.conjuncts())
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        for question in QueryPlanner(system).stream(self, newest_first):
+            yield question.id
+
+    def estimate(self, system) -> int:
+        return min(strategy.estimate(system) for strategy in self.conjuncts())
+
+    def conjuncts(self) -> list[ISearchStrategy]:
+        # nested ANDs flatten into one list so the planner can pick from all of them
+        result = []
+        for strategy in self.strategies:
+            result.extend(strategy.conjuncts())
         return result
-            
\ No newline at end of file
+
+    def describe(self) -> str:
+        return "(" + " AND ".join(strategy.describe() for strategy in self.conjuncts()) + ")"
+
+    def signature(self) -> tuple | None:
+        signatures = [strategy.signature() for strategy in self.conjuncts()]
+        return None if None in signatures else ("and", frozenset(signatures))
+
+    def dependencies(self) -> set[tuple]:
+        return set().union(*(strategy.dependencies() for strategy in self.conjuncts()))
+
+
+class OrSearchStrategy(ISearchStrategy):
+    def __init__(self, strategies: list[ISearchStrategy]):
+        self.strategies = strategies
+
+    @property
+    def indexed(self) -> bool:
+        return all(strategy.indexed for strategy in self.strategies)
+
+    @property
+    def cost(self) -> int:
+        return sum(strategy.cost for strategy in self.strategies)
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        matched = set()
+        for strategy in self.strategies:
+            matched.update(question.id for question in strategy.filter(questions, system))
+        return [question for question in questions if question.id in matched]
+
+    def search(self, system) -> list[Question]:
+        return list(QueryPlanner(system).run(self))
+
+    def matches(self, question: Question, system) -> bool:
+        return any(strategy.matches(question, system) for strategy in self.strategies)
+
+    def candidates(self, system, newest_first: bool = False) -> Iterator[uuid.UUID]:
+        seen = set()
+        for strategy in self.strategies:
+            for question_id in strategy.candidates(system, newest_first):
+                if question_id not in seen:
+                    seen.add(question_id)
+                    yield question_id
+
+    def estimate(self, system) -> int:
+        return min(len(system.questions), sum(strategy.estimate(system) for strategy in self.strategies))
+
+    def describe(self) -> str:
+        return "(" + " OR ".join(strategy.describe() for strategy in self.strategies) + ")"
+
+    def signature(self) -> tuple | None:
+        signatures = [strategy.signature() for strategy in self.strategies]
+        return None if None in signatures else ("or", frozenset(signatures))
+
+    def dependencies(self) -> set[tuple]:
+        return set().union(*(strategy.dependencies() for strategy in self.strategies))
+
+
+class NotSearchStrategy(ISearchStrategy):
+    def __init__(self, strategy: ISearchStrategy):
+        self.strategy = strategy
+
+    @property
+    def cost(self) -> int:
+        return self.strategy.cost
+
+    def filter(self, questions: list[Question], system=None) -> list[Question]:
+        excluded = {question.id for question in self.strategy.filter(questions, system)}
+        return [question for question in questions if question.id not in excluded]
+
+    def search(self, system) -> list[Question]:
+        return list(QueryPlanner(system).run(self))
+
+    def matches(self, question: Question, system) -> bool:
+        return not self.strategy.matches(question, system)
+
+    def describe(self) -> str:
+        return f"NOT {self.strategy.describe()}"
+
+    def signature(self) -> tuple | None:
+        signature = self.strategy.signature()
+        return None if signature is None else ("not", signature)
+
+    def dependencies(self) -> set[tuple]:
+        # every new question that does not match the inner strategy joins the result
+        return self.strategy.dependencies() | {QUESTIONS}
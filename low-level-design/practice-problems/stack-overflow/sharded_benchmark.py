@@ -0,0 +1,86 @@
+import itertools
+import os
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from sharded_system import ShardedStackOverflowSystem
+from search_strategy import TagSearchStrategy
+from vote import VoteType
+
+NUM_QUESTIONS = 20_000
+NUM_ANSWERS = 5_000
+NUM_USERS = 200
+NUM_TAGS = 1_000
+NUM_VOTES = 20_000
+NUM_SEARCHES = 300
+SEED = 11
+
+TAGS = [f"tag{rank}" for rank in range(NUM_TAGS)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_TAGS)))
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=k))
+
+def build(shards: int):
+    # the same seeded workload for every shard count; the single-process reference replays it with the same ids
+    rng = random.Random(SEED)
+    system = ShardedStackOverflowSystem(shards)
+    reference = StackOverflowSystem()
+    users = []
+    for i in range(NUM_USERS):
+        user_id = system.add_user(f"user{i}", f"user{i}@example.com")
+        reference.add_user(f"user{i}", f"user{i}@example.com", user_id)
+        users.append(user_id)
+    questions = []
+    for i in range(NUM_QUESTIONS):
+        author, content, tags = rng.choice(users), words(rng, 10), set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3))
+        question_id = system.add_question(author, f"question {i}", content, tags)
+        reference.add_question(author, f"question {i}", content, tags, question_id)
+        questions.append(question_id)
+    posts = list(questions)
+    for _ in range(NUM_ANSWERS):
+        author, question_id, content = rng.choice(users), rng.choice(questions), words(rng, 8)
+        answer_id = system.add_answer(author, question_id, content)
+        reference.add_answer(author, question_id, content, answer_id)
+        posts.append(answer_id)
+    for _ in range(NUM_VOTES):
+        voter, post_id, type = rng.choice(users), rng.choice(posts), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE])
+        system.vote(voter, post_id, type)
+        reference.vote(voter, post_id, type)
+    return system, reference, users
+
+def check(system, reference, users: list, texts: list[str]):
+    for user_id in users:
+        assert system.reputation(user_id) == reference.users[user_id].reputation_score
+    for tag in TAGS[:50]:
+        strategy = TagSearchStrategy([tag])
+        top = system.query(strategy, sort="score", limit=20)
+        expected = list(reference.query(strategy, sort="score", limit=20))
+        assert [reference.questions[question_id].vote_score for question_id in top] == [q.vote_score for q in expected]
+        assert set(system.query(strategy, limit=500)) <= {q.id for q in strategy.search(reference)}
+    # shards score with the summed corpus statistics, so the merged ranking is the unsharded one up to ties
+    for text in texts:
+        scores = [round(score, 9) for _, score in system.search(text)]
+        assert scores == [round(score, 9) for _, score in reference.search_index.search(text)]
+
+if __name__ == "__main__":
+    max_shards = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rng = random.Random(SEED + 1)
+    texts = [words(rng, 2) for _ in range(NUM_SEARCHES)]
+    # shards only run in parallel up to the number of cores, past that they share them
+    print(f"{os.cpu_count()} core(s) available")
+    baseline = None
+    shards = 1
+    while shards <= max_shards:
+        system, reference, users = build(shards)
+        with system:
+            check(system, reference, users, texts[:50])
+            start = time.perf_counter()
+            for text in texts:
+                system.search(text)
+            throughput = NUM_SEARCHES / (time.perf_counter() - start)
+            baseline = baseline or throughput
+            print(f"{shards} shard(s): {throughput:8.1f} searches/s  {throughput / baseline:4.2f}x")
+        shards *= 2
@@ -0,0 +1,239 @@
+import heapq
+import itertools
+import multiprocessing
+import struct
+import uuid
+from collections import Counter
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+
+from stack_overflow_system import StackOverflowSystem, normalize
+from search_strategy import ISearchStrategy
+from vote import VoteType
+
+# one search or query hit in a shard's result buffer: question id and its sort key
+RESULT = struct.Struct("<16sd")
+SORT_KEYS = {
+    "score": lambda question: question.vote_score,
+    "recency": lambda question: question.created_at.timestamp(),
+}
+
+
+class ShardWorker:
+    # Runs inside a shard process: owns one StackOverflowSystem with every user and the
+    # questions (with their answers and comments) hashed to this shard. Search hits are
+    # written to the shared result buffer, only their count goes back through the pipe.
+    def __init__(self, buffer: SharedMemory, compact: bool):
+        self.buffer = buffer
+        self.capacity = buffer.size // RESULT.size
+        self.system = StackOverflowSystem(compact=compact)
+
+    def add_user(self, username: str, email: str, user_id: uuid.UUID):
+        self.system.add_user(username, email, user_id)
+
+    def add_question(self, user_id: uuid.UUID, title: str, content: str, tags: set[str], question_id: uuid.UUID):
+        self.system.add_question(user_id, title, content, tags, question_id)
+
+    def add_answer(self, user_id: uuid.UUID, question_id: uuid.UUID, content: str, answer_id: uuid.UUID):
+        self.system.add_answer(user_id, question_id, content, answer_id)
+
+    def add_comment(self, user_id: uuid.UUID, post_id: uuid.UUID, content: str, comment_id: uuid.UUID):
+        self.system.add_comment(user_id, post_id, content, comment_id)
+
+    def update_question(self, user_id: uuid.UUID, question_id: uuid.UUID, fields: dict):
+        self.system.update_question(user_id, question_id, **fields)
+
+    def update_answer(self, user_id: uuid.UUID, answer_id: uuid.UUID, fields: dict):
+        self.system.update_answer(user_id, answer_id, **fields)
+
+    def vote(self, user_id: uuid.UUID, post_id: uuid.UUID, type: VoteType):
+        self.system.vote(user_id, post_id, type)
+
+    def retract_vote(self, user_id: uuid.UUID, post_id: uuid.UUID):
+        self.system.retract_vote(user_id, post_id)
+
+    def reputation(self, user_id: uuid.UUID) -> int:
+        # only the votes on this shard's posts
+        return self.system.users[user_id].reputation_score
+
+    def statistics(self, text: str) -> tuple[int, int, dict[str, int]]:
+        return self.system.search_index.statistics(text)
+
+    def search(self, text: str, k: int, match_all: bool, statistics: tuple) -> int:
+        return self.__write(self.system.search_index.search(text, k, match_all, statistics))
+
+    def query(self, strategy: ISearchStrategy, sort: str | None, limit: int) -> int:
+        questions = self.system.query(strategy, sort, 0, limit)
+        key = SORT_KEYS.get(sort, lambda question: 0.0)
+        return self.__write((question.id, key(question)) for question in questions)
+
+    def __write(self, hits) -> int:
+        count = 0
+        for question_id, key in itertools.islice(hits, self.capacity):
+            RESULT.pack_into(self.buffer.buf, count * RESULT.size, question_id.bytes, key)
+            count += 1
+        return count
+
+
+def serve(connection: Connection, buffer_name: str, compact: bool):
+    # shard process main loop: (method, args) in, ("ok", result) or ("error", exception) out, None stops
+    buffer = SharedMemory(buffer_name)
+    worker = ShardWorker(buffer, compact)
+    try:
+        while (message := connection.recv()) is not None:
+            method, args = message
+            try:
+                connection.send(("ok", getattr(worker, method)(*args)))
+            except Exception as error:
+                connection.send(("error", error))
+    finally:
+        buffer.close()
+
+
+class ShardedStackOverflowSystem:
+    # Partitions questions, with their answers and comments, across worker processes by question
+    # id. Users are registered here and replicated to every shard so any shard can check them;
+    # a user's reputation is the sum of the reputation each shard saw for them. Searches go to
+    # every shard at once and the per-shard top k are merged. Keyword searches first collect
+    # every shard's BM25 corpus statistics so all shards score against the global ones and the
+    # merged ranking matches a single unsharded index.
+
+    def __init__(self, shards: int = 4, compact: bool = False, result_capacity: int = 1000):
+        self.result_capacity = result_capacity
+        self.users_by_username: dict[str, uuid.UUID] = {}
+        self.users_by_email: dict[str, uuid.UUID] = {}
+        # answers and comments are routed to their question's shard
+        self.__post_shards: dict[uuid.UUID, int] = {}
+        self.__connections: list[Connection] = []
+        self.__processes: list[multiprocessing.Process] = []
+        self.__buffers: list[SharedMemory] = []
+        for _ in range(shards):
+            buffer = SharedMemory(create=True, size=RESULT.size * result_capacity)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=serve, args=(child, buffer.name, compact), daemon=True)
+            process.start()
+            child.close()
+            self.__buffers.append(buffer)
+            self.__connections.append(parent)
+            self.__processes.append(process)
+
+    @property
+    def shards(self) -> int:
+        return len(self.__connections)
+
+    def shard_of(self, question_id: uuid.UUID) -> int:
+        return question_id.int % self.shards
+
+    def add_user(self, username: str, email: str) -> uuid.UUID:
+        username_key, email_key = normalize(username), normalize(email)
+        if username_key in self.users_by_username or email_key in self.users_by_email:
+            raise ValueError(f"Username {username} or Email {email} are already taken.")
+        user_id = uuid.uuid4()
+        self.__call_all("add_user", username, email, user_id)
+        self.users_by_username[username_key] = user_id
+        self.users_by_email[email_key] = user_id
+        return user_id
+
+    def add_question(self, user_id: uuid.UUID, title: str, content: str, tags: set[str]) -> uuid.UUID:
+        question_id = uuid.uuid4()
+        self.__call(self.shard_of(question_id), "add_question", user_id, title, content, tags, question_id)
+        return question_id
+
+    def add_answer(self, user_id: uuid.UUID, question_id: uuid.UUID, content: str) -> uuid.UUID:
+        answer_id = uuid.uuid4()
+        shard = self.shard_of(question_id)
+        self.__call(shard, "add_answer", user_id, question_id, content, answer_id)
+        self.__post_shards[answer_id] = shard
+        return answer_id
+
+    def add_comment(self, user_id: uuid.UUID, post_id: uuid.UUID, content: str) -> uuid.UUID:
+        comment_id = uuid.uuid4()
+        self.__call(self.__shard_of_post(post_id), "add_comment", user_id, post_id, content, comment_id)
+        return comment_id
+
+    def update_question(self, user_id: uuid.UUID, question_id: uuid.UUID, **fields):
+        self.__call(self.shard_of(question_id), "update_question", user_id, question_id, fields)
+
+    def update_answer(self, user_id: uuid.UUID, answer_id: uuid.UUID, **fields):
+        self.__call(self.__shard_of_post(answer_id), "update_answer", user_id, answer_id, fields)
+
+    def vote(self, user_id: uuid.UUID, post_id: uuid.UUID, type: VoteType):
+        self.__call(self.__shard_of_post(post_id), "vote", user_id, post_id, type)
+
+    def retract_vote(self, user_id: uuid.UUID, post_id: uuid.UUID):
+        self.__call(self.__shard_of_post(post_id), "retract_vote", user_id, post_id)
+
+    def reputation(self, user_id: uuid.UUID) -> int:
+        return sum(self.__call_all("reputation", user_id))
+
+    def search(self, text: str, k: int = 10, match_all: bool = False) -> list[tuple[uuid.UUID, float]]:
+        # BM25 ranked (question_id, score), best first
+        if k > self.result_capacity:
+            raise ValueError(f"k={k} is larger than the result buffers ({self.result_capacity}).")
+        documents, total_length, frequencies = 0, 0, Counter()
+        for shard_documents, shard_length, shard_frequencies in self.__call_all("statistics", text):
+            documents += shard_documents
+            total_length += shard_length
+            frequencies.update(shard_frequencies)
+        hits = self.__gather("search", text, k, match_all, (documents, total_length, dict(frequencies)))
+        return heapq.nlargest(k, itertools.chain.from_iterable(hits), key=lambda hit: hit[1])
+
+    def query(self, strategy: ISearchStrategy, sort: str | None = None, offset: int = 0, limit: int = 20) -> list[uuid.UUID]:
+        # every shard returns its first offset + limit questions, sort is None, "score" or "recency"
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort {sort}, expected one of {list(SORT_KEYS)}.")
+        if offset + limit > self.result_capacity:
+            raise ValueError(f"offset + limit={offset + limit} is larger than the result buffers ({self.result_capacity}).")
+        hits = self.__gather("query", strategy, sort, offset + limit)
+        if sort is not None:
+            hits = heapq.merge(*hits, key=lambda hit: hit[1], reverse=True)
+        else:
+            hits = itertools.chain.from_iterable(hits)
+        return [question_id for question_id, _ in itertools.islice(hits, offset, offset + limit)]
+
+    def close(self):
+        for connection in self.__connections:
+            connection.send(None)
+        for process in self.__processes:
+            process.join()
+        for buffer in self.__buffers:
+            buffer.close()
+            buffer.unlink()
+        self.__connections.clear()
+
+    def __enter__(self) -> "ShardedStackOverflowSystem":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __shard_of_post(self, post_id: uuid.UUID) -> int:
+        shard = self.__post_shards.get(post_id)
+        return self.shard_of(post_id) if shard is None else shard
+
+    def __call(self, shard: int, method: str, *args):
+        self.__connections[shard].send((method, args))
+        status, result = self.__connections[shard].recv()
+        if status == "error":
+            raise result
+        return result
+
+    def __call_all(self, method: str, *args) -> list:
+        # send to every shard before waiting on any, so they work in parallel
+        for connection in self.__connections:
+            connection.send((method, args))
+        results = [connection.recv() for connection in self.__connections]
+        for status, result in results:
+            if status == "error":
+                raise result
+        return [result for _, result in results]
+
+    def __gather(self, method: str, *args) -> list[list[tuple[uuid.UUID, float]]]:
+        hits = []
+        for shard, count in enumerate(self.__call_all(method, *args)):
+            buffer = self.__buffers[shard].buf
+            hits.append([
+                (uuid.UUID(bytes=id_bytes), key)
+                for id_bytes, key in (RESULT.unpack_from(buffer, row * RESULT.size) for row in range(count))
+            ])
+        return hits
@@ -0,0 +1,275 @@
+import datetime
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+
+from stack_overflow_system import StackOverflowSystem, paused_gc
+from user import User
+from question import Question
+from answer import Answer
+from comment import Comment
+from compact_model import CompactUser, CompactPost, CompactQuestion, CompactAnswer, CompactComment
+from vote import VoteType, VOTE_WEIGHTS
+
+# Layout: header, column table, then one 8-byte aligned blob per column.
+#   header:       magic, version, byte order, compact flag, column count
+#   column table: (name, offset, length) per column
+# Fixed-width columns are raw arrays. Text columns are a "<name>.offsets" uint64 column
+# (n + 1 byte offsets) plus a "<name>" utf-8 column. Rows refer to each other by position:
+# question/answer/comment authors and voters index the users, answers index the questions,
+# comments and votes index the posts (questions first, then answers). Tags are a text column
+# of every question's tags in turn, with "questions.tag_counts" saying how many belong to each.
+MAGIC = b"SOSNAP\0\0"
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct("<8sHcBI")
+COLUMN = struct.Struct("<32sQQ")
+VOTE_TYPES: dict[int, VoteType] = {weight: type for type, weight in VOTE_WEIGHTS.items()}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class TextColumn:
+    # utf-8 strings addressed through an offsets column, decoded one at a time
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return str(self.data[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+
+class PendingText:
+    # a row of a TextColumn that has not been decoded yet
+    __slots__ = ("column", "row")
+
+    def __init__(self, column: TextColumn, row: int):
+        self.column = column
+        self.row = row
+
+
+class LazyText:
+    # Data descriptor for a text attribute that may still be a PendingText pointing into the
+    # snapshot; it is decoded and cached on first access. slot is the parent class's slot
+    # descriptor for the slotted compact model, otherwise the value lives in __dict__.
+    def __init__(self, slot=None):
+        self.slot = slot
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj) if self.slot else obj.__dict__[self.name]
+        if type(value) is PendingText:
+            value = value.column[value.row]
+            self.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        if self.slot:
+            self.slot.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+
+class LazyQuestion(Question):
+    content = LazyText()
+
+
+class LazyAnswer(Answer):
+    content = LazyText()
+
+
+class LazyComment(Comment):
+    content = LazyText()
+
+
+class LazyCompactQuestion(CompactQuestion):
+    __slots__ = ()
+    content = LazyText(CompactPost.content)
+
+
+class LazyCompactAnswer(CompactAnswer):
+    __slots__ = ()
+    content = LazyText(CompactPost.content)
+
+
+class LazyCompactComment(CompactComment):
+    __slots__ = ()
+    content = LazyText(CompactComment.content)
+
+
+def text_columns(name: str, values: list[str]) -> dict[str, bytes]:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("Q", [0])
+    total = 0
+    for value in encoded:
+        total += len(value)
+        offsets.append(total)
+    return {f"{name}.offsets": offsets.tobytes(), name: b"".join(encoded)}
+
+
+def save_snapshot(system: StackOverflowSystem, path: str):
+    users = list(system.users.values())
+    questions = list(system.questions.values())
+    answers = list(system.answers.values())
+    comments = list(system.comments.values())
+    user_rows = {user.id: row for row, user in enumerate(users)}
+    question_rows = {question.id: row for row, question in enumerate(questions)}
+    post_rows = dict(question_rows)
+    post_rows.update((answer.id, len(questions) + row) for row, answer in enumerate(answers))
+
+    vote_posts, voters, signs = array("i"), array("i"), array("b")
+    for row, post in enumerate(questions + answers):
+        for user_id, vote in post.votes.items():
+            vote_posts.append(row)
+            voters.append(user_rows[user_id])
+            signs.append(VOTE_WEIGHTS[vote.type])
+
+    columns = {
+        "users.id": b"".join(user.id.bytes for user in users),
+        **text_columns("users.username", [user.username for user in users]),
+        **text_columns("users.email", [user.email for user in users]),
+        "questions.id": b"".join(question.id.bytes for question in questions),
+        "questions.author": array("i", (user_rows[q.author_id] for q in questions)).tobytes(),
+        "questions.created": array("d", (q.created_at.timestamp() for q in questions)).tobytes(),
+        **text_columns("questions.title", [q.title for q in questions]),
+        **text_columns("questions.content", [q.content for q in questions]),
+        "questions.tag_counts": array("I", (len(q.tags) for q in questions)).tobytes(),
+        **text_columns("questions.tags", [tag for q in questions for tag in sorted(q.tags)]),
+        "answers.id": b"".join(answer.id.bytes for answer in answers),
+        "answers.author": array("i", (user_rows[a.author_id] for a in answers)).tobytes(),
+        "answers.question": array("i", (question_rows[a.question_id] for a in answers)).tobytes(),
+        **text_columns("answers.content", [a.content for a in answers]),
+        "comments.id": b"".join(comment.id.bytes for comment in comments),
+        "comments.author": array("i", (user_rows[c.author_id] for c in comments)).tobytes(),
+        "comments.post": array("i", (post_rows[c.post_id] for c in comments)).tobytes(),
+        **text_columns("comments.content", [c.content for c in comments]),
+        "votes.post": vote_posts.tobytes(),
+        "votes.voter": voters.tobytes(),
+        "votes.sign": signs.tobytes(),
+    }
+
+    offset = HEADER.size + COLUMN.size * len(columns)
+    table = []
+    for name, data in columns.items():
+        offset += -offset % 8
+        table.append(COLUMN.pack(name.encode(), offset, len(data)))
+        offset += len(data)
+    byte_order = b"<" if sys.byteorder == "little" else b">"
+    # written aside and renamed over the old snapshot, so a crash leaves one or the other intact
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, byte_order, system.compact, len(columns)))
+        file.write(b"".join(table))
+        position = HEADER.size + COLUMN.size * len(columns)
+        for data in columns.values():
+            file.write(b"\0" * (-position % 8))
+            position += -position % 8
+            file.write(data)
+            position += len(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def read_columns(buffer) -> tuple[bool, dict[str, memoryview]]:
+    view = memoryview(buffer)
+    magic, version, byte_order, compact, count = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise SnapshotError("Not a StackOverflowSystem snapshot.")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot version {version} is not supported, expected {SNAPSHOT_VERSION}.")
+    if byte_order != (b"<" if sys.byteorder == "little" else b">"):
+        raise SnapshotError("Snapshot was written on a machine with a different byte order.")
+    columns = {}
+    for index in range(count):
+        name, offset, length = COLUMN.unpack_from(view, HEADER.size + COLUMN.size * index)
+        columns[name.rstrip(b"\0").decode()] = view[offset:offset + length]
+    return bool(compact), columns
+
+
+def load_snapshot(path: str, lazy: bool = False, rebuild_search_index: bool | None = None) -> StackOverflowSystem:
+    # lazy maps the file and leaves post and comment bodies undecoded until they are read; indexing
+    # them would decode every body, so by default a lazy load skips the search index until
+    # system.rebuild_search_index() is called
+    if rebuild_search_index is None:
+        rebuild_search_index = not lazy
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if lazy else file.read()
+    compact, columns = read_columns(buffer)
+
+    def ints(name: str, typecode: str = "i") -> memoryview:
+        return columns[name].cast(typecode)
+
+    def text(name: str) -> TextColumn:
+        return TextColumn(ints(f"{name}.offsets", "Q"), columns[name])
+
+    def ids(name: str) -> list[uuid.UUID]:
+        data = columns[name].tobytes()
+        return [uuid.UUID(bytes=data[start:start + 16]) for start in range(0, len(data), 16)]
+
+    def body(column: TextColumn, row: int):
+        return PendingText(column, row) if lazy else column[row]
+
+    # every object built here stays alive, so cyclic GC passes over them are wasted work
+    with paused_gc():
+        system = StackOverflowSystem(compact=compact)
+        user_ids = ids("users.id")
+        usernames, emails = text("users.username"), text("users.email")
+        user_type = CompactUser if compact else User
+        users = [user_type(usernames[row], emails[row], id=user_id) for row, user_id in enumerate(user_ids)]
+        # compact posts need the dense user ids before the first vote, restore() interns them in this order too
+        for user_id in user_ids if compact else ():
+            system.user_ids.intern(user_id)
+
+        if compact:
+            question_type = LazyCompactQuestion if lazy else CompactQuestion
+            answer_type = LazyCompactAnswer if lazy else CompactAnswer
+            comment_type = LazyCompactComment if lazy else CompactComment
+            new_question = lambda *args, **kwargs: question_type(system.user_ids, *args, **kwargs)
+            new_answer = lambda *args, **kwargs: answer_type(system.user_ids, *args, **kwargs)
+        else:
+            new_question = LazyQuestion if lazy else Question
+            new_answer = LazyAnswer if lazy else Answer
+            comment_type = LazyComment if lazy else Comment
+
+        authors, created = ints("questions.author"), ints("questions.created", "d")
+        titles, contents, tags = text("questions.title"), text("questions.content"), text("questions.tags")
+        tag_counts = ints("questions.tag_counts", "I")
+        questions = []
+        tag_row = 0
+        for row, question_id in enumerate(ids("questions.id")):
+            question_tags = {tags[tag_row + i] for i in range(tag_counts[row])}
+            tag_row += tag_counts[row]
+            questions.append(new_question(
+                user_ids[authors[row]], titles[row], body(contents, row), question_tags,
+                id=question_id, created_at=datetime.datetime.fromtimestamp(created[row]),
+            ))
+
+        authors, parents, contents = ints("answers.author"), ints("answers.question"), text("answers.content")
+        answers = [
+            new_answer(user_ids[authors[row]], questions[parents[row]].id, body(contents, row), id=answer_id)
+            for row, answer_id in enumerate(ids("answers.id"))
+        ]
+
+        posts = questions + answers
+        authors, parents, contents = ints("comments.author"), ints("comments.post"), text("comments.content")
+        comments = [
+            comment_type(user_ids[authors[row]], posts[parents[row]].id, body(contents, row), id=comment_id)
+            for row, comment_id in enumerate(ids("comments.id"))
+        ]
+
+        vote_posts, voters, signs = ints("votes.post"), ints("votes.voter"), ints("votes.sign", "b")
+        votes = [(user_ids[voters[row]], posts[vote_posts[row]], VOTE_TYPES[signs[row]]) for row in range(len(signs))]
+
+    system.restore(users, questions, answers, comments, votes, rebuild_search_index)
+    return system
@@ -0,0 +1,82 @@
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from stack_overflow_system import StackOverflowSystem
+from snapshot import save_snapshot, load_snapshot
+from search_strategy import TagSearchStrategy
+from vote import VoteType
+
+NUM_USERS = 10_000
+NUM_QUESTIONS = 20_000
+NUM_ANSWERS = 40_000
+NUM_COMMENTS = 20_000
+NUM_VOTES = 300_000
+SEED = 17
+
+WORDS = [f"w{rank}" for rank in range(5_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(WORDS))))
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=words))
+
+def build_system(compact: bool) -> StackOverflowSystem:
+    rng = random.Random(SEED)
+    system = StackOverflowSystem(compact=compact)
+    users = [user.id for user in system.import_users([(f"user{i}", f"user{i}@example.com") for i in range(NUM_USERS)])]
+    questions = [system.add_question(rng.choice(users), text(rng, 8), text(rng, 300), {f"tag{rng.randrange(500)}" for _ in range(3)}).id
+                 for _ in range(NUM_QUESTIONS)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), text(rng, 150)).id for _ in range(NUM_ANSWERS)]
+    posts = questions + answers
+    for _ in range(NUM_COMMENTS):
+        system.add_comment(rng.choice(users), rng.choice(posts), text(rng, 20))
+    for _ in range(NUM_VOTES):
+        system.vote(rng.choice(users), rng.choice(posts), VoteType.UPVOTE if rng.random() < 0.8 else VoteType.DOWNVOTE)
+    return system
+
+def timed(label: str, load) -> StackOverflowSystem:
+    start = time.perf_counter()
+    system = load()
+    loaded = time.perf_counter() - start
+    # time to serve a first tag page and read its bodies
+    page = list(system.query(TagSearchStrategy(["tag7"]), sort="recency", limit=20))
+    sum(len(question.content) for question in page)
+    first = time.perf_counter() - start
+    print(f"{label:<40} load {loaded:6.2f}s   first page {first:6.2f}s")
+    return system
+
+if __name__ == "__main__":
+    compact = "compact" in sys.argv[1:]
+    source = build_system(compact)
+    path = os.path.join(tempfile.mkdtemp(), "stack_overflow.snap")
+    start = time.perf_counter()
+    save_snapshot(source, path)
+    print(f"Snapshot of {'compact' if compact else 'object'} model: {os.path.getsize(path) / 1024 / 1024:.1f} MiB, "
+          f"written in {time.perf_counter() - start:.2f}s")
+
+    systems = [
+        timed("cold load + search index rebuild", lambda: load_snapshot(path)),
+        timed("cold load, no search index", lambda: load_snapshot(path, rebuild_search_index=False)),
+        timed("mmap lazy load, no search index", lambda: load_snapshot(path, lazy=True)),
+    ]
+    for system in systems:
+        assert system.check_consistency() == []
+        assert {q.id: q.vote_score for q in system.questions.values()} == {q.id: q.vote_score for q in source.questions.values()}
+    question = next(iter(source.questions.values()))
+    assert systems[2].questions[question.id].content == question.content
+    assert systems[0].search_index.search("w1 w2", 10) == source.search_index.search("w1 w2", 10)
+    del systems
+
+    # bodies left in the mapped file are not on the Python heap
+    for label, lazy in (("cold load", False), ("mmap lazy load", True)):
+        tracemalloc.start()
+        system = load_snapshot(path, lazy=lazy, rebuild_search_index=False)
+        heap, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label + ', no search index':<40} heap {heap / 1024 / 1024:6.1f} MiB")
+        del system
+    os.remove(path)
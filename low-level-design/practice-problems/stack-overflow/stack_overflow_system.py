@@ -1,34 +1,144 @@
+import functools
+import gc
+import threading
 import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
 
 from user import User
 from question import Question
 from answer import Answer
 from comment import Comment 
-from vote import VoteType
+from vote import VoteType, VoteOutcome
 from search_strategy import ISearchStrategy
+from query_planner import QueryPlanner
+from search_index import SearchIndex
+from tag_index import TagIndex
+from feed import FeedIndex
+from search_cache import QUESTIONS, SearchCache, score_keys, sorted_dependencies
+from event_log import Event, EventLog, EventType
+from projection import ProjectionRunner, ReputationProjection, SearchIndexProjection, TagProjection, FeedProjection, ThreadProjection
+from thread_index import ThreadIndex, ThreadPage
+from compact_model import UserIds, CompactUser, CompactQuestion, CompactAnswer, CompactComment
+
+@contextmanager
+def paused_gc():
+    # bulk imports allocate objects that all stay alive, so cyclic GC passes over them are wasted work
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def writer(method):
+    # runs the method under the system's write lock, so writes to the primary state never interleave
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def normalize(key: str) -> str: 
+    # usernames and emails are unique regardless of case and surrounding whitespace
+    return key.strip().casefold()
+
 
 class StackOverflowSystem: 
-    def __init__(self): 
+    def __init__(self, compact: bool = False, search_cache: SearchCache | None = None, 
+                 async_projections: bool = False, max_retained_events: int | None = 0): 
+        # compact mode stores slotted posts with array-backed votes keyed by dense user ids
+        self.compact = compact
+        self.user_ids = UserIds() if compact else None
         self.users: dict[uuid.UUID, User] = {}
+        # normalized username / email -> user_id, checked and updated together under the lock
+        self.users_by_username: dict[str, uuid.UUID] = {}
+        self.users_by_email: dict[str, uuid.UUID] = {}
+        self.__users_lock = threading.Lock()
+        # held by every write to users, posts, comments and votes; taken before the users lock and views_lock
+        self.write_lock = threading.RLock()
         self.questions: dict[uuid.UUID, Question] = {}
         self.answers: dict[uuid.UUID, Answer] = {}
         self.comments: dict[uuid.UUID, Comment] = {}
+        # user_id -> ids of the questions and answers they authored
+        self.posts_by_author: dict[uuid.UUID, set[uuid.UUID]] = {}
+        self.search_index = SearchIndex()
+        self.tag_index = TagIndex()
+        self.feeds = FeedIndex()
+        # answers of each question in score and arrival order, comments of each post
+        self.threads = ThreadIndex()
+        # search and query results, dropped when a write touches a term, tag or author they depend on
+        self.search_cache = SearchCache() if search_cache is None else search_cache
+        # Writes update the primary state above and append an event; reputation, the search and tag
+        # indexes and the feeds are projections of the log. They are applied right after each write,
+        # or by a background thread with async_projections, in which case wait_for() gives
+        # read-your-writes. Readers of the projected views hold views_lock.
+        self.views_lock = threading.RLock()
+        self.events = EventLog(max_retained_events)
+        self.projections = ProjectionRunner(self.events, [
+            ReputationProjection(self), SearchIndexProjection(self), TagProjection(self), FeedProjection(self),
+            ThreadProjection(self),
+        ], self.views_lock)
+        if async_projections: 
+            self.projections.start()
 
-    def add_user(self, username: str, email: str) -> User:
-        for user in self.users.values(): 
-            if user.username == username or user.email == email: 
+    @writer
+    def add_user(self, username: str, email: str, id: uuid.UUID | None = None) -> User:
+        # id is only passed when the user already exists elsewhere, e.g. replicated to a shard
+        username_key, email_key = normalize(username), normalize(email)
+        with self.__users_lock: 
+            if username_key in self.users_by_username or email_key in self.users_by_email: 
                 raise ValueError(f"Username {username} or Email {email} are already taken.")
-        user = User(username, email)
-        self.users[user.id] = user
-        return user
+            return self.__insert_user(username, email, username_key, email_key, id)
+
+    @writer
+    def import_users(self, users: list[tuple[str, str]]) -> list[User]: 
+        # all or nothing: the whole batch is checked against the indexes and against itself first
+        with paused_gc(): 
+            keys = [(normalize(username), normalize(email)) for username, email in users]
+        with self.__users_lock: 
+            usernames, emails = set(), set()
+            conflicts = []
+            for (username, email), (username_key, email_key) in zip(users, keys): 
+                if username_key in usernames or username_key in self.users_by_username: 
+                    conflicts.append(username)
+                if email_key in emails or email_key in self.users_by_email: 
+                    conflicts.append(email)
+                usernames.add(username_key)
+                emails.add(email_key)
+            if conflicts: 
+                raise ValueError(f"{len(conflicts)} username(s) or email(s) are already taken, e.g. {conflicts[:5]}.")
+            with paused_gc(): 
+                return [self.__insert_user(*user, *key) for user, key in zip(users, keys)]
+
+    def get_user_by_username(self, username: str) -> User | None: 
+        user_id = self.users_by_username.get(normalize(username))
+        return None if user_id is None else self.users[user_id]
+
+    def get_user_by_email(self, email: str) -> User | None: 
+        user_id = self.users_by_email.get(normalize(email))
+        return None if user_id is None else self.users[user_id]
  
-    def add_question(self, user_id: uuid.UUID, title: str, content: str, tags: set[str]) -> Question: 
+    @writer
+    def add_question(self, user_id: uuid.UUID, title: str, content: str, tags: set[str], id: uuid.UUID | None = None) -> Question: 
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
-        question = Question(user_id, title, content, tags)
+        if self.compact: 
+            question = CompactQuestion(self.user_ids, user_id, title, content, tags, id)
+        else: 
+            question = Question(user_id, title, content, tags, id)
         self.questions[question.id] = question
+        self.posts_by_author[user_id].add(question.id)
+        # author and unfiltered results read the primary state, the projections invalidate the rest
+        self.search_cache.invalidate({("author", user_id), QUESTIONS})
+        self.__publish(Event(EventType.QUESTION_ADDED, question))
         return question
     
+    @writer
     def update_question(self, user_id: uuid.UUID, question_id: uuid.UUID, **fields):
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
@@ -37,21 +147,33 @@ class StackOverflowSystem:
         question = self.questions[question_id]
         if user_id != question.author_id: 
             raise RuntimeError(f"User {user_id} does not have permissions to update Question {question_id}.")
-        if fields["title"]: question.update_title(fields["title"])
-        if fields["content"]: question.update_content(fields["content"])
-        if fields["tags"]: question.update_tags(fields["tags"])
+        old_tags = None
+        if fields.get("title"): question.update_title(fields["title"])
+        if fields.get("content"): question.update_content(fields["content"])
+        if fields.get("tags"): 
+            old_tags = frozenset(question.tags)
+            question.update_tags(fields["tags"])
+        if fields.get("title") or fields.get("content") or fields.get("tags"): 
+            self.__publish(Event(EventType.QUESTION_UPDATED, question, old_tags=old_tags))
 
-    def add_answer(self, user_id: uuid.UUID, question_id: uuid.UUID, content: str) -> Answer: 
+    @writer
+    def add_answer(self, user_id: uuid.UUID, question_id: uuid.UUID, content: str, id: uuid.UUID | None = None) -> Answer: 
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
         if question_id not in self.questions: 
             raise KeyError(f"Question {question_id} does not exist in the system.")
-        answer = Answer(user_id, question_id, content)
+        if self.compact: 
+            answer = CompactAnswer(self.user_ids, user_id, question_id, content, id)
+        else: 
+            answer = Answer(user_id, question_id, content, id)
         self.answers[answer.id] = answer
         question = self.questions[question_id]
         question.add_answer(answer)
+        self.posts_by_author[user_id].add(answer.id)
+        self.__publish(Event(EventType.ANSWER_ADDED, answer))
         return answer
     
+    @writer
     def update_answer(self, user_id: uuid.UUID, answer_id: uuid.UUID, **fields):
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
@@ -60,22 +182,27 @@ class StackOverflowSystem:
         answer = self.answers[answer_id]
         if user_id != answer.author_id: 
             raise RuntimeError(f"User {user_id} does not have permissions to update Answer {answer_id}.")
-        if fields["content"]: answer.update_content(fields["content"])
+        if fields.get("content"): 
+            answer.update_content(fields["content"])
+            self.__publish(Event(EventType.ANSWER_UPDATED, answer))
     
-    def add_comment(self, user_id: uuid.UUID, post_id: uuid.UUID, content: str) -> Comment: 
+    @writer
+    def add_comment(self, user_id: uuid.UUID, post_id: uuid.UUID, content: str, id: uuid.UUID | None = None) -> Comment: 
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
         if post_id not in self.questions and post_id not in self.answers: 
             raise KeyError(f"Post {post_id} does not exist in the system.")
-        comment = Comment(user_id, post_id, content)
+        comment = CompactComment(user_id, post_id, content, id) if self.compact else Comment(user_id, post_id, content, id)
         self.comments[comment.id] = comment
         if post_id in self.questions: 
             post = self.questions[post_id]
         elif post_id in self.answers: 
             post = self.answers[post_id]
         post.add_comment(comment)
+        self.__publish(Event(EventType.COMMENT_ADDED, comment))
         return comment
     
+    @writer
     def update_comment(self, user_id: uuid.UUID, comment_id: uuid.UUID, **fields): 
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
@@ -84,33 +211,216 @@ class StackOverflowSystem:
         comment = self.comments[comment_id]
         if user_id != comment.author_id:
             raise RuntimeError(f"User {user_id} does not have permissions to update Comment {comment_id}.")
-        if fields["content"]: comment.update_content(fields["content"])
+        if fields.get("content"): comment.update_content(fields["content"])
     
+    @writer
     def vote(self, user_id: uuid.UUID, post_id: uuid.UUID, type: VoteType):
+        post = self.__votable_post(user_id, post_id)
+        self.__record_vote(post, post.vote(user_id, type))
+
+    @writer
+    def retract_vote(self, user_id: uuid.UUID, post_id: uuid.UUID): 
+        post = self.__votable_post(user_id, post_id)
+        self.__record_vote(post, post.retract_vote(user_id))
+
+    @writer
+    def vote_many(self, batch: list[tuple[uuid.UUID, uuid.UUID, VoteType | None]]) -> list[VoteOutcome]: 
+        # Bulk ingestion of (user_id, post_id, type) items, type None retracts. Only the last item per
+        # (user, post) is applied, and each post's net score change is published as one event, so the
+        # projections update every author's reputation and every question's feeds once per batch.
+        last = {}
+        for position, (user_id, post_id, _) in enumerate(batch): 
+            last[user_id, post_id] = position
+        outcomes = [VoteOutcome.SUPERSEDED] * len(batch)
+        users, questions, answers = self.users, self.questions, self.answers
+        deltas: dict[uuid.UUID, int] = {}
+        posts = {}
+        for position in sorted(last.values()): 
+            user_id, post_id, type = batch[position]
+            post = questions.get(post_id) or answers.get(post_id)
+            if user_id not in users: 
+                outcomes[position] = VoteOutcome.UNKNOWN_USER
+                continue
+            if post is None: 
+                outcomes[position] = VoteOutcome.UNKNOWN_POST
+                continue
+            delta = post.retract_vote(user_id) if type is None else post.vote(user_id, type)
+            outcomes[position] = VoteOutcome.APPLIED if delta else VoteOutcome.UNCHANGED
+            if delta: 
+                deltas[post_id] = deltas.get(post_id, 0) + delta
+                posts[post_id] = post
+        events = []
+        for post_id, delta in deltas.items(): 
+            if delta: 
+                post = posts[post_id]
+                if post_id in questions: 
+                    self.search_cache.invalidate(score_keys(post))
+                events.append(Event(EventType.VOTE, post, delta))
+        self.projections.publish_many(events)
+        return outcomes
+
+    def feed(self, name: str = "hot", k: int = 20, tag: str | None = None) -> list[Question]: 
+        # "top" (all-time score), "hot" (time-decayed score) or "answered", site-wide or for one tag
+        with self.views_lock: 
+            return [self.questions[question_id] for question_id in self.feeds.feed(name, k, tag)]
+
+    def thread(self, question_id: uuid.UUID, order: str = "score", cursor: str | None = None, limit: int = 20, 
+               comments_per_post: int | None = None) -> ThreadPage: 
+        # one page of a question's answers, "score" (highest first) or "chronological", with the
+        # comments of the question and of every answer on the page
+        if question_id not in self.questions: 
+            raise KeyError(f"Question {question_id} does not exist in the system.")
+        with self.views_lock: 
+            answer_ids, next_cursor = self.threads.page(question_id, order, cursor, limit)
+            comment_ids = self.threads.comments_of([question_id] + answer_ids, comments_per_post)
+            total = self.threads.answer_count(question_id)
+        comments = {post_id: [self.comments[comment_id] for comment_id in ids] for post_id, ids in comment_ids.items()}
+        answers = [self.answers[answer_id] for answer_id in answer_ids]
+        return ThreadPage(self.questions[question_id], answers, comments, total, next_cursor)
+
+    def wait_for(self, offset: int | None = None, timeout: float | None = None) -> bool: 
+        # read-your-writes: block until the projections caught up with offset, by default every write so far
+        return self.projections.wait_for(offset, timeout)
+
+    def close(self): 
+        # stops the projection thread, later writes are projected inline
+        self.projections.stop()
+        
+    def update_user_rep_score(self, user_id: uuid.UUID): 
+        # repairs one reputation from the user's own posts; pending vote events are applied first
+        # so they are not counted twice
+        self.wait_for()
+        with self.views_lock: 
+            result = sum(self.__post(post_id).vote_score for post_id in self.posts_by_author[user_id])
+            self.users[user_id].update_rep_score(result)
+
+    def check_consistency(self) -> list[str]: 
+        # recompute every vote score and reputation from scratch and report where the running totals disagree
+        self.wait_for()
+        errors = []
+        for post in list(self.questions.values()) + list(self.answers.values()): 
+            expected = post.recompute_vote_score()
+            if post.vote_score != expected: 
+                errors.append(f"Post {post.id} has vote score {post.vote_score}, expected {expected}.")
+        for user in self.users.values(): 
+            expected = sum(
+                self.__post(post_id).recompute_vote_score() for post_id in self.posts_by_author[user.id]
+            )
+            if user.reputation_score != expected: 
+                errors.append(f"User {user.id} has reputation {user.reputation_score}, expected {expected}.")
+        return errors
+
+    @writer
+    def restore(self, users: list[User], questions: list[Question], answers: list[Answer], comments: list[Comment],
+                votes: list[tuple[uuid.UUID, Question | Answer, VoteType]], rebuild_search_index: bool = True): 
+        # bulk load of fully built objects, e.g. from a snapshot; reputations are rebuilt from the votes
+        with paused_gc(): 
+            with self.__users_lock: 
+                for user in users: 
+                    if self.compact: 
+                        self.user_ids.intern(user.id)
+                    self.users[user.id] = user
+                    self.users_by_username[normalize(user.username)] = user.id
+                    self.users_by_email[normalize(user.email)] = user.id
+                    self.posts_by_author[user.id] = set()
+            for question in questions: 
+                self.questions[question.id] = question
+                self.posts_by_author[question.author_id].add(question.id)
+            for answer in answers: 
+                self.answers[answer.id] = answer
+                self.questions[answer.question_id].add_answer(answer)
+                self.posts_by_author[answer.author_id].add(answer.id)
+            for comment in comments: 
+                self.comments[comment.id] = comment
+                self.__post(comment.post_id).add_comment(comment)
+            reputations = Counter()
+            for user_id, post, type in votes: 
+                reputations[post.author_id] += post.vote(user_id, type)
+            self.search_cache.clear()
+            # the projections index the restored posts once their final scores and answer counts are known
+            self.__publish(Event(EventType.RESTORED, restored=(questions, answers, comments, dict(reputations), rebuild_search_index)))
+
+    def rebuild_search_index(self): 
+        # safe to call again, the index only applies the difference for posts it already has
+        with self.views_lock, paused_gc(): 
+            for question in self.questions.values(): 
+                self.search_index.add_question(question)
+            for answer in self.answers.values(): 
+                self.search_index.add_answer(answer)
+            self.search_cache.clear()
+
+    def __insert_user(self, username: str, email: str, username_key: str, email_key: str, id: uuid.UUID | None = None) -> User: 
+        user = CompactUser(username, email, id) if self.compact else User(username, email, id)
+        if self.compact: 
+            self.user_ids.intern(user.id)
+        self.users[user.id] = user
+        self.users_by_username[username_key] = user.id
+        self.users_by_email[email_key] = user.id
+        self.posts_by_author[user.id] = set()
+        return user
+
+    def __votable_post(self, user_id: uuid.UUID, post_id: uuid.UUID) -> Question | Answer: 
         if user_id not in self.users: 
             raise KeyError(f"User {user_id} does not exist in the system.")
         if post_id not in self.questions and post_id not in self.answers: 
             raise KeyError(f"Post {post_id} does not exist in the system.")
+        return self.__post(post_id)
+
+    def __post(self, post_id: uuid.UUID) -> Question | Answer: 
         if post_id in self.questions: 
-            post = self.questions[post_id]
-        elif post_id in self.answers: 
-            post = self.answers[post_id]
-        post.vote(user_id, type)
-        self.update_user_rep_score(user_id)
-        
-    def update_user_rep_score(self, user_id: uuid.UUID): 
-        result = 0
-        for question in self.questions.values(): 
-            if user_id == question.author_id:
-                result += question.vote_score
-        for answer in self.answers.values():
-            if user_id == answer.author_id: 
-                result += answer.vote_score
-        self.users[user_id].update_rep_score(result)
+            return self.questions[post_id]
+        return self.answers[post_id]
+
+    def __record_vote(self, post: Question | Answer, delta: int): 
+        # the reputation projection credits the post's author, not the voter
+        if delta: 
+            if post.id in self.questions: 
+                self.search_cache.invalidate(score_keys(post))
+            self.__publish(Event(EventType.VOTE, post, delta))
+
+    def __publish(self, event: Event): 
+        self.projections.publish(event)
 
     def search_questions(self, strategies: list[ISearchStrategy]) -> list[Question]: 
-        result = []
-        for strategy in strategies: 
-            questions = self.questions.values()
-            result.extend(strategy.filter(questions))
-        return result
\ No newline at end of file
+        # union of the strategies' results without duplicates
+        result = {}
+        with self.views_lock: 
+            for strategy in strategies: 
+                signature = strategy.signature()
+                questions = self.search_cache.get_or_compute(
+                    None if signature is None else ("search", signature),
+                    strategy.search_dependencies(), lambda: strategy.search(self),
+                )
+                for question in questions: 
+                    result.setdefault(question.id, question)
+        return list(result.values())
+
+    def query(self, strategy: ISearchStrategy, sort: str | None = None, offset: int = 0, limit: int | None = None) -> Iterator[Question]: 
+        # strategies compose with &, | and ~; sort is None, "score" or "recency"
+        # only a bounded page is cached, without a limit the planner's stream is returned lazily
+        if limit is None: 
+            return self.__under_views_lock(QueryPlanner(self).run(strategy, sort, offset, limit))
+        signature = strategy.signature()
+        dependencies = strategy.dependencies()
+        if sort == "score": 
+            dependencies = sorted_dependencies(dependencies)
+        # the page is materialized under the views lock, so a projection batch cannot land mid-query
+        with self.views_lock: 
+            questions = self.search_cache.get_or_compute(
+                None if signature is None else ("query", signature, sort, offset, limit), dependencies,
+                lambda: list(QueryPlanner(self).run(strategy, sort, offset, limit)),
+            )
+        return iter(questions)
+
+    def __under_views_lock(self, questions: Iterator[Question]) -> Iterator[Question]: 
+        # each step of the stream runs under the views lock, so projection batches land between results
+        while True: 
+            with self.views_lock: 
+                question = next(questions, None)
+            if question is None: 
+                return
+            yield question
+
+    def explain(self, strategy: ISearchStrategy, sort: str | None = None, offset: int = 0, limit: int | None = None) -> str: 
+        with self.views_lock: 
+            return QueryPlanner(self).explain(strategy, sort, offset, limit)
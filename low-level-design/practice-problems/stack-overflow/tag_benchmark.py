@@ -0,0 +1,91 @@
+import itertools
+import random
+import time
+from collections import Counter
+
+from stack_overflow_system import StackOverflowSystem
+from search_strategy import TagSearchStrategy
+from tag_index import TagIndex
+
+NUM_QUESTIONS = 100_000
+NUM_TAGS = 3_000
+TAGS_PER_QUESTION = 4
+NUM_RETAGS = 10_000
+NUM_QUERIES = 200
+SEED = 5
+
+TAGS = [f"tag{rank}" for rank in range(NUM_TAGS)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(NUM_TAGS)))
+
+def random_tags(rng: random.Random) -> set[str]:
+    return set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=TAGS_PER_QUESTION))
+
+def timed(label: str, scan, indexed, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scan()
+    scan_time = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        indexed()
+    index_time = (time.perf_counter() - start) / repeat
+    print(f"{label:<22} scan {scan_time * 1e3:8.2f}ms   index {index_time * 1e3:8.3f}ms   ({scan_time / index_time:,.0f}x)")
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    system = StackOverflowSystem()
+    user = system.add_user("user", "user@example.com")
+    questions = [system.add_question(user.id, f"q{i}", f"q{i}", random_tags(rng)) for i in range(NUM_QUESTIONS)]
+    for _ in range(NUM_RETAGS):
+        system.update_question(user.id, rng.choice(questions).id, tags=random_tags(rng))
+
+    index = system.tag_index
+    all_questions = list(system.questions.values())
+
+    # counts and co-occurrence must match a full recount
+    counts = Counter(tag for question in all_questions for tag in question.tags)
+    assert index.counts == counts
+    related = Counter()
+    for question in all_questions:
+        for a, b in itertools.permutations(question.tags, 2):
+            related[a, b] += 1
+    assert all(index.related[a][b] == count for (a, b), count in related.items())
+    assert sum(sum(c.values()) for c in index.related.values()) == sum(related.values())
+
+    # AND/OR/NOT queries must match the scanning strategy
+    for _ in range(50):
+        tags = rng.sample(TAGS[:200], 2)
+        excluded = rng.sample(TAGS[:50], 1)
+        for match_all in (True, False):
+            strategy = TagSearchStrategy(tags, match_all=match_all, excluded_tags=excluded)
+            assert strategy.search(system) == strategy.filter(all_questions, system)
+
+    # adding a question touches one container per tag, so the cost per question stays flat
+    start = time.perf_counter()
+    rebuilt = TagIndex()
+    for question in all_questions:
+        rebuilt.add_question(question)
+    print(f"index build            {(time.perf_counter() - start) / NUM_QUESTIONS * 1e6:.2f}us per question")
+    assert rebuilt.counts == index.counts
+
+    tags = itertools.cycle(TAGS[:NUM_QUERIES])
+
+    def scan_page():
+        tag = next(tags)
+        return [q for q in all_questions if tag in q.tags][:50]
+
+    def scan_count():
+        tag = next(tags)
+        return sum(1 for q in all_questions if tag in q.tags)
+
+    timed("tag page (first 50)", scan_page, lambda: index.query(all_of=[next(tags)], limit=50), NUM_QUERIES // 10)
+    timed("tag count", scan_count, lambda: index.tag_count(next(tags)), NUM_QUERIES // 10)
+    timed("tag cloud (top 50)",
+          lambda: Counter(t for q in all_questions for t in q.tags).most_common(50),
+          lambda: index.top_tags(50), 5)
+    timed("related tags",
+          lambda: Counter(t for q in all_questions if "tag0" in q.tags for t in q.tags if t != "tag0").most_common(10),
+          lambda: index.related_tags("tag0", 10), 5)
+    timed("a AND b NOT c",
+          lambda: [q for q in all_questions if "tag1" in q.tags and "tag2" in q.tags and "tag3" not in q.tags],
+          lambda: index.query(all_of=["tag1", "tag2"], none_of=["tag3"]), 10)
@@ -0,0 +1,167 @@
+import uuid
+from itertools import islice
+from typing import Iterator
+from collections import Counter
+
+from question import Question
+
+
+# slots per container; a container's bitmap is an int of at most this many bits
+CHUNK_BITS = 12
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def bitmap_slots(bitmap: int, newest_first: bool = False) -> Iterator[int]:
+    # positions of the set bits of one container, lowest first unless newest_first
+    bits = bin(bitmap)[2:]
+    if newest_first: 
+        top = len(bits) - 1
+        index = bits.find("1")
+        while index != -1:
+            yield top - index
+            index = bits.find("1", index + 1)
+        return
+    bits = bits[::-1]
+    slot = bits.find("1")
+    while slot != -1:
+        yield slot
+        slot = bits.find("1", slot + 1)
+
+
+class TagIndex: 
+    # Tag -> containers of question slots, where each question owns one slot assigned in
+    # insertion order. Slots are split into chunks of 2^CHUNK_BITS and a tag keeps an int
+    # bitmap only for the chunks it has questions in, so adding or retagging a question
+    # rewrites one small bitmap and AND/OR/NOT are big-int ops chunk by chunk. A query walks
+    # the chunks of its rarest tag and stops decoding once the page is full.
+    # Per-tag counts and tag co-occurrence counts are kept as running totals.
+
+    def __init__(self): 
+        self.chunks: dict[str, dict[int, int]] = {}
+        self.counts: Counter = Counter()
+        self.related: dict[str, Counter] = {}
+        self.__slots: dict[uuid.UUID, int] = {}
+        self.__question_ids: list[uuid.UUID] = []
+        self.__tags: list[frozenset[str]] = []
+
+    def __len__(self) -> int: 
+        return len(self.__question_ids)
+
+    def add_question(self, question: Question): 
+        slot = len(self.__question_ids)
+        self.__slots[question.id] = slot
+        self.__question_ids.append(question.id)
+        self.__tags.append(frozenset())
+        self.__set_tags(slot, frozenset(question.tags))
+
+    def update_question(self, question: Question): 
+        self.__set_tags(self.__slots[question.id], frozenset(question.tags))
+
+    def tags(self, question_id: uuid.UUID) -> frozenset[str]: 
+        # the tags the index currently has for the question
+        slot = self.__slots.get(question_id)
+        return frozenset() if slot is None else self.__tags[slot]
+
+    def tag_count(self, tag: str) -> int: 
+        return self.counts[tag]
+
+    def top_tags(self, n: int = 20) -> list[tuple[str, int]]: 
+        return self.counts.most_common(n)
+
+    def related_tags(self, tag: str, n: int = 10) -> list[tuple[str, int]]: 
+        # tags that appear on the same questions as tag, by number of shared questions
+        return self.related.get(tag, Counter()).most_common(n)
+
+    def query(self, all_of: list[str] = (), any_of: list[str] = (), none_of: list[str] = (),
+              offset: int = 0, limit: int | None = None) -> list[uuid.UUID]: 
+        # questions carrying every tag in all_of, at least one tag in any_of (if given) and no tag in none_of,
+        # in the order they were asked
+        end = None if limit is None else offset + limit
+        return list(islice(self.iter_query(all_of, any_of, none_of), offset, end))
+
+    def iter_query(self, all_of: list[str] = (), any_of: list[str] = (), none_of: list[str] = (),
+                   newest_first: bool = False) -> Iterator[uuid.UUID]: 
+        question_ids = self.__question_ids
+        for chunk, bitmap in self.__match(all_of, any_of, none_of, newest_first): 
+            base = chunk << CHUNK_BITS
+            for slot in bitmap_slots(bitmap, newest_first): 
+                yield question_ids[base + slot]
+
+    def count(self, all_of: list[str] = (), any_of: list[str] = (), none_of: list[str] = ()) -> int: 
+        if len(all_of) == 1 and not any_of and not none_of: 
+            return self.counts[all_of[0]]
+        return sum(bitmap.bit_count() for _, bitmap in self.__match(all_of, any_of, none_of))
+
+    def __match(self, all_of: list[str], any_of: list[str], none_of: list[str],
+                newest_first: bool = False) -> Iterator[tuple[int, int]]: 
+        # (chunk, bitmap) of every chunk with a match, in slot order
+        required = [self.chunks.get(tag, {}) for tag in all_of]
+        optional = [self.chunks.get(tag, {}) for tag in any_of]
+        excluded = [self.chunks[tag] for tag in none_of if tag in self.chunks]
+        if required: 
+            # the rarest tag drives, and only its chunks can hold a match
+            required.sort(key=len)
+            driver = required[0].keys()
+        elif optional: 
+            driver = set().union(*optional)
+        else: 
+            driver = range(-(-len(self.__question_ids) >> CHUNK_BITS))
+        for chunk in sorted(driver, reverse=newest_first): 
+            if required: 
+                # get, since a retag may have emptied the chunk while a stream was paused
+                bitmap = required[0].get(chunk, 0)
+                for chunks in required[1:]: 
+                    bitmap &= chunks.get(chunk, 0)
+                    if not bitmap: 
+                        break
+            else: 
+                bitmap = self.__full_chunk(chunk)
+            if bitmap and optional: 
+                union = 0
+                for chunks in optional: 
+                    union |= chunks.get(chunk, 0)
+                bitmap &= union
+            for chunks in excluded: 
+                if not bitmap: 
+                    break
+                bitmap &= ~chunks.get(chunk, 0)
+            if bitmap: 
+                yield chunk, bitmap
+
+    def __full_chunk(self, chunk: int) -> int: 
+        # every question slot in the chunk, since questions are never removed
+        size = min(len(self.__question_ids) - (chunk << CHUNK_BITS), 1 << CHUNK_BITS)
+        return (1 << size) - 1
+
+    def __set_tags(self, slot: int, tags: frozenset[str]): 
+        old = self.__tags[slot]
+        if old == tags: 
+            return
+        chunk, bit = slot >> CHUNK_BITS, 1 << (slot & CHUNK_MASK)
+        for tag in old - tags: 
+            chunks = self.chunks[tag]
+            chunks[chunk] &= ~bit
+            if not chunks[chunk]: 
+                del chunks[chunk]
+            self.counts[tag] -= 1
+            if not self.counts[tag]: 
+                del self.counts[tag]
+                del self.chunks[tag]
+        for tag in tags - old: 
+            chunks = self.chunks.setdefault(tag, {})
+            chunks[chunk] = chunks.get(chunk, 0) | bit
+            self.counts[tag] += 1
+        self.__update_related(old, -1)
+        self.__update_related(tags, 1)
+        self.__tags[slot] = tags
+
+    def __update_related(self, tags: frozenset[str], delta: int): 
+        for tag in tags: 
+            related = self.related.setdefault(tag, Counter())
+            for other in tags: 
+                if other != tag: 
+                    related[other] += delta
+                    if not related[other]: 
+                        del related[other]
+            if not related: 
+                del self.related[tag]
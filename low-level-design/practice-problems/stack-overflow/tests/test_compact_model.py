@@ -0,0 +1,48 @@
+import random
+import uuid
+
+from compact_model import ID_SET_THRESHOLD, IdSet
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+
+def test_id_set_keeps_set_semantics_as_it_grows():
+    ids = [uuid.uuid4() for _ in range(ID_SET_THRESHOLD * 2)]
+    id_set = IdSet()
+    assert len(id_set) == 0 and ids[0] not in id_set
+    for count, id in enumerate(ids, start=1):
+        id_set.add(id)
+        id_set.add(id)
+        assert len(id_set) == count
+        assert id_set == set(ids[:count])
+    id_set.discard(ids[0])
+    id_set.discard(uuid.uuid4())
+    assert id_set == set(ids[1:]) and set(ids[1:]) == id_set
+    assert id_set | {ids[0]} == set(ids)
+
+def run_workload(compact: bool) -> StackOverflowSystem:
+    rng = random.Random(5)
+    system = StackOverflowSystem(compact=compact)
+    users = [system.add_user(f"user{i}", f"user{i}@example.com", uuid.UUID(int=i + 1)).id for i in range(10)]
+    questions = [system.add_question(rng.choice(users), f"q{i}", "body", {"tag"}, uuid.UUID(int=1000 + i)).id
+                 for i in range(20)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), "answer", uuid.UUID(int=2000 + i)).id
+               for i in range(80)]
+    posts = questions + answers
+    for i in range(60):
+        system.add_comment(rng.choice(users), rng.choice(posts), "comment", uuid.UUID(int=3000 + i))
+    for _ in range(300):
+        system.vote(rng.choice(users), rng.choice(posts), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+    return system
+
+def test_compact_posts_match_the_object_model():
+    objects, compact = run_workload(False), run_workload(True)
+    for question_id, question in objects.questions.items():
+        assert compact.questions[question_id].answers == question.answers
+        assert compact.questions[question_id].comments == question.comments
+        assert compact.questions[question_id].vote_score == question.vote_score
+    for answer_id, answer in objects.answers.items():
+        assert compact.answers[answer_id].comments == answer.comments
+        assert compact.answers[answer_id].vote_score == answer.vote_score
+    assert {u.id: u.reputation_score for u in compact.users.values()} == {u.id: u.reputation_score for u in objects.users.values()}
+    assert compact.check_consistency() == []
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from feed import FEEDS, FeedIndex, Leaderboard, hotness
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+TAGS = [f"tag{rank}" for rank in range(5)]
+
+
+def brute_force(system: StackOverflowSystem, name: str, k: int, tag: str | None = None) -> list:
+    # sort every question from scratch, newest first on ties like the leaderboards
+    questions = [q for q in system.questions.values() if tag is None or tag in q.tags]
+    sequence = {question_id: position for position, question_id in enumerate(system.questions)}
+    if name == "top":
+        score = lambda q: q.vote_score
+    elif name == "hot":
+        score = lambda q: hotness(q.vote_score, q.created_at.timestamp())
+    else:
+        score = lambda q: len(q.answers)
+    questions.sort(key=lambda q: (score(q), sequence[q.id]), reverse=True)
+    return [q.id for q in questions[:k]]
+
+def test_leaderboard_matches_a_sort():
+    rng = random.Random(3)
+    board = Leaderboard(capacity=8)
+    scores = {}
+    for _ in range(5_000):
+        item = rng.randrange(60)
+        if rng.random() < 0.1:
+            board.remove(item)
+            scores.pop(item, None)
+        else:
+            scores[item] = rng.randrange(-5, 20)
+            board.update(item, scores[item])
+        expected = sorted(scores, key=lambda item: (scores[item], item), reverse=True)
+        assert len(board) == len(scores)
+        assert board.top(5) == expected[:5]
+        assert board.top(20) == expected[:20]
+
+def test_feeds_match_a_full_sort_through_writes():
+    rng = random.Random(23)
+    system = StackOverflowSystem()
+    # small boards, so members drop out and are refilled from the heap
+    system.feeds = FeedIndex(capacity=20)
+    users = [user.id for user in system.import_users([(f"user{i}", f"user{i}@example.com") for i in range(30)])]
+    questions = [system.add_question(rng.choice(users), f"q{i}", "body", set(rng.sample(TAGS, 2))).id for i in range(120)]
+    posts = list(questions)
+    for step in range(3_000):
+        roll = rng.random()
+        if roll < 0.03:
+            question_id = system.add_question(rng.choice(users), "new", "body", set(rng.sample(TAGS, 2))).id
+            questions.append(question_id)
+            posts.append(question_id)
+        elif roll < 0.15:
+            posts.append(system.add_answer(rng.choice(users), rng.choice(questions), "answer").id)
+        elif roll < 0.18:
+            question = system.questions[rng.choice(questions)]
+            system.update_question(question.author_id, question.id, tags=set(rng.sample(TAGS, 2)))
+        else:
+            system.vote(rng.choice(users), rng.choice(posts), VoteType.UPVOTE if rng.random() < 0.7 else VoteType.DOWNVOTE)
+        if step % 100 == 0:
+            for name in FEEDS:
+                for tag in (None, *TAGS):
+                    for k in (10, 60):
+                        assert [q.id for q in system.feed(name, k, tag)] == brute_force(system, name, k, tag), (name, tag, k)
+
+def test_unknown_feeds_and_tags():
+    system = StackOverflowSystem()
+    with pytest.raises(ValueError):
+        system.feed("newest")
+    assert system.feed("top", 10, "no-such-tag") == []
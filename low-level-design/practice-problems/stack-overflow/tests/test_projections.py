@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from search_strategy import KeywordSearchStrategy, TagSearchStrategy
+from snapshot import load_snapshot, save_snapshot
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+TAGS = [f"tag{rank}" for rank in range(10)]
+QUERIES = ["tag1 tag7", "tag3", "tag2 tag4 tag8"]
+
+
+def run(system: StackOverflowSystem, ops: int = 1_500):
+    # a seeded mix of posts, answers, comments, retags and votes
+    rng = random.Random(21)
+    users = [system.add_user(f"user{i}", f"user{i}@example.com") for i in range(20)]
+    questions, posts = [], []
+    for i in range(ops):
+        user = rng.choice(users)
+        choice = rng.random()
+        if choice < 0.15 or not questions:
+            question = system.add_question(user.id, f"q{i}", " ".join(rng.choices(TAGS, k=8)), set(rng.choices(TAGS, k=3)))
+            questions.append(question)
+            posts.append(question.id)
+        elif choice < 0.3:
+            posts.append(system.add_answer(user.id, rng.choice(questions).id, " ".join(rng.choices(TAGS, k=5))).id)
+        elif choice < 0.35:
+            system.add_comment(user.id, rng.choice(posts), "comment")
+        elif choice < 0.4:
+            question = rng.choice(questions)
+            system.update_question(question.author_id, question.id, tags=set(rng.choices(TAGS, k=2)))
+        else:
+            system.vote(user.id, rng.choice(posts), VoteType.UPVOTE if rng.random() < 0.8 else VoteType.DOWNVOTE)
+
+def fingerprint(system: StackOverflowSystem) -> tuple:
+    # every projected view, keyed by titles and usernames so systems with different ids compare equal
+    with system.views_lock:
+        reputations = {user.username: user.reputation_score for user in system.users.values()}
+        tags = {tag: count for tag, count in system.tag_index.counts.items() if count}
+        tagged = [sorted(q.title for q in system.query(TagSearchStrategy([tag]))) for tag in TAGS]
+        feeds = [[q.title for q in system.feed(name, 20, tag)] for name in ("top", "hot", "answered") for tag in (None, "tag0")]
+        searches = [[(system.questions[question_id].title, round(score, 9)) for question_id, score in system.search_index.search(text)]
+                    for text in QUERIES]
+    return reputations, tags, tagged, feeds, searches
+
+def test_background_projections_match_inline_ones():
+    inline = StackOverflowSystem()
+    run(inline)
+    background = StackOverflowSystem(async_projections=True)
+    try:
+        run(background)
+        background.wait_for()
+        assert fingerprint(background) == fingerprint(inline)
+        assert background.check_consistency() == []
+    finally:
+        background.close()
+
+def test_replayed_projections_match_incremental_ones():
+    system = StackOverflowSystem(max_retained_events=None)
+    run(system)
+    expected = fingerprint(system)
+    for name in system.projections.projections:
+        system.projections.replay(name)
+    assert fingerprint(system) == expected
+    assert system.check_consistency() == []
+
+def test_applied_events_are_dropped_by_default():
+    system = StackOverflowSystem()
+    run(system, 600)
+    assert system.events.head == system.projections.offset
+    assert system.events.head - system.events.base < 600
+    with pytest.raises(ValueError):
+        system.projections.replay("tags")
+
+def test_read_your_writes_with_background_projections():
+    system = StackOverflowSystem(async_projections=True)
+    try:
+        author = system.add_user("author", "author@example.com")
+        for i in range(50):
+            question = system.add_question(author.id, f"q{i}", f"word{i} zyzzyva{i}", {f"t{i}"})
+            system.wait_for()
+            assert system.search_questions([KeywordSearchStrategy([f"zyzzyva{i}"])]) == [question]
+            assert list(system.query(TagSearchStrategy([f"t{i}"]))) == [question]
+        system.vote(author.id, question.id, VoteType.UPVOTE)
+        system.wait_for()
+        assert author.reputation_score == 1
+    finally:
+        system.close()
+
+def test_restored_questions_are_tagged_once(tmp_path):
+    source = StackOverflowSystem()
+    run(source, 400)
+    path = str(tmp_path / "system.snap")
+    save_snapshot(source, path)
+    restored = load_snapshot(path)
+    assert fingerprint(restored) == fingerprint(source)
+    for tag in TAGS:
+        assert restored.tag_index.count(any_of=[tag]) == source.tag_index.count(any_of=[tag])
@@ -0,0 +1,61 @@
+import pytest
+
+from query_planner import QueryPlanner
+from search_strategy import KeywordSearchStrategy, PredicateSearchStrategy, TagSearchStrategy, UserSearchStrategy
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+
+def build_system() -> tuple[StackOverflowSystem, list]:
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(4)]
+    for i in range(200):
+        tags = {"common"} | ({"rare"} if i % 50 == 0 else set())
+        system.add_question(users[i % 4], f"q{i}", f"body{i % 10}", tags)
+    return system, users
+
+def test_the_most_selective_index_drives():
+    system, users = build_system()
+    checked = []
+    popular = PredicateSearchStrategy(lambda question: checked.append(question) or True, "checked")
+    rare = TagSearchStrategy(["rare"])
+    strategy = TagSearchStrategy(["common"]) & popular & rare & UserSearchStrategy(users[:2])
+    plan = QueryPlanner(system).plan(strategy)
+    assert plan.driver is rare and plan.estimate == 4
+    assert [part.describe() for part in plan.filters][-1] == "checked"
+    assert "driver: tags any of ['rare'] (~4 candidate(s))" in system.explain(strategy)
+    assert [q.title for q in system.query(strategy)] == ["q0", "q100"]
+    # the predicate only ever sees what the cheaper filters let through
+    assert [q.title for q in checked] == ["q0", "q100"]
+
+def test_predicates_alone_scan_lazily():
+    system, _ = build_system()
+    checked = []
+    strategy = PredicateSearchStrategy(lambda question: checked.append(question) or True, "any")
+    assert QueryPlanner(system).plan(strategy).driver is None
+    assert len(list(system.query(strategy, limit=5))) == 5
+    assert len(checked) == 5
+    assert [q.title for q in system.query(strategy, sort="recency", limit=2)] == ["q199", "q198"]
+
+def test_sorts_and_pages():
+    system, users = build_system()
+    for i, question_id in enumerate(list(system.questions)[:30]):
+        for user_id in users[:i % 4]:
+            system.vote(user_id, question_id, VoteType.UPVOTE)
+    strategy = KeywordSearchStrategy(["body3", "body7"]) & TagSearchStrategy(["common"])
+    everything = [q for q in system.questions.values() if q.content in ("body3", "body7")]
+    by_score = sorted(everything, key=lambda q: q.vote_score, reverse=True)
+    assert [q.vote_score for q in system.query(strategy, sort="score", offset=3, limit=10)] == [q.vote_score for q in by_score[3:13]]
+    by_recency = sorted(everything, key=lambda q: q.created_at, reverse=True)
+    assert [q.id for q in system.query(strategy, sort="recency", offset=2, limit=5)] == [q.id for q in by_recency[2:7]]
+    with pytest.raises(ValueError):
+        list(system.query(strategy, sort="votes", limit=5))
+
+def test_unbounded_streams_survive_writes():
+    system, users = build_system()
+    stream = system.query(TagSearchStrategy(["common"]) & PredicateSearchStrategy(lambda question: True))
+    seen = [next(stream) for _ in range(10)]
+    for i in range(20):
+        system.add_question(users[0], f"late{i}", "body", {"common"})
+    seen.extend(stream)
+    assert len(seen) == len({q.id for q in seen}) >= 200
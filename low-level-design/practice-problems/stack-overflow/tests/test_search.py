@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from search_index import question_text, tokenize
+from search_strategy import KeywordSearchStrategy, PredicateSearchStrategy, TagSearchStrategy, UserSearchStrategy
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+WORDS = [f"word{rank}" for rank in range(30)]
+TAGS = [f"tag{rank}" for rank in range(12)]
+
+
+def build_system(seed: int = 11, questions: int = 300) -> tuple[StackOverflowSystem, list]:
+    rng = random.Random(seed)
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(20)]
+    for i in range(questions):
+        question = system.add_question(rng.choice(users), f"question {i}", " ".join(rng.choices(WORDS, k=6)),
+                                       set(rng.sample(TAGS, 3)))
+        for _ in range(rng.randrange(3)):
+            system.add_answer(rng.choice(users), question.id, " ".join(rng.choices(WORDS, k=4)))
+    for _ in range(600):
+        system.vote(rng.choice(users), rng.choice(list(system.questions)), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+    return system, users
+
+def ids(questions) -> set:
+    return {question.id for question in questions}
+
+def test_indexed_queries_match_a_scan():
+    system, users = build_system()
+    popular = PredicateSearchStrategy(lambda question: question.vote_score >= 1, "vote_score >= 1")
+    queries = [
+        TagSearchStrategy(["tag0"]) & UserSearchStrategy(users[:3]),
+        (TagSearchStrategy(["tag1"]) | TagSearchStrategy(["tag2"])) & ~TagSearchStrategy(["tag0"]) & popular,
+        UserSearchStrategy(users[:5]) & ~popular,
+        TagSearchStrategy(["tag5", "tag9"], match_all=True) | UserSearchStrategy(users[:1]),
+        KeywordSearchStrategy(["word3", "word7"], match_all=True) & TagSearchStrategy(["tag4"]),
+        KeywordSearchStrategy(["word1"]) & ~popular,
+    ]
+    questions = list(system.questions.values())
+    for query in queries:
+        expected = query.filter(questions, system)
+        assert ids(system.query(query)) == ids(expected)
+        top = list(system.query(query, sort="score", limit=10))
+        assert [q.vote_score for q in top] == sorted((q.vote_score for q in expected), reverse=True)[:10]
+        newest = list(system.query(query, sort="recency", offset=5, limit=10))
+        assert [q.created_at for q in newest] == sorted((q.created_at for q in expected), reverse=True)[5:15]
+
+def test_keyword_filter_reads_the_same_document_as_the_index():
+    system, _ = build_system(questions=120)
+    questions = list(system.questions.values())
+    for word in WORDS[:10]:
+        strategy = KeywordSearchStrategy([word])
+        assert ids(strategy.filter(questions, system)) == system.search_index.matching([word])
+        assert ids(system.search_questions([strategy])) == system.search_index.matching([word])
+
+def test_keyword_found_only_in_an_answer():
+    system = StackOverflowSystem()
+    user = system.add_user("user", "user@example.com")
+    question = system.add_question(user.id, "title", "content", {"python"})
+    system.add_answer(user.id, question.id, "use a generator")
+    strategy = KeywordSearchStrategy(["generator"])
+    assert strategy.filter([question], system) == [question]
+    assert strategy.matches(question, system)
+    assert system.search_questions([strategy]) == [question]
+    with pytest.raises(ValueError):
+        strategy.filter([question])
+
+def test_index_matches_tokenized_documents():
+    system, _ = build_system(questions=120)
+    for terms in (["word0"], ["word2", "word5"], ["question", "word9"]):
+        expected = set()
+        for question in system.questions.values():
+            tokens = set(tokenize(question_text(question)))
+            for answer_id in question.answers:
+                tokens.update(tokenize(system.answers[answer_id].content))
+            if tokens.intersection(terms):
+                expected.add(question.id)
+        assert system.search_index.matching(terms) == expected
@@ -0,0 +1,127 @@
+import random
+import uuid
+
+from search_cache import SearchCache
+from search_strategy import KeywordSearchStrategy, PredicateSearchStrategy, TagSearchStrategy, UserSearchStrategy
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+TAGS = [f"tag{rank}" for rank in range(6)]
+WORDS = [f"word{rank}" for rank in range(12)]
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def queries(users: list[uuid.UUID]) -> list:
+    popular = PredicateSearchStrategy(lambda question: question.vote_score >= 1, "vote_score >= 1")
+    return [
+        (TagSearchStrategy(["tag0"]), "score", 5),
+        (TagSearchStrategy(["tag1", "tag2"]), "recency", 5),
+        (TagSearchStrategy(["tag3"]) & UserSearchStrategy(users[:2]), "score", 5),
+        (~TagSearchStrategy(["tag4"]), "recency", 5),
+        (KeywordSearchStrategy(["word1", "word2"]), "score", 5),
+        (KeywordSearchStrategy(["word3"]) & TagSearchStrategy(["tag5"]), None, 10),
+        (TagSearchStrategy(["tag0"]) & popular, "score", 5),
+    ]
+
+def results(system: StackOverflowSystem, users: list[uuid.UUID]) -> list:
+    pages = [[q.id for q in system.query(strategy, sort, 0, limit)] for strategy, sort, limit in queries(users)]
+    searches = [[q.id for q in system.search_questions([KeywordSearchStrategy(words, limit=5)])]
+                for words in (["word0"], ["word4", "word5"])]
+    return pages + searches
+
+def operations(users: list[uuid.UUID], count: int) -> list[tuple]:
+    # a seeded mix of writes, drawn up front so two systems can replay the same ones
+    rng = random.Random(19)
+    questions, posts, result = [], [], []
+    for step in range(count):
+        choice, user_id, post_id = rng.random(), rng.choice(users), uuid.UUID(int=10_000 + step)
+        text = " ".join(rng.choices(WORDS, k=4))
+        if choice < 0.2 or not questions:
+            result.append(("question", user_id, post_id, text, set(rng.sample(TAGS, 2))))
+            questions.append(post_id)
+            posts.append(post_id)
+        elif choice < 0.35:
+            result.append(("answer", user_id, post_id, text, rng.choice(questions)))
+            posts.append(post_id)
+        elif choice < 0.45:
+            result.append(("retag", user_id, rng.choice(questions), text, {rng.choice(TAGS)}))
+        else:
+            result.append(("vote", user_id, rng.choice(posts), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE])))
+    return result
+
+def apply(system: StackOverflowSystem, operation: tuple):
+    match operation:
+        case ("question", user_id, post_id, text, tags):
+            system.add_question(user_id, f"q{post_id.int}", text, tags, post_id)
+        case ("answer", user_id, post_id, text, question_id):
+            system.add_answer(user_id, question_id, text, post_id)
+        case ("retag", _, question_id, text, tags):
+            system.update_question(system.questions[question_id].author_id, question_id, content=text, tags=tags)
+        case ("vote", user_id, post_id, type):
+            system.vote(user_id, post_id, type)
+
+def test_cached_results_match_uncached_ones_through_writes():
+    cached, uncached = StackOverflowSystem(), StackOverflowSystem(search_cache=SearchCache(max_entries=0))
+    users = [uuid.UUID(int=i + 1) for i in range(6)]
+    for system in (cached, uncached):
+        for i, user_id in enumerate(users):
+            system.add_user(f"user{i}", f"user{i}@example.com", user_id)
+    for operation in operations(users, 600):
+        apply(cached, operation)
+        apply(uncached, operation)
+        assert results(cached, users) == results(uncached, users)
+    assert cached.search_cache.hits > 0 and cached.search_cache.invalidations > 0
+
+def test_writes_drop_only_the_results_they_touch():
+    system = StackOverflowSystem()
+    author = system.add_user("author", "author@example.com")
+    python = system.add_question(author.id, "python", "generators", {"python"})
+    system.add_question(author.id, "rust", "lifetimes", {"rust"})
+    rust = TagSearchStrategy(["rust"])
+    assert [q.title for q in system.query(rust, limit=10)] == ["rust"]
+    assert [q.title for q in system.query(TagSearchStrategy(["python"]), limit=10)] == ["python"]
+    system.update_question(author.id, python.id, tags={"python", "rust"})
+    hits = system.search_cache.hits
+    assert sorted(q.title for q in system.query(rust, limit=10)) == ["python", "rust"]
+    assert system.search_cache.hits == hits
+    # an answer changes no tags, the cached tag page stays
+    system.add_answer(author.id, python.id, "borrow checker")
+    assert sorted(q.title for q in system.query(rust, limit=10)) == ["python", "rust"]
+    assert system.search_cache.hits == hits + 1
+    assert system.search_questions([KeywordSearchStrategy(["borrow"])]) == [python]
+
+def test_votes_reorder_cached_score_pages():
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com") for i in range(3)]
+    first = system.add_question(users[0].id, "first", "body", {"tag"})
+    second = system.add_question(users[0].id, "second", "body", {"tag"})
+    system.vote(users[1].id, first.id, VoteType.UPVOTE)
+    page = lambda: [q.id for q in system.query(TagSearchStrategy(["tag"]), "score", 0, 1)]
+    assert page() == [first.id]
+    system.vote(users[1].id, second.id, VoteType.UPVOTE)
+    system.vote(users[2].id, second.id, VoteType.UPVOTE)
+    assert page() == [second.id]
+    system.vote_many([(users[2].id, first.id, VoteType.UPVOTE), (users[0].id, first.id, VoteType.UPVOTE)])
+    assert page() == [first.id]
+
+def test_expiry_eviction_and_unbounded_queries():
+    clock = ManualClock()
+    system = StackOverflowSystem(search_cache=SearchCache(max_entries=2, ttl=10, clock=clock))
+    author = system.add_user("author", "author@example.com")
+    for tag in ("a", "b", "c"):
+        system.add_question(author.id, tag, "body", {tag})
+    list(system.query(TagSearchStrategy(["a"])))
+    assert len(system.search_cache) == 0
+    for tag in ("a", "b", "c"):
+        list(system.query(TagSearchStrategy([tag]), limit=5))
+    assert len(system.search_cache) == 2 and system.search_cache.evictions == 1
+    clock.now = 11
+    list(system.query(TagSearchStrategy(["c"]), limit=5))
+    assert system.search_cache.expirations == 1
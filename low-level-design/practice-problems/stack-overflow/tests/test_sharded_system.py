@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from search_strategy import KeywordSearchStrategy, TagSearchStrategy
+from sharded_system import ShardedStackOverflowSystem
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+TAGS = [f"tag{rank}" for rank in range(15)]
+
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(TAGS, k=k))
+
+@pytest.fixture(scope="module")
+def systems():
+    # the same seeded workload on two shards and on one process, replayed with the same ids
+    rng = random.Random(11)
+    sharded, reference = ShardedStackOverflowSystem(2, result_capacity=500), StackOverflowSystem()
+    users = []
+    for i in range(20):
+        user_id = sharded.add_user(f"user{i}", f"user{i}@example.com")
+        reference.add_user(f"user{i}", f"user{i}@example.com", user_id)
+        users.append(user_id)
+    questions = []
+    for i in range(300):
+        author, content, tags = rng.choice(users), words(rng, 8), set(rng.sample(TAGS, 3))
+        question_id = sharded.add_question(author, f"question {i}", content, tags)
+        reference.add_question(author, f"question {i}", content, tags, question_id)
+        questions.append(question_id)
+    posts = list(questions)
+    for _ in range(150):
+        author, question_id, content = rng.choice(users), rng.choice(questions), words(rng, 6)
+        answer_id = sharded.add_answer(author, question_id, content)
+        reference.add_answer(author, question_id, content, answer_id)
+        posts.append(answer_id)
+    for _ in range(2_000):
+        voter, post_id = rng.choice(users), rng.choice(posts)
+        if rng.random() < 0.1:
+            sharded.retract_vote(voter, post_id)
+            reference.retract_vote(voter, post_id)
+        else:
+            type = rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE])
+            sharded.vote(voter, post_id, type)
+            reference.vote(voter, post_id, type)
+    with sharded:
+        yield sharded, reference, users
+
+def test_reputations_add_up_across_shards(systems):
+    sharded, reference, users = systems
+    for user_id in users:
+        assert sharded.reputation(user_id) == reference.users[user_id].reputation_score
+
+def test_queries_match_one_process(systems):
+    sharded, reference, _ = systems
+    for strategy in (TagSearchStrategy(["tag1"]), TagSearchStrategy(["tag2", "tag3"], match_all=True),
+                     KeywordSearchStrategy(["tag4"]) & TagSearchStrategy(["tag5"])):
+        expected = {q.id for q in strategy.search(reference)}
+        assert set(sharded.query(strategy, limit=500)) == expected
+        top = sharded.query(strategy, sort="score", offset=2, limit=10)
+        assert [reference.questions[question_id].vote_score for question_id in top] == \
+            [q.vote_score for q in reference.query(strategy, sort="score", offset=2, limit=10)]
+
+def test_search_scores_match_one_index(systems):
+    sharded, reference, _ = systems
+    rng = random.Random(12)
+    for _ in range(30):
+        text = words(rng, 2)
+        # shards score with the summed corpus statistics, so the merged ranking is the unsharded one up to ties
+        assert [round(score, 9) for _, score in sharded.search(text)] == \
+            [round(score, 9) for _, score in reference.search_index.search(text)]
+
+def test_oversized_pages_are_refused(systems):
+    sharded, _, _ = systems
+    with pytest.raises(ValueError):
+        sharded.search("tag1", k=501)
+    with pytest.raises(ValueError):
+        sharded.query(TagSearchStrategy(["tag1"]), offset=1, limit=500)
+    with pytest.raises(ValueError):
+        sharded.add_user("USER1", "new@example.com")
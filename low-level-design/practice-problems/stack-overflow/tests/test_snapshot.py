@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from search_strategy import TagSearchStrategy
+from snapshot import PendingText, SnapshotError, load_snapshot, save_snapshot
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+WORDS = [f"w{rank}" for rank in range(40)]
+
+
+def build_system(compact: bool) -> StackOverflowSystem:
+    rng = random.Random(17)
+    system = StackOverflowSystem(compact=compact)
+    users = [user.id for user in system.import_users([(f"User{i}", f"user{i}@example.com") for i in range(15)])]
+    questions = [system.add_question(rng.choice(users), " ".join(rng.choices(WORDS, k=4)), " ".join(rng.choices(WORDS, k=12)) + " é",
+                                     {f"tag{rng.randrange(8)}" for _ in range(rng.randrange(4))}).id
+                 for _ in range(40)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), " ".join(rng.choices(WORDS, k=6))).id for _ in range(60)]
+    posts = questions + answers
+    for _ in range(30):
+        system.add_comment(rng.choice(users), rng.choice(posts), " ".join(rng.choices(WORDS, k=3)))
+    for _ in range(400):
+        system.vote(rng.choice(users), rng.choice(posts), VoteType.UPVOTE if rng.random() < 0.8 else VoteType.DOWNVOTE)
+    return system
+
+def state(system: StackOverflowSystem) -> dict:
+    return {
+        "users": {u.id: (u.username, u.email, u.reputation_score) for u in system.users.values()},
+        "questions": {q.id: (q.author_id, q.title, q.content, q.tags, q.created_at, q.vote_score, set(q.answers), set(q.comments),
+                             {voter: vote.type for voter, vote in q.votes.items()}) for q in system.questions.values()},
+        "answers": {a.id: (a.author_id, a.question_id, a.content, a.vote_score, set(a.comments),
+                           {voter: vote.type for voter, vote in a.votes.items()}) for a in system.answers.values()},
+        "comments": {c.id: (c.author_id, c.post_id, c.content) for c in system.comments.values()},
+    }
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("lazy", [False, True])
+def test_round_trip(tmp_path, compact: bool, lazy: bool):
+    source = build_system(compact)
+    path = str(tmp_path / "system.snap")
+    save_snapshot(source, path)
+    system = load_snapshot(path, lazy=lazy, rebuild_search_index=True)
+    assert system.compact == compact
+    assert state(system) == state(source)
+    assert system.check_consistency() == []
+    assert system.get_user_by_username("user3").id == source.get_user_by_username("user3").id
+    for tags in (["tag1"], ["tag2", "tag5"]):
+        strategy = TagSearchStrategy(tags, match_all=True)
+        assert [q.id for q in system.query(strategy, sort="recency")] == [q.id for q in source.query(strategy, sort="recency")]
+    assert system.search_index.search("w1 w2", 10) == source.search_index.search("w1 w2", 10)
+
+def test_lazy_load_leaves_bodies_undecoded_by_default(tmp_path):
+    source = build_system(False)
+    path = str(tmp_path / "system.snap")
+    save_snapshot(source, path)
+    system = load_snapshot(path, lazy=True)
+    assert len(system.search_index) == 0
+    assert all(type(question.__dict__["content"]) is PendingText for question in system.questions.values())
+    system.rebuild_search_index()
+    assert system.search_index.search("w3", 5) == source.search_index.search("w3", 5)
+    assert len(load_snapshot(path).search_index) == len(source.questions)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.snap"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
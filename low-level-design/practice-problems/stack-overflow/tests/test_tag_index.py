@@ -0,0 +1,70 @@
+import itertools
+import random
+import uuid
+from collections import Counter
+
+from question import Question
+from search_strategy import TagSearchStrategy
+from stack_overflow_system import StackOverflowSystem
+from tag_index import TagIndex
+
+TAGS = [f"tag{rank}" for rank in range(40)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(TAGS))))
+
+
+def random_tags(rng: random.Random) -> set[str]:
+    return set(rng.choices(TAGS, cum_weights=CUM_WEIGHTS, k=3))
+
+def build_index() -> tuple[TagIndex, list[Question]]:
+    # enough questions to span several bitmap chunks, then retags
+    rng = random.Random(5)
+    author = uuid.uuid4()
+    index = TagIndex()
+    questions = [Question(author, f"q{i}", "body", random_tags(rng)) for i in range(10_000)]
+    for question in questions:
+        index.add_question(question)
+    for _ in range(2_000):
+        question = rng.choice(questions)
+        question.update_tags(random_tags(rng))
+        index.update_question(question)
+    return index, questions
+
+def test_counts_and_related_tags_match_a_recount():
+    index, questions = build_index()
+    assert +index.counts == Counter(tag for question in questions for tag in question.tags)
+    related = Counter()
+    for question in questions:
+        for a, b in itertools.permutations(question.tags, 2):
+            related[a, b] += 1
+    assert {(a, b): count for a, counter in index.related.items() for b, count in counter.items() if count} == +related
+
+def test_queries_match_a_scan():
+    index, questions = build_index()
+    rng = random.Random(8)
+    for _ in range(60):
+        all_of = rng.sample(TAGS[:10], rng.randrange(3))
+        any_of = rng.sample(TAGS[:20], rng.randrange(3))
+        none_of = rng.sample(TAGS[:15], rng.randrange(2))
+        if not all_of and not any_of:
+            continue
+        expected = [question.id for question in questions
+                    if all(tag in question.tags for tag in all_of)
+                    and (not any_of or any(tag in question.tags for tag in any_of))
+                    and not any(tag in question.tags for tag in none_of)]
+        assert index.query(all_of, any_of, none_of) == expected
+        assert list(index.iter_query(all_of, any_of, none_of, newest_first=True)) == expected[::-1]
+        assert index.count(all_of, any_of, none_of) == len(expected)
+        assert index.query(all_of, any_of, none_of, offset=7, limit=25) == expected[7:32]
+
+def test_strategy_search_matches_filter():
+    rng = random.Random(9)
+    system = StackOverflowSystem()
+    user = system.add_user("user", "user@example.com")
+    for i in range(500):
+        system.add_question(user.id, f"q{i}", "body", random_tags(rng))
+    questions = list(system.questions.values())
+    for _ in range(30):
+        tags, excluded = rng.sample(TAGS[:12], 2), rng.sample(TAGS[:6], 1)
+        for match_all in (True, False):
+            strategy = TagSearchStrategy(tags, match_all=match_all, excluded_tags=excluded)
+            assert strategy.search(system) == strategy.filter(questions, system)
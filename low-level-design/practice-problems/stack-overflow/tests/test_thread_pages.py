@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+PAGE_SIZE = 7
+
+
+def build_system() -> tuple[StackOverflowSystem, object, list, random.Random]:
+    rng = random.Random(29)
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(25)]
+    question = system.add_question(users[0], "hot", "body", {"tag"})
+    for i in range(60):
+        answer = system.add_answer(rng.choice(users), question.id, f"answer {i}")
+        for _ in range(rng.randrange(3)):
+            system.add_comment(rng.choice(users), answer.id, "comment")
+    for _ in range(400):
+        system.vote(rng.choice(users), rng.choice(sorted(question.answers)), rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+    return system, question, users, rng
+
+def pages(system: StackOverflowSystem, question, order: str, between=None) -> list:
+    result, cursor = [], None
+    while True:
+        page = system.thread(question.id, order, cursor, PAGE_SIZE)
+        result.extend(answer.id for answer in page.answers)
+        if page.next_cursor is None:
+            return result
+        cursor = page.next_cursor
+        if between:
+            between()
+
+def test_pages_cover_the_thread_in_order():
+    system, question, _, _ = build_system()
+    arrival = {answer_id: seq for seq, answer_id in enumerate(system.answers)}
+    answers = [system.answers[answer_id] for answer_id in question.answers]
+    by_score = [a.id for a in sorted(answers, key=lambda answer: (-answer.vote_score, arrival[answer.id]))]
+    assert pages(system, question, "score") == by_score
+    assert pages(system, question, "chronological") == sorted(by_score, key=arrival.__getitem__)
+
+def test_writes_between_pages_leave_no_gaps_or_duplicates():
+    system, question, users, rng = build_system()
+    answers = sorted(question.answers)
+    rescored = set()
+
+    def write():
+        for _ in range(5):
+            answer_id = rng.choice(answers)
+            before = system.answers[answer_id].vote_score
+            system.vote(rng.choice(users), answer_id, rng.choice([VoteType.UPVOTE, VoteType.DOWNVOTE]))
+            if system.answers[answer_id].vote_score != before:
+                rescored.add(answer_id)
+        system.add_answer(rng.choice(users), question.id, "late answer")
+
+    returned = pages(system, question, "score", write)
+    # an answer that was re-scored may move across the cursor; every other one comes back exactly once
+    unchanged = set(answers) - rescored
+    assert unchanged and rescored
+    assert sorted(answer_id for answer_id in returned if answer_id in unchanged) == sorted(unchanged)
+
+    original = list(system.threads.page(question.id, "chronological", None, 10_000)[0])
+    returned = pages(system, question, "chronological", write)
+    assert returned[:len(original)] == original
+    assert len(returned) == len(set(returned))
+
+def test_page_comments_and_bad_cursors():
+    system, question, _, _ = build_system()
+    page = system.thread(question.id, "score", None, PAGE_SIZE, comments_per_post=1)
+    assert page.total_answers == len(question.answers)
+    for answer in page.answers:
+        comments = [comment for comment in system.comments.values() if comment.post_id == answer.id]
+        assert page.comments[answer.id] == comments[:1]
+    with pytest.raises(ValueError):
+        system.thread(question.id, "chronological", page.next_cursor, PAGE_SIZE)
+    with pytest.raises(ValueError):
+        system.thread(question.id, "score", "score:x:1", PAGE_SIZE)
+    with pytest.raises(ValueError):
+        system.thread(question.id, "newest")
+    with pytest.raises(KeyError):
+        system.thread(page.answers[0].id)
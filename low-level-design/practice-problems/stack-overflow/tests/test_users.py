@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from stack_overflow_system import StackOverflowSystem
+from user import User
+
+
+def test_racing_signups_take_a_username_once():
+    system = StackOverflowSystem()
+    start = threading.Barrier(8)
+    created, refused = [], []
+
+    def sign_up(i: int):
+        start.wait()
+        try:
+            created.append(system.add_user(" Alice ", f"alice{i}@example.com"))
+        except ValueError:
+            refused.append(i)
+
+    threads = [threading.Thread(target=sign_up, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and len(refused) == 7
+    assert system.get_user_by_username("ALICE") is created[0]
+    assert len(system.users) == len(system.users_by_email) == 1
+
+def test_import_is_all_or_nothing():
+    system = StackOverflowSystem()
+    system.add_user("bob", "bob@example.com")
+    with pytest.raises(ValueError):
+        system.import_users([("carol", "carol@example.com"), ("Bob", "bob2@example.com")])
+    with pytest.raises(ValueError):
+        system.import_users([("dave", "dave@example.com"), ("DAVE", "dave2@example.com")])
+    assert len(system.users) == 1
+    users = system.import_users([("carol", "carol@example.com"), ("dave", "dave@example.com")])
+    assert [system.get_user_by_email(f"{name.upper()}@EXAMPLE.COM") for name in ("carol", "dave")] == users
+
+def test_restored_users_are_indexed_for_signups():
+    system = StackOverflowSystem()
+    system.restore([User("Erin", "Erin@example.com")], [], [], [], [])
+    assert system.get_user_by_username("erin") is not None
+    with pytest.raises(ValueError):
+        system.add_user("ERIN", "other@example.com")
+    with pytest.raises(ValueError):
+        system.add_user("other", "erin@EXAMPLE.com")
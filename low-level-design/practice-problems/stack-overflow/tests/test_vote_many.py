@@ -0,0 +1,94 @@
+import random
+import threading
+import uuid
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteOutcome, VoteType
+from vote_buffer import VoteBuffer
+
+UP, DOWN = VoteType.UPVOTE, VoteType.DOWNVOTE
+
+
+def build_system(count: int = 4) -> tuple[StackOverflowSystem, list, list]:
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com", uuid.UUID(int=i + 1)).id for i in range(count)]
+    question = system.add_question(users[0], "question", "body", {"tag"}, uuid.UUID(int=100))
+    answer = system.add_answer(users[1], question.id, "answer", uuid.UUID(int=200))
+    return system, users, [question.id, answer.id]
+
+def test_outcomes():
+    system, users, (question, answer) = build_system()
+    system.vote(users[3], answer, UP)
+    outcomes = system.vote_many([
+        (users[1], question, DOWN),
+        (users[1], question, UP),
+        (uuid.uuid4(), question, UP),
+        (users[2], uuid.uuid4(), UP),
+        (users[3], answer, UP),
+        (users[2], answer, None),
+        (users[2], question, UP),
+    ])
+    assert outcomes == [
+        VoteOutcome.SUPERSEDED,
+        VoteOutcome.APPLIED,
+        VoteOutcome.UNKNOWN_USER,
+        VoteOutcome.UNKNOWN_POST,
+        VoteOutcome.UNCHANGED,
+        VoteOutcome.UNCHANGED,
+        VoteOutcome.APPLIED,
+    ]
+    assert system.questions[question].vote_score == 2
+    assert system.answers[answer].vote_score == 1
+    assert system.users[users[0]].reputation_score == 2
+    assert system.users[users[1]].reputation_score == 1
+
+def test_only_the_last_vote_per_user_and_post_counts():
+    system, users, (question, _) = build_system()
+    outcomes = system.vote_many([(users[1], question, UP), (users[1], question, None), (users[1], question, DOWN)])
+    assert outcomes == [VoteOutcome.SUPERSEDED, VoteOutcome.SUPERSEDED, VoteOutcome.APPLIED]
+    assert system.questions[question].vote_score == -1
+    outcomes = system.vote_many([(users[1], question, DOWN), (users[1], question, None)])
+    assert outcomes == [VoteOutcome.SUPERSEDED, VoteOutcome.APPLIED]
+    assert system.questions[question].vote_score == 0
+    assert system.users[users[0]].reputation_score == 0
+
+def test_batches_match_the_same_votes_one_by_one():
+    rng = random.Random(23)
+    batched, users, posts = build_system(12)
+    single, _, _ = build_system(12)
+    votes = [(rng.choice(users), rng.choice(posts), rng.choice([UP, DOWN, None])) for _ in range(2_000)]
+    for start in range(0, len(votes), 97):
+        batched.vote_many(votes[start:start + 97])
+    for user_id, post_id, type in votes:
+        if type is None:
+            single.retract_vote(user_id, post_id)
+        else:
+            single.vote(user_id, post_id, type)
+    for post_id in posts:
+        post = batched.questions.get(post_id) or batched.answers[post_id]
+        expected = single.questions.get(post_id) or single.answers[post_id]
+        assert post.vote_score == expected.vote_score
+        assert {voter: vote.type for voter, vote in post.votes.items()} == {voter: vote.type for voter, vote in expected.votes.items()}
+    assert {u.id: u.reputation_score for u in batched.users.values()} == {u.id: u.reputation_score for u in single.users.values()}
+    assert batched.check_consistency() == []
+
+def test_buffered_votes_from_many_threads():
+    system, users, (question, answer) = build_system(40)
+    with VoteBuffer(system, max_votes=16, max_delay=0.001) as buffer:
+        pending = []
+        lock = threading.Lock()
+
+        def vote(user_id):
+            mine = [buffer.submit(user_id, question, UP), buffer.submit(user_id, answer, DOWN)]
+            with lock:
+                pending.extend(mine)
+
+        threads = [threading.Thread(target=vote, args=(user_id,)) for user_id in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert {vote.result(1) for vote in pending} == {VoteOutcome.APPLIED}
+    assert system.questions[question].vote_score == len(users)
+    assert system.answers[answer].vote_score == -len(users)
+    assert system.check_consistency() == []
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_running_scores_match_a_recount(compact: bool):
+    rng = random.Random(11)
+    system = StackOverflowSystem(compact=compact)
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(30)]
+    questions = [system.add_question(rng.choice(users), f"q{i}", "body", set()).id for i in range(40)]
+    posts = questions + [system.add_answer(rng.choice(users), rng.choice(questions), "answer").id for _ in range(40)]
+    for _ in range(5_000):
+        user_id, post_id = rng.choice(users), rng.choice(posts)
+        type = rng.choice([VoteType.UPVOTE, VoteType.UPVOTE, VoteType.DOWNVOTE, None])
+        if type is None:
+            system.retract_vote(user_id, post_id)
+        else:
+            system.vote(user_id, post_id, type)
+    assert system.check_consistency() == []
+    for user_id in users:
+        expected = sum((system.questions.get(post_id) or system.answers[post_id]).recompute_vote_score()
+                       for post_id in system.posts_by_author[user_id])
+        assert system.users[user_id].reputation_score == expected
+
+def test_repeated_and_changed_votes():
+    system = StackOverflowSystem()
+    author, voter = system.add_user("author", "author@example.com"), system.add_user("voter", "voter@example.com")
+    question = system.add_question(author.id, "q", "body", set())
+    system.vote(voter.id, question.id, VoteType.UPVOTE)
+    system.vote(voter.id, question.id, VoteType.UPVOTE)
+    assert (question.vote_score, author.reputation_score) == (1, 1)
+    system.vote(voter.id, question.id, VoteType.DOWNVOTE)
+    assert (question.vote_score, author.reputation_score) == (-1, -1)
+    system.retract_vote(voter.id, question.id)
+    system.retract_vote(voter.id, question.id)
+    assert (question.vote_score, author.reputation_score) == (0, 0)
+    author.update_rep_score(42)
+    system.update_user_rep_score(author.id)
+    assert author.reputation_score == 0
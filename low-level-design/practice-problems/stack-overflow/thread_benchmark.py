@@ -0,0 +1,94 @@
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+NUM_USERS = 500
+NUM_ANSWERS = 5_000
+NUM_VOTES = 50_000
+NUM_COMMENTS = 10_000
+PAGE_SIZE = 20
+SEED = 17
+
+def build_system(rng: random.Random, num_answers: int):
+    # one hot question with thousands of answers, plus a quiet one
+    system = StackOverflowSystem()
+    users = [user.id for user in system.import_users([(f"user{i}", f"user{i}@example.com") for i in range(NUM_USERS)])]
+    hot = system.add_question(users[0], "hot", "hot question", {"tag"})
+    quiet = system.add_question(users[1], "quiet", "quiet question", {"tag"})
+    answers = [system.add_answer(rng.choice(users), hot.id, f"answer {i}").id for i in range(num_answers)]
+    answers.append(system.add_answer(users[2], quiet.id, "only answer").id)
+    posts = [hot.id] + answers
+    for _ in range(NUM_COMMENTS):
+        system.add_comment(rng.choice(users), rng.choice(posts), "comment")
+    vote(system, rng, users, answers, NUM_VOTES)
+    return system, users, hot, answers
+
+def vote(system: StackOverflowSystem, rng: random.Random, users: list, answers: list, count: int):
+    for _ in range(count):
+        system.vote(rng.choice(users), rng.choice(answers), VoteType.UPVOTE if rng.random() < 0.7 else VoteType.DOWNVOTE)
+
+def naive_page(system: StackOverflowSystem, question, limit: int) -> list:
+    # what rendering used to cost: resolve every answer and comment, then sort
+    answers = [system.answers[answer_id] for answer_id in question.answers]
+    arrival = {answer_id: seq for seq, answer_id in enumerate(system.answers)}
+    answers.sort(key=lambda answer: (-answer.vote_score, arrival[answer.id]))
+    posts = {question.id} | {answer.id for answer in answers[:limit]}
+    comments = [comment for comment in system.comments.values() if comment.post_id in posts]
+    return answers[:limit], comments
+
+def all_pages(system: StackOverflowSystem, question, order: str) -> list:
+    result, cursor = [], None
+    while True:
+        page = system.thread(question.id, order, cursor, PAGE_SIZE)
+        result.extend(page.answers)
+        if page.next_cursor is None:
+            return result
+        cursor = page.next_cursor
+
+def check(system: StackOverflowSystem, hot, rng: random.Random, users: list, answers: list):
+    arrival = {answer_id: seq for seq, answer_id in enumerate(system.answers)}
+    expected = sorted((system.answers[answer_id] for answer_id in hot.answers), key=lambda answer: (-answer.vote_score, arrival[answer.id]))
+    assert all_pages(system, hot, "score") == expected
+    assert all_pages(system, hot, "chronological") == sorted(expected, key=lambda answer: arrival[answer.id])
+
+    # voting between pages: every answer that kept its score still comes back exactly once
+    page = system.thread(hot.id, "score", None, PAGE_SIZE)
+    before = {answer_id: system.answers[answer_id].vote_score for answer_id in hot.answers}
+    vote(system, rng, users, answers, 2_000)
+    unchanged = {answer_id for answer_id, score in before.items() if system.answers[answer_id].vote_score == score}
+    returned = [answer.id for answer in page.answers]
+    cursor = page.next_cursor
+    while cursor is not None:
+        page = system.thread(hot.id, "score", cursor, PAGE_SIZE)
+        returned.extend(answer.id for answer in page.answers)
+        cursor = page.next_cursor
+    assert sorted(answer_id for answer_id in returned if answer_id in unchanged) == sorted(unchanged)
+
+    page = system.thread(hot.id, "score", None, PAGE_SIZE)
+    for post_id in [hot.id] + [answer.id for answer in page.answers]:
+        comments = [comment for comment in system.comments.values() if comment.post_id == post_id]
+        assert page.comments[post_id] == comments
+
+def timed(label: str, run, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<45} {elapsed * 1e3:8.3f}ms")
+    return elapsed
+
+if __name__ == "__main__":
+    num_answers = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ANSWERS
+    rng = random.Random(SEED)
+    system, users, hot, answers = build_system(rng, num_answers)
+    check(system, hot, rng, users, answers)
+    print(f"hot thread with {len(hot.answers)} answers, {len(system.comments)} comments")
+    naive = timed("page 1, resolve and sort every answer", lambda: naive_page(system, hot, PAGE_SIZE), 5)
+    indexed = timed("page 1, thread index", lambda: system.thread(hot.id, "score", None, PAGE_SIZE))
+    last = system.thread(hot.id, "chronological", f"chronological:{len(hot.answers) - PAGE_SIZE - 1}", PAGE_SIZE)
+    assert last.next_cursor is None and len(last.answers) == PAGE_SIZE
+    timed("last chronological page, thread index", lambda: system.thread(hot.id, "chronological", f"chronological:{len(hot.answers) - PAGE_SIZE - 1}", PAGE_SIZE))
+    print(f"page 1 speedup: {naive / indexed:.0f}x")
@@ -0,0 +1,102 @@
+import uuid
+from bisect import bisect_right, insort
+
+ORDERS = ("score", "chronological")
+
+
+class Thread:
+    # One question's answers: numbered in arrival order (seq), with a list kept sorted by
+    # (-score, seq) so score order is highest first and older answers win ties.
+    __slots__ = ("answers", "seqs", "scores", "by_score")
+
+    def __init__(self):
+        self.answers: list[uuid.UUID] = []
+        self.seqs: dict[uuid.UUID, int] = {}
+        self.scores: list[int] = []
+        self.by_score: list[tuple[int, int]] = []
+
+
+class ThreadPage:
+    def __init__(self, question, answers: list, comments: dict, total_answers: int, next_cursor: str | None):
+        self.question = question
+        self.answers = answers
+        # post id -> its comments, oldest first, for the question and every answer on the page
+        self.comments = comments
+        self.total_answers = total_answers
+        # pass back to get the following page, None on the last page
+        self.next_cursor = next_cursor
+
+
+class ThreadIndex:
+    # Per-question answer orderings and per-post comment lists, so a page of a thread is a slice
+    # however many answers the question has. Cursors hold the sort key of the last answer returned
+    # (keyset pagination), so votes and new answers between pages do not shift the following pages:
+    # an answer whose score stays the same is returned exactly once.
+
+    def __init__(self):
+        self.threads: dict[uuid.UUID, Thread] = {}
+        self.comments: dict[uuid.UUID, list[uuid.UUID]] = {}
+
+    def add_answer(self, answer):
+        thread = self.threads.get(answer.question_id)
+        if thread is None:
+            thread = self.threads[answer.question_id] = Thread()
+        seq = len(thread.answers)
+        thread.answers.append(answer.id)
+        thread.seqs[answer.id] = seq
+        thread.scores.append(answer.vote_score)
+        insort(thread.by_score, (-answer.vote_score, seq))
+
+    def update_score(self, answer):
+        thread = self.threads[answer.question_id]
+        seq = thread.seqs[answer.id]
+        old = thread.scores[seq]
+        if old == answer.vote_score:
+            return
+        by_score = thread.by_score
+        del by_score[bisect_right(by_score, (-old, seq)) - 1]
+        thread.scores[seq] = answer.vote_score
+        insort(by_score, (-answer.vote_score, seq))
+
+    def add_comment(self, comment):
+        self.comments.setdefault(comment.post_id, []).append(comment.id)
+
+    def answer_count(self, question_id: uuid.UUID) -> int:
+        thread = self.threads.get(question_id)
+        return 0 if thread is None else len(thread.answers)
+
+    def page(self, question_id: uuid.UUID, order: str = "score", cursor: str | None = None,
+             limit: int = 20) -> tuple[list[uuid.UUID], str | None]:
+        # answer ids of one page and the cursor of the next one
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order {order}, expected one of {list(ORDERS)}.")
+        thread = self.threads.get(question_id)
+        if thread is None:
+            return [], None
+        if order == "chronological":
+            start = 0 if cursor is None else self.__decode(cursor, order)[0] + 1
+            seqs = range(start, min(start + limit, len(thread.answers)))
+            last = seqs[-1] if seqs else None
+            next_cursor = None if last is None or last + 1 >= len(thread.answers) else f"{order}:{last}"
+            return [thread.answers[seq] for seq in seqs], next_cursor
+        start = 0 if cursor is None else bisect_right(thread.by_score, self.__decode(cursor, order))
+        entries = thread.by_score[start:start + limit]
+        next_cursor = None
+        if entries and start + limit < len(thread.by_score):
+            neg_score, seq = entries[-1]
+            next_cursor = f"{order}:{neg_score}:{seq}"
+        return [thread.answers[seq] for _, seq in entries], next_cursor
+
+    def comments_of(self, post_ids: list[uuid.UUID], limit: int | None = None) -> dict[uuid.UUID, list[uuid.UUID]]:
+        # one lookup for every post on a page, oldest comments first
+        return {post_id: self.comments.get(post_id, [])[:limit] for post_id in post_ids}
+
+    def __decode(self, cursor: str, order: str) -> tuple[int, ...]:
+        name, *fields = cursor.split(":")
+        try:
+            key = tuple(int(field) for field in fields)
+        except ValueError:
+            key = ()
+        if name != order or len(key) != (2 if order == "score" else 1):
+            raise ValueError(f"Cursor {cursor!r} is not a {order} cursor.")
+        return key
@@ -2,8 +2,8 @@ import uuid
 from typing import Iterator
 
 class User: 
-    def __init__(self, username: str, email: str): 
-        self.id = uuid.uuid4()
+    def __init__(self, username: str, email: str, id: uuid.UUID | None = None): 
+        self.id = id or uuid.uuid4()
         self.username = username
         self.email = email 
         self.reputation_score = 0
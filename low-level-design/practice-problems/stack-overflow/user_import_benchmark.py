@@ -0,0 +1,63 @@
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from user import User
+
+NUM_USERS = 1_000_000
+SCAN_USERS = 5_000
+
+def linear_scan_add_user(users: dict, username: str, email: str) -> User:
+    # the old add_user: compare against every existing user
+    for user in users.values():
+        if user.username == username or user.email == email:
+            raise ValueError(f"Username {username} or Email {email} are already taken.")
+    user = User(username, email)
+    users[user.id] = user
+    return user
+
+if __name__ == "__main__":
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_USERS
+    batch = [(f"User{i}", f"User{i}@Example.com") for i in range(num_users)]
+
+    system = StackOverflowSystem()
+    start = time.perf_counter()
+    system.import_users(batch)
+    elapsed = time.perf_counter() - start
+    assert len(system.users) == num_users
+
+    # lookups and uniqueness ignore case and whitespace
+    assert system.get_user_by_username(" user42 ").username == "User42"
+    assert system.get_user_by_email("USER42@EXAMPLE.COM").username == "User42"
+    try:
+        system.add_user("USER7", "someone@example.com")
+        raise AssertionError("duplicate username accepted")
+    except ValueError:
+        pass
+
+    # a bad batch is rejected as a whole, including duplicates within the batch itself
+    for bad in ([("fresh", "fresh@example.com"), ("FRESH", "other@example.com")],
+                [("fresh", "fresh@example.com"), ("user3", "new@example.com")]):
+        try:
+            system.import_users(bad)
+            raise AssertionError("conflicting batch accepted")
+        except ValueError:
+            pass
+        assert system.get_user_by_username("fresh") is None
+
+    start = time.perf_counter()
+    for username, email in batch[:1000]:
+        system.get_user_by_username(username)
+    lookup = (time.perf_counter() - start) / 1000
+
+    users = {}
+    start = time.perf_counter()
+    for username, email in batch[:SCAN_USERS]:
+        linear_scan_add_user(users, username, email)
+    scan = time.perf_counter() - start
+    # the scan is quadratic, so scale by the square of the size ratio
+    projected = scan * (num_users / SCAN_USERS) ** 2
+
+    print(f"import_users: {num_users:,} users in {elapsed:.2f}s ({num_users / elapsed:,.0f}/s)")
+    print(f"get_user_by_username: {lookup * 1e6:.2f}us")
+    print(f"Linear-scan add_user: {SCAN_USERS:,} users in {scan:.2f}s, projected {projected / 3600:,.1f}h for {num_users:,}")
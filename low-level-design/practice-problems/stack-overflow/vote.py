@@ -8,10 +8,22 @@ class VoteType(Enum):
     UPVOTE = 1
     DOWNVOTE = -1
 
+# score contribution of each vote type, kept apart from the enum values
+VOTE_WEIGHTS = {VoteType.UPVOTE: 1, VoteType.DOWNVOTE: -1}
+
+
+class VoteOutcome(Enum): 
+    APPLIED = 1
+    # the vote left the post's score as it was, e.g. a repeated upvote
+    UNCHANGED = 2
+    # a later vote by the same user on the same post in the batch replaced it
+    SUPERSEDED = 3
+    UNKNOWN_USER = 4
+    UNKNOWN_POST = 5
+
 
 class Vote: 
     def __init__(self, author_id: uuid.UUID, type: VoteType):
         self.id: uuid.UUID = uuid.uuid4()
         self.author_id: uuid.UUID = author_id
-        self.type: VoteType = type 
-    
\ No newline at end of file
+        self.type: VoteType = type
@@ -0,0 +1,76 @@
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType
+
+NUM_VOTES = 10_000_000
+NUM_USERS = 200
+NUM_QUESTIONS = 2_500
+NUM_ANSWERS = 2_500
+SCAN_SAMPLE = 200
+SEED = 11
+
+def build_system(rng: random.Random):
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(NUM_USERS)]
+    questions = [system.add_question(rng.choice(users), f"q{i}", f"q{i}", set()).id for i in range(NUM_QUESTIONS)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), f"a{i}").id for i in range(NUM_ANSWERS)]
+    return system, users, questions + answers
+
+def random_ops(rng: random.Random, users: list, posts: list, count: int):
+    # casts, changes (casting over an existing vote) and retractions
+    types = [VoteType.UPVOTE, VoteType.UPVOTE, VoteType.DOWNVOTE, None]
+    return [(rng.choice(users), rng.choice(posts), rng.choice(types)) for _ in range(count)]
+
+def global_scan_rep_score(system: StackOverflowSystem, user_id) -> int:
+    # what every vote used to cost: walk every post and recount every vote
+    result = 0
+    for post in list(system.questions.values()) + list(system.answers.values()):
+        if post.author_id == user_id:
+            result += post.recompute_vote_score()
+    return result
+
+if __name__ == "__main__":
+    num_votes = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_VOTES
+    rng = random.Random(SEED)
+    system, users, posts = build_system(rng)
+
+    # correctness on a small mixed workload first
+    for user_id, post_id, type in random_ops(rng, users, posts, 50_000):
+        if type is None:
+            system.retract_vote(user_id, post_id)
+        else:
+            system.vote(user_id, post_id, type)
+    assert system.check_consistency() == []
+
+    # the old cost of one vote, measured on a sample
+    start = time.perf_counter()
+    for user_id in users[:SCAN_SAMPLE]:
+        global_scan_rep_score(system, user_id)
+    scan = (time.perf_counter() - start) / SCAN_SAMPLE
+
+    done = 0
+    elapsed = 0.0
+    while done < num_votes:
+        batch = random_ops(rng, users, posts, min(1_000_000, num_votes - done))
+        vote, retract = system.vote, system.retract_vote
+        start = time.perf_counter()
+        for user_id, post_id, type in batch:
+            if type is None:
+                retract(user_id, post_id)
+            else:
+                vote(user_id, post_id, type)
+        elapsed += time.perf_counter() - start
+        done += len(batch)
+
+    start = time.perf_counter()
+    errors = system.check_consistency()
+    check = time.perf_counter() - start
+    assert errors == [], errors[:5]
+
+    live = sum(len(system.questions[p].votes) if p in system.questions else len(system.answers[p].votes) for p in posts)
+    print(f"{done} vote operations in {elapsed:.1f}s ({done / elapsed:,.0f}/s, {elapsed / done * 1e6:.2f}us each)")
+    print(f"Old global rescan: {scan * 1e6:.0f}us per vote at {len(posts)} posts ({scan / (elapsed / done):,.0f}x slower)")
+    print(f"Consistency check over {live} live votes: {check:.1f}s, no mismatches")
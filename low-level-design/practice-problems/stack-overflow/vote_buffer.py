@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+
+from vote import VoteType, VoteOutcome
+
+
+class VoteBatch:
+    # votes flushed together, one threading.Event for all of them instead of a Future each
+    def __init__(self):
+        self.votes: list[tuple[uuid.UUID, uuid.UUID, VoteType | None]] = []
+        self.outcomes: list[VoteOutcome] = []
+        self.error: Exception | None = None
+        self.done = threading.Event()
+
+
+class PendingVote:
+    __slots__ = ("batch", "position")
+
+    def __init__(self, batch: VoteBatch, position: int):
+        self.batch = batch
+        self.position = position
+
+    def done(self) -> bool:
+        return self.batch.done.is_set()
+
+    def result(self, timeout: float | None = None) -> VoteOutcome:
+        if not self.batch.done.wait(timeout):
+            raise TimeoutError("The vote has not been flushed yet.")
+        if self.batch.error is not None:
+            raise self.batch.error
+        return self.batch.outcomes[self.position]
+
+
+class VoteBuffer:
+    # Micro-batches individual votes into StackOverflowSystem.vote_many: a batch is flushed once
+    # it holds max_votes votes, or by the background flusher once its oldest vote has waited
+    # max_delay seconds. submit() returns a PendingVote that resolves to the vote's outcome.
+    # Flushes run on the flusher thread or on the submitting thread that filled the batch;
+    # vote_many takes the system's write lock, so they are safe alongside the other writers.
+
+    def __init__(self, system, max_votes: int = 1000, max_delay: float = 0.005):
+        self.system = system
+        self.max_votes = max_votes
+        self.max_delay = max_delay
+        self.flushes = 0
+        self.__batch = VoteBatch()
+        self.__oldest = 0.0
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__wakeup = threading.Condition(self.__lock)
+        self.__closed = False
+        self.__flusher = threading.Thread(target=self.__run, name="vote-flusher", daemon=True)
+        self.__flusher.start()
+
+    def submit(self, user_id: uuid.UUID, post_id: uuid.UUID, type: VoteType | None) -> PendingVote:
+        # type None retracts the user's vote on the post
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError("VoteBuffer is closed.")
+            batch = self.__batch
+            votes = batch.votes
+            if not votes:
+                self.__oldest = time.monotonic()
+                self.__wakeup.notify()
+            votes.append((user_id, post_id, type))
+            pending = PendingVote(batch, len(votes) - 1)
+            full = len(votes) >= self.max_votes
+        if full:
+            self.flush()
+        return pending
+
+    def flush(self):
+        with self.__flush_lock:
+            with self.__lock:
+                batch = self.__batch
+                if not batch.votes:
+                    return
+                self.__batch = VoteBatch()
+            try:
+                batch.outcomes = self.system.vote_many(batch.votes)
+                self.flushes += 1
+            except Exception as error:
+                batch.error = error
+            batch.done.set()
+
+    def close(self):
+        # flushes what is left and stops the flusher
+        with self.__lock:
+            self.__closed = True
+            self.__wakeup.notify()
+        self.__flusher.join()
+        self.flush()
+
+    def __enter__(self) -> "VoteBuffer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __run(self):
+        while True:
+            with self.__lock:
+                while not self.__closed and not self.__batch.votes:
+                    self.__wakeup.wait()
+                if self.__closed:
+                    return
+                wait = self.__oldest + self.max_delay - time.monotonic()
+                if wait > 0:
+                    self.__wakeup.wait(wait)
+                    continue
+            self.flush()
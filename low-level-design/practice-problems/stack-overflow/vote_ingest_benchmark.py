@@ -0,0 +1,90 @@
+import random
+import sys
+import time
+
+from stack_overflow_system import StackOverflowSystem
+from vote import VoteType, VoteOutcome
+from vote_buffer import VoteBuffer
+
+NUM_VOTES = 300_000
+NUM_USERS = 200
+NUM_QUESTIONS = 2_500
+NUM_ANSWERS = 2_500
+NUM_HOT_POSTS = 20
+BATCH_SIZE = 1_000
+SEED = 19
+
+def build_system():
+    rng = random.Random(SEED)
+    system = StackOverflowSystem()
+    users = [system.add_user(f"user{i}", f"user{i}@example.com").id for i in range(NUM_USERS)]
+    questions = [system.add_question(rng.choice(users), f"q{i}", f"q{i}", set()).id for i in range(NUM_QUESTIONS)]
+    answers = [system.add_answer(rng.choice(users), rng.choice(questions), f"a{i}").id for i in range(NUM_ANSWERS)]
+    return system, users, questions + answers
+
+def spiky_ops(count: int) -> list[tuple[int, int, VoteType | None]]:
+    # (user, post, type) by position; during a spike a few users keep re-voting a few hot posts
+    rng = random.Random(SEED + 1)
+    types = [VoteType.UPVOTE, VoteType.UPVOTE, VoteType.DOWNVOTE, None]
+    ops = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            ops.append((rng.randrange(20), rng.randrange(NUM_HOT_POSTS), rng.choice(types)))
+        else:
+            ops.append((rng.randrange(NUM_USERS), rng.randrange(NUM_QUESTIONS + NUM_ANSWERS), rng.choice(types)))
+    return ops
+
+def per_call(system, batch):
+    for user_id, post_id, type in batch:
+        if type is None:
+            system.retract_vote(user_id, post_id)
+        else:
+            system.vote(user_id, post_id, type)
+
+def fingerprint(system, posts: list) -> tuple:
+    scores = [(system.questions.get(post_id) or system.answers[post_id]).vote_score for post_id in posts]
+    return scores, [user.reputation_score for user in system.users.values()]
+
+def timed(label: str, count: int, run) -> float:
+    start = time.perf_counter()
+    run()
+    rate = count / (time.perf_counter() - start)
+    print(f"{label:<36} {rate:10,.0f} votes/s")
+    return rate
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_VOTES
+    ops = spiky_ops(count)
+    results = {}
+
+    system, users, posts = build_system()
+    batch = [(users[user], posts[post], type) for user, post, type in ops]
+    baseline = timed("vote() / retract_vote() per call", count, lambda: per_call(system, batch))
+    results["per call"] = fingerprint(system, posts)
+
+    system, users, posts = build_system()
+    batch = [(users[user], posts[post], type) for user, post, type in ops]
+    outcomes = []
+    batched = timed(f"vote_many, batches of {BATCH_SIZE}", count, lambda: [
+        outcomes.extend(system.vote_many(batch[start:start + BATCH_SIZE])) for start in range(0, count, BATCH_SIZE)
+    ])
+    results["vote_many"] = fingerprint(system, posts)
+    assert not system.check_consistency()
+
+    system, users, posts = build_system()
+    batch = [(users[user], posts[post], type) for user, post, type in ops]
+    buffer = VoteBuffer(system, max_votes=BATCH_SIZE, max_delay=0.005)
+    def buffered():
+        pending = [buffer.submit(*item) for item in batch]
+        buffer.close()
+        # flush boundaries depend on timing, so which votes were superseded can differ from vote_many
+        assert all(isinstance(vote.result(), VoteOutcome) for vote in pending)
+    buffered_rate = timed(f"VoteBuffer, flush at {BATCH_SIZE} or 5ms", count, buffered)
+    results["buffer"] = fingerprint(system, posts)
+
+    # keeping the last vote per (user, post) ends in the same scores and reputations as applying them all
+    assert results["per call"] == results["vote_many"] == results["buffer"]
+    counts = {outcome: outcomes.count(outcome) for outcome in VoteOutcome}
+    print(", ".join(f"{outcome.name.lower()} {number}" for outcome, number in counts.items()))
+    print(f"vote_many {batched / baseline:.1f}x, VoteBuffer {buffered_rate / baseline:.1f}x the per-call rate "
+          f"({buffer.flushes} flushes)")
@@ -0,0 +1,142 @@
+import itertools
+import logging
+import random
+import sys
+import time
+
+from change_engine import ChangeEngine, DENOMINATIONS
+from money import Money, to_cents
+from product import Product
+from vending_machine_system import VendingMachineSystem
+
+NUM_SALES = 5_000
+RESTOCK_EVERY = 25
+SEED = 23
+
+PRICES = [0.75, 1.50, 2.25, 4.95, 7.35, 12.40, 18.65, 33.10]
+BILLS = [Money.DOLLAR, Money.FIVE_DOLLAR, Money.TEN_DOLLAR, Money.TWENTY_DOLLAR, Money.FIFTY_DOLLAR, Money.HUNDRED_DOLLAR]
+# plenty of coins but few notes and half dollars, so the largest one that fits is often the wrong one to give
+FLOAT = {Money.NICKEL: 60, Money.DIME: 60, Money.QUARTER: 60, Money.HALF_DOLLAR: 3, Money.DOLLAR: 25,
+         Money.FIVE_DOLLAR: 4, Money.TEN_DOLLAR: 1, Money.TWENTY_DOLLAR: 3}
+
+
+class GreedyVendingMachine(VendingMachineSystem):
+    # the machine as it was: largest coin first over float values, committing to the sale up front
+    def buy_product(self, product: Product, payment: list[Money]) -> dict[Money, int] | None:
+        if product not in self.products or self.products[product] == 0:
+            return None
+        total_payment = sum(money.value for money in payment)
+        if product.price > total_payment:
+            return None
+        change_owed = total_payment - product.price
+        for money in payment:
+            self.money[money] += 1
+        self.products[product] -= 1
+        desc_money = sorted(self.money.keys(), key=lambda x: x.value, reverse=True)
+        change = {}
+        for money in desc_money:
+            while change_owed > 0 and money.value <= change_owed and self.money[money] > 0:
+                self.money[money] -= 1
+                change_owed -= money.value
+                change[money] = change.get(money, 0) + 1
+        return change
+
+
+def fewest_coins(amount: int, inventory: dict[Money, int]) -> int | None:
+    # exhaustive search over every combination of coin counts
+    ranges = [range(min(inventory.get(money, 0), amount // money.cents) + 1) for money in DENOMINATIONS]
+    best = None
+    for counts in itertools.product(*ranges):
+        if sum(count * money.cents for count, money in zip(counts, DENOMINATIONS)) == amount:
+            best = sum(counts) if best is None else min(best, sum(counts))
+    return best
+
+def check_minimal(rng: random.Random, cases: int = 300):
+    engine = ChangeEngine()
+    small = DENOMINATIONS[:6]
+    for _ in range(cases):
+        inventory = {money: rng.randrange(4) for money in small}
+        amount = 5 * rng.randrange(1, 200)
+        change = engine.make_change(amount, inventory)
+        expected = fewest_coins(amount, inventory)
+        if expected is None:
+            assert change is None and not engine.can_make_change(amount, inventory)
+        else:
+            assert sum(count * money.cents for money, count in change.items()) == amount
+            assert all(count <= inventory[money] for money, count in change.items())
+            assert sum(change.values()) == expected
+
+def sales(count: int) -> list[tuple[int, list[Money]]]:
+    # (product, payment): mostly a single note, sometimes a large one for a cheap product
+    rng = random.Random(SEED)
+    result = []
+    for _ in range(count):
+        product = rng.randrange(len(PRICES))
+        notes = [money for money in BILLS if money.value >= PRICES[product]]
+        payment = [rng.choice(notes[:2])] if rng.random() < 0.9 else [rng.choice(notes)]
+        if rng.random() < 0.3:
+            payment.append(rng.choice([Money.QUARTER, Money.DIME, Money.HALF_DOLLAR]))
+        result.append((product, payment))
+    return result
+
+def simulate(machine: VendingMachineSystem, plan: list) -> dict[str, int]:
+    products = [Product(f"product{i}", price) for i, price in enumerate(PRICES)]
+    for product in products:
+        machine.add_product(product)
+        machine.restock_product(product, len(plan))
+    stats = {"available": 0, "sold": 0, "refused": 0, "short_changed": 0, "cents_short": 0, "coins": 0}
+    for i, (index, payment) in enumerate(plan):
+        if i % RESTOCK_EVERY == 0:
+            machine.collect_money()
+            for money, quantity in FLOAT.items():
+                machine.add_money(money, quantity)
+        product = products[index]
+        # once a note is in, the display greys out every product the machine cannot make change for
+        if not isinstance(machine, GreedyVendingMachine):
+            paid = sum(money.value for money in payment)
+            stats["available"] += sum(machine.can_make_change(paid - price, payment) for price in PRICES if price <= paid)
+        change = machine.buy_product(product, payment)
+        if change is None:
+            stats["refused"] += 1
+            continue
+        stats["sold"] += 1
+        stats["coins"] += sum(change.values())
+        owed = sum(money.cents for money in payment) - to_cents(product.price)
+        given = sum(money.cents * count for money, count in change.items())
+        if given != owed:
+            stats["short_changed"] += 1
+            stats["cents_short"] += owed - given
+    return stats
+
+def timed(label: str, machine: VendingMachineSystem, plan: list) -> tuple[dict[str, int], float]:
+    start = time.perf_counter()
+    stats = simulate(machine, plan)
+    elapsed = (time.perf_counter() - start) / len(plan)
+    print(f"{label:<28} {elapsed * 1e6:7.1f}us/sale  sold {stats['sold']:6}  refused {stats['refused']:5}  "
+          f"short-changed {stats['short_changed']:5} (${stats['cents_short'] / 100:,.2f})  coins out {stats['coins']}")
+    return stats, elapsed
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_SALES
+    check_minimal(random.Random(SEED))
+
+    # greedy takes the $50 and is stuck with $10 owed; three $20s make it
+    engine = ChangeEngine()
+    assert engine.make_change(6000, {Money.FIFTY_DOLLAR: 1, Money.TWENTY_DOLLAR: 3}) == {Money.TWENTY_DOLLAR: 3}
+    assert engine.make_change(30, {Money.QUARTER: 1, Money.DIME: 3}) == {Money.DIME: 3}
+
+    plan = sales(count)
+    greedy, _ = timed("greedy, float", GreedyVendingMachine(), plan)
+    machine = VendingMachineSystem()
+    exact, cached = timed("change engine, cached", machine, plan)
+    uncached_machine = VendingMachineSystem()
+    uncached_machine.change_engine = ChangeEngine(max_tables=0)
+    uncached, rebuilt = timed("change engine, no cache", uncached_machine, plan)
+
+    assert exact == uncached and exact["short_changed"] == 0
+    assert exact["sold"] + exact["refused"] == count
+    hits, misses = machine.change_engine.hits, machine.change_engine.misses
+    print(f"table cache hit rate {hits / (hits + misses):.0%}, cached {rebuilt / cached:.1f}x faster than rebuilding")
+    print(f"greedy short-changed {greedy['short_changed']} of {greedy['sold']} sales; "
+          f"the engine refused {exact['refused']} up front and short-changed none")
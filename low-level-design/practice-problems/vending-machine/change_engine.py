@@ -0,0 +1,127 @@
+from collections import OrderedDict, deque
+from functools import reduce
+from math import gcd
+
+from money import Money
+
+# smallest to largest, sorted once instead of on every purchase
+DENOMINATIONS: tuple[Money, ...] = tuple(sorted(Money, key=lambda money: money.cents))
+# every amount of change is a multiple of this, so tables are indexed in units of it
+UNIT = reduce(gcd, (money.cents for money in DENOMINATIONS))
+IMPOSSIBLE = 1 << 30
+
+
+class ChangeTable:
+    # Fewest coins for every amount up to limit (in units) from one coin inventory: a bounded
+    # knapsack solved one denomination at a time. For each denomination, used[a] is how many of
+    # it the best change for amount a takes, so any amount is rebuilt by walking the stages back.
+    __slots__ = ("limit", "coins", "stages")
+
+    def __init__(self, limit: int, counts: tuple[int, ...]):
+        self.limit = limit
+        coins = [0] + [IMPOSSIBLE] * limit
+        self.stages: list[tuple[Money, int, list[int]]] = []
+        for money, count in zip(DENOMINATIONS, counts):
+            if count == 0:
+                continue
+            value = money.cents // UNIT
+            if count * value >= limit:
+                coins, used = self.__unbounded(coins, value)
+            else:
+                coins, used = self.__bounded(coins, value, count)
+            self.stages.append((money, value, used))
+        self.coins = coins
+
+    def can_make(self, amount: int) -> bool:
+        return amount % UNIT == 0 and self.coins[amount // UNIT] < IMPOSSIBLE
+
+    def change(self, amount: int) -> dict[Money, int] | None:
+        if not self.can_make(amount):
+            return None
+        result = {}
+        remaining = amount // UNIT
+        for money, value, used in reversed(self.stages):
+            count = used[remaining]
+            if count:
+                result[money] = count
+                remaining -= count * value
+        return result
+
+    def __unbounded(self, previous: list[int], value: int) -> tuple[list[int], list[int]]:
+        # enough coins to cover the whole table, so the count never binds
+        coins = previous[:]
+        used = [0] * (self.limit + 1)
+        for amount in range(value, self.limit + 1):
+            candidate = coins[amount - value] + 1
+            if candidate < coins[amount]:
+                coins[amount] = candidate
+                used[amount] = used[amount - value] + 1
+        return coins, used
+
+    def __bounded(self, previous: list[int], value: int, count: int) -> tuple[list[int], list[int]]:
+        # taking k coins for amount a costs previous[a - k * value] + k with k <= count: along each
+        # residue class that is a sliding-window minimum, kept in a monotonic deque
+        coins = [IMPOSSIBLE] * (self.limit + 1)
+        used = [0] * (self.limit + 1)
+        for residue in range(min(value, self.limit + 1)):
+            window: deque[tuple[int, int]] = deque()
+            for step, amount in enumerate(range(residue, self.limit + 1, value)):
+                candidate = previous[amount] - step
+                while window and window[-1][0] >= candidate:
+                    window.pop()
+                window.append((candidate, step))
+                if window[0][1] < step - count:
+                    window.popleft()
+                best, start = window[0]
+                coins[amount] = best + step
+                used[amount] = step - start
+        return coins, used
+
+
+class ChangeEngine:
+    # Minimal-coin change under a limited coin inventory. Tables are cached by the inventory they
+    # were built from, capped at what an amount up to the table's limit could ever use, so any
+    # change to the machine's money that matters invalidates them and restocking plentiful coins
+    # does not. Tables cover amounts in steps of step cents, so small change builds small tables,
+    # and a cached table for a larger limit answers every smaller amount from the same inventory.
+
+    def __init__(self, step: int = 250, max_tables: int = 8):
+        self.step = step
+        self.max_tables = max_tables
+        self.hits = 0
+        self.misses = 0
+        self.__tables: OrderedDict[tuple, ChangeTable] = OrderedDict()
+
+    def can_make_change(self, amount: int, inventory: dict[Money, int]) -> bool:
+        return amount == 0 or self.table(amount, inventory).can_make(amount)
+
+    def make_change(self, amount: int, inventory: dict[Money, int]) -> dict[Money, int] | None:
+        # fewest coins adding up to amount cents, or None if the inventory cannot make it
+        if amount == 0:
+            return {}
+        return self.table(amount, inventory).change(amount)
+
+    def table(self, amount: int, inventory: dict[Money, int]) -> ChangeTable:
+        limit = -(-amount // self.step) * self.step // UNIT
+        for cached in sorted({limit} | {cached for cached, _ in self.__tables if cached > limit}):
+            key = (cached, self.__counts(cached, inventory))
+            table = self.__tables.get(key)
+            if table is not None:
+                self.hits += 1
+                self.__tables.move_to_end(key)
+                return table
+        self.misses += 1
+        counts = self.__counts(limit, inventory)
+        table = ChangeTable(limit, counts)
+        if self.max_tables:
+            self.__tables[(limit, counts)] = table
+            if len(self.__tables) > self.max_tables:
+                self.__tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        self.__tables.clear()
+
+    def __counts(self, limit: int, inventory: dict[Money, int]) -> tuple[int, ...]:
+        # coins beyond what change up to limit could use do not change the table
+        return tuple(min(inventory.get(money, 0), limit * UNIT // money.cents) for money in DENOMINATIONS)
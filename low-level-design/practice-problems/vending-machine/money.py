@@ -11,4 +11,13 @@ class Money(Enum):
     TWENTY_DOLLAR = 20.00
     FIFTY_DOLLAR = 50.00
     HUNDRED_DOLLAR = 100.00
-    
\ No newline at end of file
+
+    @property
+    def cents(self) -> int:
+        return CENTS[self]
+
+def to_cents(amount: float) -> int:
+    # amounts are kept in whole cents so change never drifts from float subtraction
+    return round(amount * 100)
+
+CENTS: dict[Money, int] = {money: to_cents(money.value) for money in Money}
@@ -0,0 +1,257 @@
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntEnum
+from itertools import chain, compress, repeat
+from typing import Callable
+
+
+class TelemetryKind(IntEnum):
+    SALE = 0
+    REFUSED_CHANGE = 1
+    STOCK_OUT = 2
+    RESTOCK = 3
+
+
+# translation table turning a byte string of kinds into a 0/1 mask of sales
+SALE_MASK = bytes(int(kind == TelemetryKind.SALE) for kind in range(256))
+
+
+class TelemetrySnapshot:
+    # A buffer's events in time order, as columns, ready to ship to an aggregator process.
+    def __init__(self, times: array, kinds: array, products: array, values: array,
+                 product_names: tuple[str, ...], until: float, dropped: int,
+                 open_stockouts: dict[int, float] | None = None):
+        self.times = times
+        self.kinds = kinds
+        self.products = products
+        self.values = values
+        self.product_names = product_names
+        # when the snapshot was taken; stock-outs still open count up to here
+        self.until = until
+        self.dropped = dropped
+        # product id -> start of a stock-out still open when the snapshot's first event was recorded
+        self.open_stockouts = open_stockouts or {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+class TelemetryBuffer:
+    # Fixed-size ring of events kept as parallel typed arrays, so recording one is four stores and
+    # no allocation. Once full, the oldest events are overwritten and counted in dropped.
+    # value is the price in cents for a sale, the change owed for a refused sale, the quantity for a restock.
+
+    def __init__(self, capacity: int = 4096, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.clock = clock
+        self.times = array("d", bytes(8 * capacity))
+        self.kinds = array("B", bytes(capacity))
+        self.products = array("I", bytes(4 * capacity))
+        self.values = array("q", bytes(8 * capacity))
+        self.product_names: list[str] = []
+        self.written = 0
+        self.__product_ids: dict[str, int] = {}
+        # whether the clock never went backwards, so events are already in time order
+        self.__ordered = True
+        self.__last = float("-inf")
+        # what drain() has handed out so far: the events up to this count, and stock-outs open at that point
+        self.__drained = 0
+        self.__drained_until = float("-inf")
+        self.__drained_stockouts: set[int] = set()
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def record(self, kind: TelemetryKind, product: str, value: int = 0):
+        product_id = self.__product_ids.get(product)
+        if product_id is None:
+            product_id = self.__product_ids[product] = len(self.product_names)
+            self.product_names.append(product)
+        now = self.clock()
+        if now < self.__last:
+            self.__ordered = False
+        self.__last = now
+        index = self.written % self.capacity
+        self.times[index] = now
+        self.kinds[index] = kind
+        self.products[index] = product_id
+        self.values[index] = value
+        self.written += 1
+
+    def snapshot(self) -> TelemetrySnapshot:
+        # every event still in the ring; taking it again later recounts them, see drain()
+        return TelemetrySnapshot(*self.__columns(self.written - len(self), self.written), tuple(self.product_names),
+                                 self.clock(), self.dropped)
+
+    def drain(self) -> TelemetrySnapshot:
+        # Only the events recorded since the previous drain, so periodic drains can be summed without
+        # recounting. A stock-out still open at the previous drain was counted up to then and carries on from there.
+        start = max(self.__drained, self.written - self.capacity)
+        columns = self.__columns(start, self.written)
+        now = self.clock()
+        snapshot = TelemetrySnapshot(*columns, tuple(self.product_names), now, start - self.__drained,
+                                     dict.fromkeys(self.__drained_stockouts, self.__drained_until))
+        kinds, products = columns[1].tobytes(), columns[2]
+        for index in sorted(positions(kinds, TelemetryKind.STOCK_OUT) + positions(kinds, TelemetryKind.RESTOCK)):
+            if kinds[index] == TelemetryKind.STOCK_OUT:
+                self.__drained_stockouts.add(products[index])
+            else:
+                self.__drained_stockouts.discard(products[index])
+        self.__drained = self.written
+        self.__drained_until = now
+        return snapshot
+
+    def __columns(self, start: int, end: int) -> list[array]:
+        # events start..end-1 by write count, in time order
+        first = start % self.capacity
+        last = first + end - start
+        columns = [column[first:last] + column[:max(0, last - self.capacity)]
+                   for column in (self.times, self.kinds, self.products, self.values)]
+        if not self.__ordered:
+            order = sorted(range(len(columns[0])), key=columns[0].__getitem__)
+            columns = [array(column.typecode, map(column.__getitem__, order)) for column in columns]
+        return columns
+
+
+class FleetStats:
+    # Fleet-wide totals per time bucket, keyed by the bucket's start time in seconds.
+    def __init__(self, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.sales: Counter[tuple[int, str]] = Counter()
+        self.revenue: Counter[int] = Counter()
+        self.stockout_seconds: Counter[tuple[int, str]] = Counter()
+        self.refused_change: Counter[int] = Counter()
+        self.machines = 0
+        self.events = 0
+        self.dropped = 0
+
+    def merge(self, other: "FleetStats"):
+        self.sales.update(other.sales)
+        self.revenue.update(other.revenue)
+        self.stockout_seconds.update(other.stockout_seconds)
+        self.refused_change.update(other.refused_change)
+        self.machines += other.machines
+        self.events += other.events
+        self.dropped += other.dropped
+
+    def sales_per_product(self) -> Counter[str]:
+        result = Counter()
+        for (_, product), count in self.sales.items():
+            result[product] += count
+        return result
+
+    def stockout_minutes(self) -> dict[str, float]:
+        result = Counter()
+        for (_, product), seconds in self.stockout_seconds.items():
+            result[product] += seconds
+        return {product: seconds / 60 for product, seconds in result.items()}
+
+
+def summarize(snapshots: list[TelemetrySnapshot], bucket_seconds: int) -> FleetStats:
+    # Works a column slice at a time: events are in time order, so each bucket is the slice
+    # between two bisections, and its sales are masked and counted by compress, Counter and sum
+    # in C rather than by a Python loop over the events. The rare kinds are found with bytes.find.
+    stats = FleetStats(bucket_seconds)
+    for snapshot in snapshots:
+        stats.machines += 1
+        stats.events += len(snapshot)
+        stats.dropped += snapshot.dropped
+        times, kinds, products, values = snapshot.times, snapshot.kinds, snapshot.products, snapshot.values
+        names = snapshot.product_names
+        kind_bytes = kinds.tobytes()
+        sold = kind_bytes.translate(SALE_MASK)
+        # (bucket, start, end) of every bucket with events
+        slices = []
+        start = 0
+        while start < len(times):
+            bucket = int(times[start] // bucket_seconds)
+            end = bisect_left(times, (bucket + 1) * bucket_seconds, start)
+            slices.append((bucket, start, end))
+            start = end
+        # one Counter per snapshot, over keys packing the bucket above the 32-bit product id
+        keys = chain.from_iterable(map((bucket << 32).__add__, compress(products[start:end], sold[start:end]))
+                                   for bucket, start, end in slices)
+        for key, count in Counter(keys).items():
+            stats.sales[(key >> 32) * bucket_seconds, names[key & 0xFFFFFFFF]] += count
+        for bucket, start, end in slices:
+            revenue = sum(compress(values[start:end], sold[start:end]))
+            if revenue:
+                stats.revenue[bucket * bucket_seconds] += revenue
+
+        for index in positions(kind_bytes, TelemetryKind.REFUSED_CHANGE):
+            stats.refused_change[int(times[index] // bucket_seconds) * bucket_seconds] += 1
+
+        # a stock-out lasts until the product's next restock, or until the snapshot was taken
+        outages: dict[int, float] = dict(snapshot.open_stockouts)
+        changes = sorted(positions(kind_bytes, TelemetryKind.STOCK_OUT) + positions(kind_bytes, TelemetryKind.RESTOCK))
+        for index in changes:
+            product_id = products[index]
+            if kinds[index] == TelemetryKind.STOCK_OUT:
+                outages.setdefault(product_id, times[index])
+            elif product_id in outages:
+                add_outage(stats, names[product_id], outages.pop(product_id), times[index])
+        for product_id, start in outages.items():
+            add_outage(stats, names[product_id], start, snapshot.until)
+    return stats
+
+
+def positions(kinds: bytes, kind: TelemetryKind) -> list[int]:
+    result = []
+    index = kinds.find(kind)
+    while index != -1:
+        result.append(index)
+        index = kinds.find(kind, index + 1)
+    return result
+
+
+def add_outage(stats: FleetStats, product: str, start: float, end: float):
+    # spread the outage over the buckets it spans
+    width = stats.bucket_seconds
+    bucket = int(start // width) * width
+    while start < end:
+        boundary = min(end, bucket + width)
+        stats.stockout_seconds[bucket, product] += boundary - start
+        start, bucket = boundary, bucket + width
+
+
+class FleetAggregator:
+    # Merges many machines' snapshots into one FleetStats. Snapshots are split into chunks that
+    # worker processes summarize independently; the partial stats are then added together.
+    # The worker pool is started on first use and kept for later calls until close().
+
+    def __init__(self, bucket_seconds: int = 60, processes: int | None = None, chunks_per_process: int = 4):
+        self.bucket_seconds = bucket_seconds
+        self.processes = processes
+        self.chunks_per_process = chunks_per_process
+        self.__executor: ProcessPoolExecutor | None = None
+
+    def aggregate(self, snapshots: list[TelemetrySnapshot]) -> FleetStats:
+        if self.processes == 1 or len(snapshots) < 2:
+            return summarize(snapshots, self.bucket_seconds)
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.processes)
+        stats = FleetStats(self.bucket_seconds)
+        count = (self.processes or os.cpu_count() or 1) * self.chunks_per_process
+        chunks = [snapshots[i::count] for i in range(min(count, len(snapshots)))]
+        for partial in self.__executor.map(summarize, chunks, repeat(self.bucket_seconds)):
+            stats.merge(partial)
+        return stats
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __enter__(self) -> "FleetAggregator":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,165 @@
+import logging
+import random
+import sys
+import time
+from collections import Counter
+
+from money import Money
+from product import Product
+from telemetry import FleetAggregator, FleetStats, TelemetryBuffer, TelemetryKind
+from vending_machine_system import VendingMachineSystem
+
+NUM_MACHINES = 1_000
+SALES_PER_MACHINE = 1_500
+CAPACITY = 1_024
+BUCKET_SECONDS = 3_600
+SEED = 29
+
+PRICES = {"Coke": 1.50, "Water": 1.00, "Chips": 2.25, "Candy": 0.75, "Gum": 0.50, "Juice": 3.25}
+# exact payment for each price, so most sales need no change
+EXACT = {1.50: [Money.DOLLAR, Money.HALF_DOLLAR], 1.00: [Money.DOLLAR], 2.25: [Money.DOLLAR, Money.DOLLAR, Money.QUARTER],
+         0.75: [Money.HALF_DOLLAR, Money.QUARTER], 0.50: [Money.HALF_DOLLAR], 3.25: [Money.DOLLAR] * 3 + [Money.QUARTER]}
+
+
+class SimulatedClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_machine(seed: int, telemetry: TelemetryBuffer | None, clock: SimulatedClock, sales: int) -> VendingMachineSystem:
+    # a day or so of sales ~90s apart; stock runs low and the route driver calls every 8 hours
+    rng = random.Random(seed)
+    machine = VendingMachineSystem(telemetry)
+    products = [Product(name, price) for name, price in PRICES.items()]
+    for product in products:
+        machine.add_product(product)
+        machine.restock_product(product, rng.randrange(20, 60))
+    machine.add_money(Money.QUARTER, 8)
+    next_restock = clock.now + 8 * 3_600
+    for _ in range(sales):
+        clock.now += rng.expovariate(1 / 90)
+        if clock.now >= next_restock:
+            for product in products:
+                if machine.products[product] < 10:
+                    machine.restock_product(product, 40)
+            # the takings are collected and only a few quarters are left for change
+            machine.collect_money()
+            machine.add_money(Money.QUARTER, 8)
+            next_restock += 8 * 3_600
+        product = rng.choice(products)
+        payment = EXACT[product.price] if rng.random() < 0.97 else [Money.TEN_DOLLAR]
+        machine.buy_product(product, payment)
+    return machine
+
+def naive_summary(snapshots: list, bucket_seconds: int) -> FleetStats:
+    # one Python-level step per event
+    stats = FleetStats(bucket_seconds)
+    for snapshot in snapshots:
+        stats.machines += 1
+        stats.events += len(snapshot)
+        stats.dropped += snapshot.dropped
+        outages = {}
+        for moment, kind, product_id, value in zip(snapshot.times, snapshot.kinds, snapshot.products, snapshot.values):
+            bucket = int(moment // bucket_seconds) * bucket_seconds
+            product = snapshot.product_names[product_id]
+            if kind == TelemetryKind.SALE:
+                stats.sales[bucket, product] += 1
+                stats.revenue[bucket] += value
+            elif kind == TelemetryKind.REFUSED_CHANGE:
+                stats.refused_change[bucket] += 1
+            elif kind == TelemetryKind.STOCK_OUT:
+                outages.setdefault(product, moment)
+            elif product in outages:
+                spread(stats, product, outages.pop(product), moment)
+        for product, start in outages.items():
+            spread(stats, product, start, snapshot.until)
+    return stats
+
+def spread(stats: FleetStats, product: str, start: float, end: float):
+    while start < end:
+        bucket = int(start // stats.bucket_seconds) * stats.bucket_seconds
+        boundary = min(end, bucket + stats.bucket_seconds)
+        stats.stockout_seconds[bucket, product] += boundary - start
+        start = boundary
+
+def same(left: FleetStats, right: FleetStats) -> bool:
+    rounded = lambda counter: Counter({key: round(value, 6) for key, value in counter.items()})
+    return (left.sales == right.sales and left.revenue == right.revenue and left.refused_change == right.refused_change
+            and rounded(left.stockout_seconds) == rounded(right.stockout_seconds)
+            and (left.machines, left.events, left.dropped) == (right.machines, right.events, right.dropped))
+
+def timed(label: str, run, events: int):
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed * 1e3:9.1f}ms  {events / elapsed / 1e6:6.2f}M events/s")
+    return result
+
+def per_sale_cost(sales: int) -> tuple[float, float]:
+    # the same seeded machine with and without a buffer
+    costs = []
+    for telemetry in (None, TelemetryBuffer(CAPACITY, SimulatedClock(0.0))):
+        clock = telemetry.clock if telemetry is not None else SimulatedClock(0.0)
+        start = time.perf_counter()
+        run_machine(SEED, telemetry, clock, sales)
+        costs.append((time.perf_counter() - start) / sales)
+    return costs[0], costs[1]
+
+def log_cost(calls: int) -> tuple[float, float]:
+    # a suppressed debug line, formatted up front versus only if it were emitted
+    logger = logging.getLogger("telemetry_benchmark")
+    name, price = "Coke", 150
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug(f"Sold {name} for {price} cents")
+    eager = (time.perf_counter() - start) / calls
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug("Sold %s for %d cents", name, price)
+    return eager, (time.perf_counter() - start) / calls
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_MACHINES
+
+    untracked, tracked = per_sale_cost(20_000)
+    print(f"sale without telemetry {untracked * 1e6:6.2f}us, with ring buffer {tracked * 1e6:6.2f}us "
+          f"(+{(tracked - untracked) * 1e6:.2f}us)")
+    eager, lazy = log_cost(200_000)
+    print(f"suppressed debug log: f-string {eager * 1e9:.0f}ns, lazy %-args {lazy * 1e9:.0f}ns")
+
+    start = time.perf_counter()
+    snapshots = []
+    for number in range(machines):
+        clock = SimulatedClock(1_700_000_000.0)
+        telemetry = TelemetryBuffer(CAPACITY, clock)
+        run_machine(SEED + number, telemetry, clock, SALES_PER_MACHINE)
+        snapshots.append(telemetry.snapshot())
+    events = sum(len(snapshot) for snapshot in snapshots)
+    print(f"simulated {machines} machines, {events:,} events kept, {sum(s.dropped for s in snapshots):,} overwritten "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    expected = timed("naive, one step per event", lambda: naive_summary(snapshots, BUCKET_SECONDS), events)
+    serial = timed("column-wise, 1 process", lambda: FleetAggregator(BUCKET_SECONDS, processes=1).aggregate(snapshots), events)
+    with FleetAggregator(BUCKET_SECONDS, processes=4) as aggregator:
+        parallel = timed("column-wise, 4 processes, cold pool", lambda: aggregator.aggregate(snapshots), events)
+        # later calls reuse the running workers
+        warm = timed("column-wise, 4 processes, warm pool", lambda: aggregator.aggregate(snapshots), events)
+    assert same(serial, expected) and same(parallel, expected) and same(warm, expected)
+
+    # product ids past the old 16-bit limit still land on the right product
+    clock = SimulatedClock(1_700_000_000.0)
+    telemetry = TelemetryBuffer(16, clock)
+    for number in range(70_000):
+        telemetry.record(TelemetryKind.RESTOCK, f"slot{number}", 1)
+    telemetry.record(TelemetryKind.SALE, "slot69999", 150)
+    assert FleetAggregator(BUCKET_SECONDS, processes=1).aggregate([telemetry.snapshot()]).sales_per_product() == {"slot69999": 1}
+
+    sold = serial.sales_per_product()
+    print(f"fleet: {sum(sold.values()):,} sales, ${sum(serial.revenue.values()) / 100:,.2f} revenue, "
+          f"{sum(serial.refused_change.values())} refused for change, top {sold.most_common(2)}")
+    minutes = serial.stockout_minutes()
+    print("stock-out minutes: " + ", ".join(f"{product} {minutes[product]:,.0f}" for product in sorted(minutes)))
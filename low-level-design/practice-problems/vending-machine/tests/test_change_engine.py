@@ -0,0 +1,75 @@
+import random
+from functools import lru_cache
+
+from change_engine import DENOMINATIONS, ChangeEngine
+from money import Money
+
+
+def fewest_coins(amount: int, inventory: dict[Money, int]) -> int | None:
+    # reference answer: try every count of every denomination
+    coins = [(money.cents, inventory.get(money, 0)) for money in DENOMINATIONS]
+
+    @lru_cache(maxsize=None)
+    def best(index: int, remaining: int) -> float:
+        if remaining == 0:
+            return 0
+        if index == len(coins):
+            return float("inf")
+        value, count = coins[index]
+        return min(best(index + 1, remaining - k * value) + k for k in range(min(count, remaining // value) + 1))
+
+    result = best(0, amount)
+    return None if result == float("inf") else result
+
+def test_matches_reference_on_bounded_inventories():
+    rng = random.Random(7)
+    engine = ChangeEngine()
+    for _ in range(200):
+        inventory = {money: rng.randrange(4) for money in DENOMINATIONS if money.cents <= 2_000}
+        amount = rng.randrange(0, 2_000, 5)
+        change = engine.make_change(amount, inventory)
+        expected = fewest_coins(amount, inventory)
+        if expected is None:
+            assert change is None
+            assert not engine.can_make_change(amount, inventory)
+            continue
+        assert sum(money.cents * count for money, count in change.items()) == amount
+        assert sum(change.values()) == expected
+        assert all(count <= inventory[money] for money, count in change.items())
+
+def test_never_uses_more_coins_than_stocked():
+    # greedy takes the quarter and is left needing a nickel there is none of
+    inventory = {Money.QUARTER: 1, Money.DIME: 3, Money.NICKEL: 0}
+    assert ChangeEngine().make_change(30, inventory) == {Money.DIME: 3}
+    inventory = {Money.QUARTER: 1, Money.DIME: 2, Money.NICKEL: 0}
+    assert ChangeEngine().make_change(30, inventory) is None
+
+def test_refuses_when_exact_change_is_impossible():
+    engine = ChangeEngine()
+    assert engine.make_change(5, {Money.DIME: 10}) is None
+    assert engine.make_change(3, {Money.NICKEL: 10}) is None
+    assert engine.make_change(0, {}) == {}
+    assert not engine.can_make_change(75, {Money.HALF_DOLLAR: 1})
+
+def test_cached_tables_follow_the_inventory():
+    engine = ChangeEngine()
+    inventory = {Money.QUARTER: 4}
+    assert engine.make_change(50, inventory) == {Money.QUARTER: 2}
+    inventory[Money.QUARTER] = 1
+    assert engine.make_change(50, inventory) is None
+    inventory[Money.HALF_DOLLAR] = 1
+    assert engine.make_change(50, inventory) == {Money.HALF_DOLLAR: 1}
+    # a table for a larger limit answers a smaller amount from the same inventory
+    engine.make_change(1_000, inventory)
+    hits = engine.hits
+    assert engine.make_change(25, inventory) == {Money.QUARTER: 1}
+    assert engine.hits == hits + 1
+
+def test_restocking_plentiful_coins_reuses_the_table():
+    engine = ChangeEngine()
+    inventory = {Money.QUARTER: 100}
+    engine.make_change(75, inventory)
+    misses = engine.misses
+    inventory[Money.QUARTER] = 500
+    assert engine.make_change(75, inventory) == {Money.QUARTER: 3}
+    assert engine.misses == misses
@@ -0,0 +1,80 @@
+import pytest
+
+from telemetry import FleetAggregator, FleetStats, TelemetryBuffer, TelemetryKind
+
+
+class SteppingClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def record_day(buffer: TelemetryBuffer, clock: SteppingClock, drains: list | None = None):
+    # sales every 5 minutes for a day, a stock-out that spans several drains, and a drain every 2 hours
+    for step in range(288):
+        clock.now = step * 300.0
+        buffer.record(TelemetryKind.SALE, "Coke" if step % 3 else "Water", 150)
+        if step == 40:
+            buffer.record(TelemetryKind.STOCK_OUT, "Water")
+        if step == 100:
+            buffer.record(TelemetryKind.RESTOCK, "Water", 20)
+        if step % 7 == 0:
+            buffer.record(TelemetryKind.REFUSED_CHANGE, "Coke", 850)
+        if step == 250:
+            buffer.record(TelemetryKind.STOCK_OUT, "Coke")
+        if drains is not None and step % 24 == 23:
+            drains.append(buffer.drain())
+
+def assert_same(stats: FleetStats, expected: FleetStats):
+    assert stats.sales == expected.sales
+    assert stats.revenue == expected.revenue
+    assert stats.refused_change == expected.refused_change
+    assert stats.events == expected.events
+    assert stats.stockout_seconds.keys() == expected.stockout_seconds.keys()
+    for key, seconds in expected.stockout_seconds.items():
+        assert stats.stockout_seconds[key] == pytest.approx(seconds)
+
+def test_drains_add_up_to_one_snapshot():
+    clock = SteppingClock()
+    whole = TelemetryBuffer(1024, clock)
+    record_day(whole, clock)
+    expected = FleetAggregator(3600, processes=1).aggregate([whole.snapshot()])
+
+    clock = SteppingClock()
+    drained = TelemetryBuffer(1024, clock)
+    drains = []
+    record_day(drained, clock, drains)
+    stats = FleetStats(3600)
+    for snapshot in drains:
+        stats.merge(FleetAggregator(3600, processes=1).aggregate([snapshot]))
+    assert_same(stats, expected)
+    assert stats.dropped == 0
+    assert len(drained.drain()) == 0
+
+def test_snapshot_recounts_but_drain_does_not():
+    clock = SteppingClock()
+    buffer = TelemetryBuffer(16, clock)
+    for _ in range(5):
+        buffer.record(TelemetryKind.SALE, "Coke", 100)
+    assert len(buffer.drain()) == 5
+    assert len(buffer.snapshot()) == 5
+    for _ in range(3):
+        buffer.record(TelemetryKind.SALE, "Coke", 100)
+    assert len(buffer.drain()) == 3
+    assert len(buffer.snapshot()) == 8
+
+def test_drain_counts_events_overwritten_since_the_last_drain():
+    clock = SteppingClock()
+    buffer = TelemetryBuffer(4, clock)
+    for value in range(3):
+        buffer.record(TelemetryKind.SALE, "Coke", value)
+    buffer.drain()
+    for value in range(3, 10):
+        clock.now += 1
+        buffer.record(TelemetryKind.SALE, "Coke", value)
+    snapshot = buffer.drain()
+    assert list(snapshot.values) == [6, 7, 8, 9]
+    assert snapshot.dropped == 3
+    assert buffer.dropped == 6
@@ -0,0 +1,36 @@
+from money import Money
+from product import Product
+from vending_machine_system import VendingMachineSystem
+
+
+def stocked_machine() -> tuple[VendingMachineSystem, Product]:
+    machine = VendingMachineSystem()
+    coke = Product("Coke", 1.50)
+    machine.add_product(coke)
+    machine.restock_product(coke, 2)
+    return machine, coke
+
+def test_sale_is_refused_before_payment_is_taken():
+    machine, coke = stocked_machine()
+    money = dict(machine.money)
+    assert machine.buy_product(coke, [Money.FIVE_DOLLAR]) is None
+    assert machine.money == money
+    assert machine.products[coke] == 2
+
+def test_change_can_use_the_coins_just_inserted():
+    machine, coke = stocked_machine()
+    machine.add_money(Money.DOLLAR, 1)
+    change = machine.buy_product(coke, [Money.DOLLAR, Money.DOLLAR, Money.HALF_DOLLAR])
+    assert change == {Money.DOLLAR: 1}
+    assert machine.money[Money.DOLLAR] == 2
+    assert machine.money[Money.HALF_DOLLAR] == 1
+    assert machine.products[coke] == 1
+
+def test_get_change_returns_none_and_dispenses_nothing():
+    machine, _ = stocked_machine()
+    machine.add_money(Money.QUARTER, 3)
+    assert machine.get_change(0.80) is None
+    assert machine.get_change(1.00) is None
+    assert machine.money[Money.QUARTER] == 3
+    assert machine.get_change(0.50) == {Money.QUARTER: 2}
+    assert machine.money[Money.QUARTER] == 1
@@ -2,86 +2,115 @@ import logging
 from typing import Optional
 
 from product import Product
-from money import Money
+from money import Money, to_cents
+from change_engine import ChangeEngine
+from telemetry import TelemetryBuffer, TelemetryKind
 
 
 class VendingMachineSystem: 
+    # messages take %-style arguments, so they are only formatted if a handler will emit them
     logger = logging.getLogger(__name__)
 
-    def __init__(self):
+    def __init__(self, telemetry: TelemetryBuffer | None = None):
         self.products: dict[Product, int] = {}
         self.money: dict[Money, int] = {money: 0 for money in Money}
+        self.change_engine = ChangeEngine()
+        self.telemetry = telemetry
 
     def add_product(self, product: Product): 
         if product in self.products:
-            self.logger.warning(f"Product {product.name} is already in the vending machine system.")
+            self.logger.warning("Product %s is already in the vending machine system.", product.name)
             return 
 
         self.products[product] = 0
-        self.logger.info(f"Adding new product {product.name} to vending machine system")
+        self.logger.info("Adding new product %s to vending machine system", product.name)
     
     def remove_product(self, product: Product):
         if product not in self.products:
-            self.logger.warning(f"Product {product.name} is not in vending machine system")
+            self.logger.warning("Product %s is not in vending machine system", product.name)
             return 
     
         del self.products[product]
-        self.logger.info(f"Removing product {product.name} to vending machine system")
+        self.logger.info("Removing product %s to vending machine system", product.name)
 
     def restock_product(self, product: Product, quantity: int): 
         if product not in self.products: 
-            self.logger.warning(f"Product {product.name} not in vending machine system")
+            self.logger.warning("Product %s not in vending machine system", product.name)
             return 
         if quantity <= 0: 
-            self.logger.warning(f"Quantity {quantity} must be greater than 0")
+            self.logger.warning("Quantity %d must be greater than 0", quantity)
             return 
 
         self.products[product] += quantity
-        self.logger.info(f"Restocking {quantity} of {product.name} to vending machine system")
+        if self.telemetry is not None:
+            self.telemetry.record(TelemetryKind.RESTOCK, product.name, quantity)
+        self.logger.info("Restocking %d of %s to vending machine system", quantity, product.name)
 
     def add_money(self, money: Money, quantity: int):
         if quantity <= 0: 
-            self.logger.warning(f"Quantity {quantity} must be greater than 0")
+            self.logger.warning("Quantity %d must be greater than 0", quantity)
         self.money[money] += quantity
     
     def collect_money(self) -> float: 
         result = 0
         for money, quantity in self.money.items(): 
-            result += money.value * quantity
+            result += money.cents * quantity
         self.money: dict[Money, int] = {money: 0 for money in Money}
-        return result
+        return result / 100
 
     def buy_product(self, product: Product, payment: list[Money]) -> dict[Money, int] | None:
         if product not in self.products: 
-            self.logger.warning(f"Product {product.name} is not in vending machine system")
+            self.logger.warning("Product %s is not in vending machine system", product.name)
             return 
         if self.products[product] == 0: 
-            self.logger.warning(f"Product {product.name} is out of stock")
+            self.logger.warning("Product %s is out of stock", product.name)
             return 
         
-        total_payment = sum(money.value for money in payment)
-        if product.price > total_payment: 
-            self.logger.warning(f"Insufficient Funds: {total_payment}/{product.price}")
+        total_payment = sum(money.cents for money in payment)
+        price = to_cents(product.price)
+        if price > total_payment: 
+            self.logger.warning("Insufficient Funds: %.2f/%.2f", total_payment / 100, product.price)
+            return 
+
+        # change may use the coins just inserted, so it is planned against the inventory plus payment
+        # and the sale is refused before any money or product changes hands if it cannot be made
+        inventory = self.__with_payment(payment)
+        change = self.change_engine.make_change(total_payment - price, inventory)
+        if change is None:
+            if self.telemetry is not None:
+                self.telemetry.record(TelemetryKind.REFUSED_CHANGE, product.name, total_payment - price)
+            self.logger.warning("Cannot make change of %.2f for %s", (total_payment - price) / 100, product.name)
             return 
-        
-        change_owed = total_payment - product.price
 
         for money in payment:
             self.money[money] += 1
+        for money, quantity in change.items():
+            self.money[money] -= quantity
 
         self.products[product] -= 1
+        if self.telemetry is not None:
+            self.telemetry.record(TelemetryKind.SALE, product.name, price)
+            if self.products[product] == 0:
+                self.telemetry.record(TelemetryKind.STOCK_OUT, product.name)
+        self.logger.debug("Sold %s for %d cents", product.name, price)
+        return change
 
-        if change_owed > 0.00:
-            return self.get_change(change_owed)
-        else:
-            return {}
+    def can_make_change(self, amount: float, payment: list[Money] = ()) -> bool:
+        return self.change_engine.can_make_change(to_cents(amount), self.__with_payment(payment))
     
     def get_change(self, exceeding_balance: float) -> Optional[dict[Money, int]]: 
-        desc_money = sorted(self.money.keys(), key=lambda x: x.value, reverse=True)
-        change = {}
-        for money in desc_money: 
-            while exceeding_balance > 0 and money.value <= exceeding_balance and self.money[money] > 0: 
-                self.money[money] -= 1
-                exceeding_balance -= money.value
-                change[money] = change.get(money, 0) + 1
-        return change
\ No newline at end of file
+        # fewest coins from the machine's money, None (and nothing dispensed) if it cannot be made exactly
+        change = self.change_engine.make_change(to_cents(exceeding_balance), self.money)
+        if change is None:
+            return None
+        for money, quantity in change.items():
+            self.money[money] -= quantity
+        return change
+
+    def __with_payment(self, payment: list[Money]) -> dict[Money, int]:
+        if not payment:
+            return self.money
+        inventory = dict(self.money)
+        for money in payment:
+            inventory[money] += 1
+        return inventory
\ No newline at end of file